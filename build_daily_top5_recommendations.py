@@ -15,6 +15,8 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
+from indicator_output import output_files
+
 
 DEFAULT_INPUT = Path("stock_data/korean_market_10y_with_indicators.parquet")
 DEFAULT_LOGS_DIR = Path("logs")
@@ -265,7 +267,11 @@ def main() -> int:
         raise FileNotFoundError(f"Input parquet not found: {args.input}")
 
     required_cols = ["Date", "Ticker", "Close", "High", "Volume", *best_logic.feature_names]
-    frame = pd.read_parquet(args.input, columns=required_cols)
+    # The indicator output plus any --append parts not yet compacted into it.
+    frame = pd.concat(
+        [pd.read_parquet(path, columns=required_cols) for path in output_files(args.input)],
+        ignore_index=True,
+    )
     frame["Date"] = pd.to_datetime(frame["Date"]).dt.tz_localize(None)
     frame["Ticker"] = frame["Ticker"].astype("string")
 
@@ -0,0 +1,252 @@
+"""
+Compact small objects in the Hive-partitioned R2 dataset.
+
+Daily appends (upload_new_rows), DuckDB PER_THREAD_OUTPUT exports and reruns leave
+many small files per year=YYYY/ticker=T partition. Partitions with more than
+--max-files objects, or several objects totalling under --small-mb, are merged into
+one date-sorted, de-duplicated ZSTD parquet (newest object wins on duplicate dates).
+
+Swap order per batch of partitions:
+  1. upload the merged objects
+  2. commit the manifest (old keys out, new keys in)
+  3. delete the old objects
+so readers resolving files through the manifest never see duplicates.
+
+Usage:
+  python compact_r2_dataset.py --dry-run
+  python compact_r2_dataset.py --max-files 4 --small-mb 32 --years 2025,2026
+
+Any S3 endpoint works (R2, or MinIO via R2_ENDPOINT=http://localhost:9000);
+compact_dataset() takes a boto3 client, so moto can stand in for tests.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import boto3
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from r2_manifest import (
+    apply_manifest_changes,
+    delete_keys,
+    describe_local_file,
+    list_objects,
+    load_manifest,
+    parse_partition,
+    save_manifest,
+    sync_manifest,
+)
+
+
+BASE_COLUMNS = ["ticker", "date", "open", "high", "low", "close", "volume", "adj_close"]
+
+Partition = Tuple[int, str]
+
+
+def env_required(name: str) -> str:
+    value = os.getenv(name)
+    if not value:
+        raise RuntimeError(f"Missing required env var: {name}")
+    return value
+
+
+def make_s3_client():
+    return boto3.client(
+        "s3",
+        endpoint_url=env_required("R2_ENDPOINT"),
+        aws_access_key_id=env_required("R2_ACCESS_KEY_ID"),
+        aws_secret_access_key=env_required("R2_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("R2_REGION", "auto"),
+    )
+
+
+def select_partitions(
+    objects: Sequence[dict],
+    max_files: int,
+    small_bytes: int,
+    years: Optional[Sequence[int]] = None,
+) -> Dict[Partition, List[dict]]:
+    """Partitions worth compacting: more than max_files objects, or several tiny ones."""
+    grouped: Dict[Partition, List[dict]] = {}
+    for obj in objects:
+        part = parse_partition(obj["Key"])
+        if part is None or (years and part[0] not in years):
+            continue
+        grouped.setdefault(part, []).append(obj)
+
+    selected: Dict[Partition, List[dict]] = {}
+    for part, objs in sorted(grouped.items()):
+        if len(objs) < 2:
+            continue
+        total = sum(o["Size"] for o in objs)
+        if len(objs) > max_files or total < small_bytes:
+            selected[part] = sorted(objs, key=lambda o: (o["LastModified"], o["Key"]))
+    return selected
+
+
+def _normalize_frame(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
+    out = df.drop(columns=["year"], errors="ignore").copy()
+    # DuckDB PARTITION_BY exports keep ticker only in the path.
+    out["ticker"] = ticker
+    out["date"] = pd.to_datetime(out["date"], utc=True).dt.tz_convert(None)
+    if "adj_close" not in out.columns:
+        out["adj_close"] = out["close"]
+    for col in ("open", "high", "low", "close", "adj_close"):
+        out[col] = pd.to_numeric(out[col], errors="coerce").astype("float64")
+    out["volume"] = pd.to_numeric(out["volume"], errors="coerce")
+    extras = [c for c in out.columns if c not in BASE_COLUMNS]
+    return out[BASE_COLUMNS + extras]
+
+
+def merge_partition(s3, bucket: str, ticker: str, objs: Sequence[dict]) -> pd.DataFrame:
+    """Read a partition's objects oldest first; later objects win on duplicate dates."""
+    frames = []
+    for obj in objs:
+        body = s3.get_object(Bucket=bucket, Key=obj["Key"])["Body"].read()
+        frames.append(_normalize_frame(pq.read_table(pa.BufferReader(body)).to_pandas(), ticker))
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
+    if merged["volume"].notna().all():
+        merged["volume"] = merged["volume"].astype("int64")
+    return merged
+
+
+def _compact_one(
+    s3,
+    bucket: str,
+    prefix: str,
+    part: Partition,
+    objs: Sequence[dict],
+    tmp_dir: Path,
+    row_group_rows: int,
+) -> dict:
+    year, ticker = part
+    merged = merge_partition(s3, bucket, ticker, objs)
+    filename = f"part-{year}-compact-{int(time.time() * 1000)}-{uuid4().hex[:8]}.parquet"
+    key = f"{prefix}/year={year}/ticker={ticker}/{filename}"
+    local_path = tmp_dir / filename
+    pq.write_table(
+        pa.Table.from_pandas(merged, preserve_index=False),
+        local_path.as_posix(),
+        compression="zstd",
+        row_group_size=row_group_rows,
+        write_statistics=True,
+    )
+    s3.upload_file(str(local_path), bucket, key)
+    etag = str(s3.head_object(Bucket=bucket, Key=key).get("ETag", "")).strip('"')
+    entry = describe_local_file(key, local_path, etag)
+    local_path.unlink()
+    return entry
+
+
+def compact_dataset(
+    s3,
+    bucket: str,
+    prefix: str,
+    max_files: int = 4,
+    small_mb: float = 32.0,
+    row_group_rows: int = 100_000,
+    years: Optional[Sequence[int]] = None,
+    commit_every: int = 200,
+    workers: int = 8,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    prefix = prefix.strip("/")
+    objects = list_objects(s3, bucket, prefix)
+    candidates = select_partitions(objects, max_files, int(small_mb * 1024 * 1024), years)
+    candidate_objects = sum(len(v) for v in candidates.values())
+    print(
+        f"[COMPACT] objects={len(objects)} partitions_to_compact={len(candidates)} "
+        f"objects_to_merge={candidate_objects}"
+    )
+    summary = {"partitions": 0, "objects_removed": 0, "objects_written": 0}
+    if dry_run:
+        for (year, ticker), objs in list(candidates.items())[:20]:
+            size_kb = sum(o["Size"] for o in objs) / 1024
+            print(f"[COMPACT] would merge year={year} ticker={ticker} files={len(objs)} size={size_kb:,.1f}KB")
+        return summary
+
+    # Bring the manifest in line with the bucket before swapping anything.
+    manifest, synced = sync_manifest(s3, bucket, prefix, load_manifest(s3, bucket, prefix), objects, workers)
+    if synced["added"] or synced["removed"]:
+        save_manifest(s3, bucket, prefix, manifest)
+        print(f"[COMPACT] manifest synced added={synced['added']} removed={synced['removed']}")
+
+    items = list(candidates.items())
+    with tempfile.TemporaryDirectory(prefix="r2_compact_") as d, ThreadPoolExecutor(max_workers=workers) as ex:
+        tmp_dir = Path(d)
+        for start in range(0, len(items), max(1, commit_every)):
+            batch = items[start : start + commit_every]
+            added = list(
+                ex.map(
+                    lambda item: _compact_one(s3, bucket, prefix, item[0], item[1], tmp_dir, row_group_rows),
+                    batch,
+                )
+            )
+            old_keys = [o["Key"] for _, objs in batch for o in objs]
+            manifest = apply_manifest_changes(manifest, added, old_keys)
+            save_manifest(s3, bucket, prefix, manifest)
+            delete_keys(s3, bucket, old_keys)
+
+            summary["partitions"] += len(batch)
+            summary["objects_written"] += len(added)
+            summary["objects_removed"] += len(old_keys)
+            print(
+                f"[COMPACT] committed {summary['partitions']}/{len(items)} partitions "
+                f"objects_removed={summary['objects_removed']}"
+            )
+    return summary
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Compact small parquet objects in the R2 dataset")
+    p.add_argument("--prefix", default=os.getenv("R2_DATASET_PREFIX", "market_data"))
+    p.add_argument("--max-files", type=int, default=4, help="compact partitions with more objects than this")
+    p.add_argument("--small-mb", type=float, default=32.0, help="compact multi-object partitions under this size")
+    p.add_argument("--row-group-rows", type=int, default=100_000)
+    p.add_argument("--years", default="", help="comma-separated years to limit the run")
+    p.add_argument("--commit-every", type=int, default=200, help="partitions per manifest commit")
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--dry-run", action="store_true")
+    return p.parse_args()
+
+
+def main() -> None:
+    load_dotenv(".env.r2.local", override=False)
+    load_dotenv(".env.local", override=False)
+    load_dotenv(".env", override=False)
+
+    args = parse_args()
+    years = [int(y) for y in args.years.split(",") if y.strip()]
+    summary = compact_dataset(
+        make_s3_client(),
+        bucket=env_required("R2_BUCKET"),
+        prefix=args.prefix,
+        max_files=args.max_files,
+        small_mb=args.small_mb,
+        row_group_rows=args.row_group_rows,
+        years=years or None,
+        commit_every=args.commit_every,
+        workers=args.workers,
+        dry_run=args.dry_run,
+    )
+    print(
+        "COMPACT_DONE "
+        f"partitions={summary['partitions']} "
+        f"written={summary['objects_written']} removed={summary['objects_removed']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,23 +4,34 @@ Incremental EOD updater for partitioned Parquet on Cloudflare R2.
 Writes only new partition objects (no full rewrite):
   s3://<bucket>/<prefix>/year=<YYYY>/ticker=<TICKER>/part-<YYYY-MM-DD>-<stamp>.parquet
 
+Known tickers are fetched from the day after their latest stored date and appended as
+one small part file per year touched; merging those into year shards is left to the
+compactor. New tickers are bootstrapped as one compacted file per year.
+Set VS_EOD_WRITE_MODE=year_rewrite to restore the old rewrite-the-current-year behaviour.
+
+Fetching runs on asyncio: per-source token buckets (FinanceDataReader vs yfinance),
+bounded concurrency, jittered exponential retry and a circuit breaker, feeding R2
+upload workers through a bounded queue. The dataset manifest is committed every
+VS_MANIFEST_COMMIT_EVERY (default 25) uploaded tickers rather than once per run.
+
 Requirements:
   pip install duckdb boto3 pandas yfinance pyarrow pykrx finance-datareader
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import random
 import subprocess
 import sys
 import tempfile
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
 import boto3
@@ -31,6 +42,15 @@ import yfinance as yf
 from dotenv import load_dotenv
 from pykrx import stock as pykrx_stock
 
+from r2_manifest import (
+    ManifestJournal,
+    delete_keys,
+    describe_local_file,
+    load_manifest,
+    load_watermarks,
+    watermarks_from_manifest,
+)
+
 
 @dataclass(frozen=True)
 class R2Settings:
@@ -94,7 +114,32 @@ def dataset_glob(settings: R2Settings) -> str:
     )
 
 
-def latest_trade_date(con: duckdb.DuckDBPyConnection, settings: R2Settings, ticker: str) -> Optional[pd.Timestamp]:
+def stored_watermarks(s3, settings: R2Settings) -> Optional[Dict[str, pd.Timestamp]]:
+    """
+    Latest stored date per ticker from the watermark object (or the manifest when the
+    watermark object is missing). None when neither exists yet.
+    """
+    marks = load_watermarks(s3, settings.bucket, settings.dataset_prefix)
+    if marks is None:
+        manifest = load_manifest(s3, settings.bucket, settings.dataset_prefix)
+        if manifest is None:
+            return None
+        marks = watermarks_from_manifest(manifest)
+    marks = marks.dropna(subset=["ticker", "max_date"])
+    return {str(t).upper(): pd.Timestamp(d) for t, d in zip(marks["ticker"], marks["max_date"])}
+
+
+def latest_trade_date(
+    con: duckdb.DuckDBPyConnection,
+    settings: R2Settings,
+    ticker: str,
+    s3=None,
+) -> Optional[pd.Timestamp]:
+    if s3 is not None:
+        marks = stored_watermarks(s3, settings)
+        if marks is not None:
+            return marks.get(ticker.upper())
+
     q = f"""
     SELECT max(date) AS max_date
     FROM read_parquet('{dataset_glob(settings)}', hive_partitioning=1)
@@ -111,7 +156,17 @@ def latest_trade_date(con: duckdb.DuckDBPyConnection, settings: R2Settings, tick
     return pd.Timestamp(out.loc[0, "max_date"])
 
 
-def latest_trade_date_map(con: duckdb.DuckDBPyConnection, settings: R2Settings) -> Dict[str, pd.Timestamp]:
+def latest_trade_date_map(
+    con: duckdb.DuckDBPyConnection,
+    settings: R2Settings,
+    s3=None,
+) -> Dict[str, pd.Timestamp]:
+    if s3 is not None:
+        # One small GET instead of a max(date) scan over the whole dataset.
+        marks = stored_watermarks(s3, settings)
+        if marks is not None:
+            return marks
+
     q = f"""
     SELECT ticker, max(date) AS max_date
     FROM read_parquet('{dataset_glob(settings)}', hive_partitioning=1)
@@ -152,8 +207,7 @@ def normalize_ohlcv(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
 
 
 def fetch_incremental_eod(ticker: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
-    # Korean 6-digit symbols are handled by FinanceDataReader.
-    if ticker.isdigit() and len(ticker) == 6:
+    if fetch_source(ticker) == "fdr":
         raw = fdr.DataReader(ticker, start=start_date.date().isoformat(), end=end_date.date().isoformat())
         if raw.empty:
             return pd.DataFrame()
@@ -185,6 +239,224 @@ def fetch_incremental_eod(ticker: str, start_date: datetime, end_date: datetime)
     return normalize_ohlcv(raw, ticker=ticker)
 
 
+def fetch_source(ticker: str) -> str:
+    # Korean 6-digit symbols are handled by FinanceDataReader.
+    return "fdr" if ticker.isdigit() and len(ticker) == 6 else "yfinance"
+
+
+@dataclass(frozen=True)
+class FetchSettings:
+    concurrency: int = 6
+    source_rates: Tuple[Tuple[str, float], ...] = (("fdr", 8.0), ("yfinance", 4.0))
+    burst: int = 4
+    retries: int = 3
+    retry_base_seconds: float = 0.5
+    retry_max_seconds: float = 20.0
+    breaker_failures: int = 8
+    breaker_cooldown_seconds: float = 60.0
+    upload_workers: int = 4
+    upload_queue: int = 32
+    manifest_commit_every: int = 25
+
+
+def load_fetch_settings() -> FetchSettings:
+    return FetchSettings(
+        concurrency=max(1, int(os.getenv("VS_MAX_WORKERS", "6"))),
+        source_rates=(
+            ("fdr", float(os.getenv("VS_FDR_RATE", "8"))),
+            ("yfinance", float(os.getenv("VS_YF_RATE", "4"))),
+        ),
+        burst=max(1, int(os.getenv("VS_RATE_BURST", "4"))),
+        retries=max(0, int(os.getenv("VS_FETCH_RETRIES", "3"))),
+        retry_base_seconds=float(os.getenv("VS_RETRY_BASE_SECONDS", "0.5")),
+        retry_max_seconds=float(os.getenv("VS_RETRY_MAX_SECONDS", "20")),
+        breaker_failures=max(1, int(os.getenv("VS_BREAKER_FAILURES", "8"))),
+        breaker_cooldown_seconds=float(os.getenv("VS_BREAKER_COOLDOWN_SECONDS", "60")),
+        upload_workers=max(1, int(os.getenv("VS_UPLOAD_WORKERS", "4"))),
+        upload_queue=max(1, int(os.getenv("VS_UPLOAD_QUEUE", "32"))),
+        manifest_commit_every=max(1, int(os.getenv("VS_MANIFEST_COMMIT_EVERY", "25"))),
+    )
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests/second on average, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        self.rate = rate
+        self.capacity = float(max(1, capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling a data source after `failure_threshold` consecutive tickers failed
+    (each after its own retries), so one dead symbol does not trip it.
+    While open, calls fail immediately; after `cooldown_seconds` one trial ticker is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 8, cooldown_seconds: float = 60.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        if self._opened_at is None:
+            return
+        if self._trial_in_flight or time.monotonic() - self._opened_at < self.cooldown_seconds:
+            raise CircuitOpenError(f"circuit open for {self.name}")
+        self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            print(f"[ETL] circuit closed for {self.name}")
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_in_flight or (self._opened_at is None and self._failures >= self.failure_threshold):
+            if self._opened_at is None:
+                print(f"[ETL] circuit opened for {self.name} after {self._failures} consecutive failures")
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+async def fetch_with_retry(
+    ticker: str,
+    start_date: datetime,
+    end_date: datetime,
+    limiter: TokenBucket,
+    breaker: CircuitBreaker,
+    fetch_settings: FetchSettings,
+) -> pd.DataFrame:
+    """fetch_incremental_eod in a worker thread, rate limited, with full-jitter exponential backoff."""
+    breaker.before_call()
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        try:
+            df = await asyncio.to_thread(fetch_incremental_eod, ticker, start_date, end_date)
+        except Exception:
+            if attempt >= fetch_settings.retries:
+                breaker.record_failure()
+                raise
+            ceiling = min(fetch_settings.retry_max_seconds, fetch_settings.retry_base_seconds * (2**attempt))
+            attempt += 1
+            await asyncio.sleep(random.uniform(0.0, ceiling))
+            continue
+        breaker.record_success()
+        return df
+
+
+async def run_fetch_upload_pipeline(
+    tickers: List[str],
+    latest_map: Dict[str, pd.Timestamp],
+    now: datetime,
+    s3,
+    settings: R2Settings,
+    tmp_dir: Path,
+    fetch_settings: FetchSettings,
+    on_result: Callable[[str, int, Optional[str]], None],
+    journal: Optional[ManifestJournal] = None,
+) -> None:
+    """
+    Fetch stage (bounded concurrency, per-source rate limit and breaker) feeding upload
+    workers through a bounded queue, so downloads and R2 writes overlap. A full queue
+    stalls fetching rather than buffering unbounded frames.
+
+    With a journal, the manifest is committed every manifest_commit_every uploaded tickers,
+    so a crash leaves at most one batch of objects the next run does not know about.
+    """
+    limiters = {src: TokenBucket(rate, fetch_settings.burst) for src, rate in fetch_settings.source_rates}
+    breakers = {
+        src: CircuitBreaker(src, fetch_settings.breaker_failures, fetch_settings.breaker_cooldown_seconds)
+        for src in limiters
+    }
+    fetch_slots = asyncio.Semaphore(fetch_settings.concurrency)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=fetch_settings.upload_queue)
+    uncommitted = 0
+
+    async def maybe_commit() -> None:
+        nonlocal uncommitted
+        uncommitted += 1
+        if journal is None or uncommitted < fetch_settings.manifest_commit_every:
+            return
+        uncommitted = 0
+        committed = await asyncio.to_thread(journal.commit, s3, settings.bucket, settings.dataset_prefix)
+        print(
+            f"[ETL MANIFEST] batch added={committed['added']} removed={committed['removed']} "
+            f"deleted={committed['deleted']}"
+        )
+
+    async def fetch_one(ticker: str) -> None:
+        start = fetch_start_date(ticker, latest_map, now)
+        if start is None:
+            on_result(ticker, 0, None)
+            return
+        source = fetch_source(ticker)
+        async with fetch_slots:
+            try:
+                df = await fetch_with_retry(ticker, start, now, limiters[source], breakers[source], fetch_settings)
+            except Exception as exc:
+                on_result(ticker, 0, f"fetch: {exc}")
+                return
+            await queue.put((ticker, df))
+
+    async def upload_worker() -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                ticker, df = item
+                try:
+                    count = await asyncio.to_thread(
+                        store_ticker_rows, s3, settings, ticker, df, tmp_dir, latest_map.get(ticker), journal
+                    )
+                except Exception as exc:
+                    on_result(ticker, 0, f"upload: {exc}")
+                else:
+                    on_result(ticker, count, None)
+                    if count > 0:
+                        await maybe_commit()
+            finally:
+                queue.task_done()
+
+    uploaders = [asyncio.create_task(upload_worker()) for _ in range(fetch_settings.upload_workers)]
+    try:
+        await asyncio.gather(*(fetch_one(t) for t in tickers))
+        for _ in uploaders:
+            await queue.put(None)
+        await asyncio.gather(*uploaders)
+    finally:
+        for task in uploaders:
+            task.cancel()
+
+
 def resolve_tickers(default_tickers: Iterable[str]) -> List[str]:
     if os.getenv("VS_KOSPI_ALL", "false").lower() == "true":
         return sorted(pykrx_stock.get_market_ticker_list(market="KOSPI"))
@@ -197,24 +469,29 @@ def upload_new_rows(
     ticker: str,
     rows: pd.DataFrame,
     tmp_dir: Path,
+    journal: Optional[ManifestJournal] = None,
 ) -> int:
     if rows.empty:
         return 0
     uploaded = 0
     rows = rows.copy()
     rows["year"] = rows["date"].dt.year
-    rows["ds"] = rows["date"].dt.strftime("%Y-%m-%d")
 
-    for (year, ds), chunk in rows.groupby(["year", "ds"], sort=True):
+    # One object per touched year: a multi-day catch-up still adds a single small file.
+    for year, chunk in rows.groupby("year", sort=True):
+        chunk = chunk.drop(columns=["year"]).sort_values("date")
+        ds = chunk["date"].iloc[0].strftime("%Y-%m-%d")
         stamp = int(time.time() * 1000)
         filename = f"part-{ds}-{stamp}-{uuid4().hex[:8]}.parquet"
         local_path = tmp_dir / filename
-        chunk.drop(columns=["year", "ds"]).to_parquet(local_path, index=False)
+        chunk.to_parquet(local_path, index=False)
         key = (
             f"{settings.dataset_prefix}/"
             f"year={year}/ticker={ticker}/{filename}"
         )
         s3.upload_file(str(local_path), settings.bucket, key)
+        if journal is not None:
+            journal.record_upload(describe_local_file(key, local_path))
         uploaded += len(chunk)
     return uploaded
 
@@ -236,18 +513,7 @@ def list_keys_with_prefix(s3, bucket: str, prefix: str) -> List[str]:
 
 
 def delete_prefix(s3, bucket: str, prefix: str) -> int:
-    keys = list_keys_with_prefix(s3, bucket, prefix)
-    if not keys:
-        return 0
-    deleted = 0
-    for i in range(0, len(keys), 1000):
-        chunk = keys[i : i + 1000]
-        s3.delete_objects(
-            Bucket=bucket,
-            Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True},
-        )
-        deleted += len(chunk)
-    return deleted
+    return delete_keys(s3, bucket, list_keys_with_prefix(s3, bucket, prefix))
 
 
 def upload_yearly_compacted(
@@ -256,7 +522,13 @@ def upload_yearly_compacted(
     ticker: str,
     rows: pd.DataFrame,
     tmp_dir: Path,
+    journal: Optional[ManifestJournal] = None,
 ) -> int:
+    """
+    Replace each touched year=YYYY/ticker=T partition with one file. The new object is
+    uploaded before the old ones go; with a journal, the old ones are only deleted once
+    the manifest commit has dropped them.
+    """
     if rows.empty:
         return 0
     rows = rows.copy()
@@ -264,39 +536,81 @@ def upload_yearly_compacted(
     written = 0
     for year, chunk in rows.groupby("year", sort=True):
         prefix = f"{settings.dataset_prefix}/year={year}/ticker={ticker}/"
-        delete_prefix(s3, settings.bucket, prefix)
+        old_keys = list_keys_with_prefix(s3, settings.bucket, prefix)
         filename = f"part-{year}-{uuid4().hex[:8]}.parquet"
         local_path = tmp_dir / filename
         chunk = chunk.drop(columns=["year"]).sort_values("date")
         chunk.to_parquet(local_path, index=False)
         key = f"{prefix}{filename}"
         s3.upload_file(str(local_path), settings.bucket, key)
+        if journal is not None:
+            journal.record_upload(describe_local_file(key, local_path))
+            journal.record_replaced(old_keys)
+        elif old_keys:
+            delete_keys(s3, settings.bucket, old_keys)
         written += len(chunk)
     return written
 
 
-def process_single_ticker(
-    ticker: str,
-    latest_map: Dict[str, pd.Timestamp],
-    now: datetime,
-    s3,
-    settings: R2Settings,
-    tmp_dir: Path,
-) -> Tuple[str, int, Optional[str]]:
+def eod_write_mode() -> str:
+    mode = os.getenv("VS_EOD_WRITE_MODE", "append").strip().lower()
+    if mode not in {"append", "year_rewrite"}:
+        raise RuntimeError(f"VS_EOD_WRITE_MODE must be append or year_rewrite, got: {mode}")
+    return mode
+
+
+def fetch_start_date(ticker: str, latest_map: Dict[str, pd.Timestamp], now: datetime) -> Optional[datetime]:
     max_date = latest_map.get(ticker)
 
     if max_date is None:
         # Bootstrap: full 10-year history -> compact yearly files.
         start = now - timedelta(days=3650)
-    else:
-        # Incremental: rewrite current year shard only (keeps one file/year).
+    elif eod_write_mode() == "year_rewrite":
+        # Legacy: rewrite current year shard only (keeps one file/year).
         start = datetime(now.year, 1, 1)
+    else:
+        # Incremental: only the days after the latest stored bar.
+        start = (max_date.normalize() + pd.Timedelta(days=1)).to_pydatetime()
 
     if start.date() > now.date():
+        return None
+    return start
+
+
+def store_ticker_rows(
+    s3,
+    settings: R2Settings,
+    ticker: str,
+    rows: pd.DataFrame,
+    tmp_dir: Path,
+    latest: Optional[pd.Timestamp],
+    journal: Optional[ManifestJournal] = None,
+) -> int:
+    if latest is None or eod_write_mode() == "year_rewrite":
+        return upload_yearly_compacted(s3, settings, ticker=ticker, rows=rows, tmp_dir=tmp_dir, journal=journal)
+    if rows.empty:
+        return 0
+    # Sources may hand back bars we already hold (timezone shifts, inclusive ranges).
+    return upload_new_rows(
+        s3, settings, ticker=ticker, rows=rows[rows["date"] > latest], tmp_dir=tmp_dir, journal=journal
+    )
+
+
+def process_single_ticker(
+    ticker: str,
+    latest_map: Dict[str, pd.Timestamp],
+    now: datetime,
+    s3,
+    settings: R2Settings,
+    tmp_dir: Path,
+    journal: Optional[ManifestJournal] = None,
+) -> Tuple[str, int, Optional[str]]:
+    start = fetch_start_date(ticker, latest_map, now)
+    if start is None:
         return ticker, 0, None
 
     df = fetch_incremental_eod(ticker=ticker, start_date=start, end_date=now)
-    count = upload_yearly_compacted(s3, settings, ticker=ticker, rows=df, tmp_dir=tmp_dir)
+    count = store_ticker_rows(s3, settings, ticker, df, tmp_dir, latest_map.get(ticker), journal)
     return ticker, count, None
 
 
@@ -309,50 +623,59 @@ def run_daily_update(tickers: Iterable[str]) -> Dict[str, int]:
     results: Dict[str, int] = {}
     failures: Dict[str, str] = {}
     started_at = time.time()
-    request_sleep = float(os.getenv("VS_REQUEST_SLEEP", "0.03"))
-    max_workers = max(1, int(os.getenv("VS_MAX_WORKERS", "6")))
+    fetch_settings = load_fetch_settings()
     resolved = [s.strip().upper() for s in tickers if s.strip()]
 
-    print(f"[ETL] ticker_count={len(resolved)} workers={max_workers} sleep={request_sleep}s")
-    latest_map = latest_trade_date_map(con, settings)
-    print(f"[ETL] existing_tickers_in_r2={len(latest_map)}")
-
-    with tempfile.TemporaryDirectory(prefix="eod_upload_") as d:
-        tmp_dir = Path(d)
-        total = len(resolved)
-        completed = 0
-        with ThreadPoolExecutor(max_workers=max_workers) as ex:
-            futures = {}
-            for ticker in resolved:
-                fut = ex.submit(process_single_ticker, ticker, latest_map, now, s3, settings, tmp_dir)
-                futures[fut] = ticker
-                if request_sleep > 0:
-                    time.sleep(request_sleep)
-
-            for fut in as_completed(futures):
-                ticker = futures[fut]
-                completed += 1
-                pct = (completed / total) * 100 if total else 100.0
-                try:
-                    _, count, _ = fut.result()
-                    results[ticker] = count
-                    status = "updated" if count > 0 else "no-change"
-                    print(f"[{pct:6.2f}%] [{completed}/{total}] {ticker}: {status}, rows={count}")
-                except Exception as exc:
-                    results[ticker] = 0
-                    failures[ticker] = str(exc)
-                    print(f"[{pct:6.2f}%] [{completed}/{total}] {ticker}: failed ({exc})")
-
-                if completed % 25 == 0 or completed == total:
-                    elapsed = max(0.001, time.time() - started_at)
-                    rate = completed / elapsed
-                    remain = total - completed
-                    eta = round(remain / rate, 1)
-                    print(
-                        f"[PROGRESS {pct:6.2f}%] completed={completed}/{total} "
-                        f"rate={rate:.2f} tickers/s eta={eta}s "
-                        f"rows={sum(results.values())} failures={len(failures)}"
-                    )
+    rates = ",".join(f"{src}:{rate:g}/s" for src, rate in fetch_settings.source_rates)
+    print(
+        f"[ETL] ticker_count={len(resolved)} fetch_concurrency={fetch_settings.concurrency} "
+        f"rates={rates} retries={fetch_settings.retries} upload_workers={fetch_settings.upload_workers}"
+    )
+    latest_map = latest_trade_date_map(con, settings, s3)
+    print(f"[ETL] existing_tickers_in_r2={len(latest_map)} write_mode={eod_write_mode()}")
+
+    total = len(resolved)
+    completed = 0
+
+    def on_result(ticker: str, count: int, error: Optional[str]) -> None:
+        nonlocal completed
+        completed += 1
+        pct = (completed / total) * 100 if total else 100.0
+        results[ticker] = count
+        if error is not None:
+            failures[ticker] = error
+            print(f"[{pct:6.2f}%] [{completed}/{total}] {ticker}: failed ({error})")
+        else:
+            status = "updated" if count > 0 else "no-change"
+            print(f"[{pct:6.2f}%] [{completed}/{total}] {ticker}: {status}, rows={count}")
+
+        if completed % 25 == 0 or completed == total:
+            elapsed = max(0.001, time.time() - started_at)
+            rate = completed / elapsed
+            remain = total - completed
+            eta = round(remain / rate, 1)
+            print(
+                f"[PROGRESS {pct:6.2f}%] completed={completed}/{total} "
+                f"rate={rate:.2f} tickers/s eta={eta}s "
+                f"rows={sum(results.values())} failures={len(failures)}"
+            )
+
+    journal = ManifestJournal()
+    try:
+        with tempfile.TemporaryDirectory(prefix="eod_upload_") as d:
+            asyncio.run(
+                run_fetch_upload_pipeline(
+                    resolved, latest_map, now, s3, settings, Path(d), fetch_settings, on_result, journal
+                )
+            )
+    finally:
+        # Commit the last batch (also when the pipeline raised, so its uploads are not orphaned);
+        # replaced year files are deleted after it.
+        committed = journal.commit(s3, settings.bucket, settings.dataset_prefix)
+        print(
+            f"[ETL MANIFEST] added={committed['added']} removed={committed['removed']} "
+            f"deleted={committed['deleted']}"
+        )
 
     con.close()
     elapsed = round(time.time() - started_at, 2)
@@ -13,16 +13,43 @@ Schema:
 
 Default partition layout (Hive-style):
   s3://<bucket>/<prefix>/year=<YYYY>/ticker=<TICKER>/part-*.parquet
+
+Queries resolve an explicit file list from <prefix>/_manifest/manifest.parquet
+(see r2_manifest.py), pruned by ticker and date range, instead of LISTing the
+glob on every scan. Without a manifest they fall back to the glob.
+
+With cache_dir (or R2_CACHE_DIR) set, resolved objects are served from a local
+read-through copy keyed by object key + ETag (see ParquetDiskCache).
+
+Recurring queries go through QueryRegistry (engine.query_registry()): named,
+parameterized statements prepared once per connection and dataset version, with an
+LRU result cache keyed by the manifest version.
+
+With a file db_path, refresh_materialized() keeps a rolling local price history and
+the recurring analytics tables (latest features, 52-week high/low, 20-day momentum)
+in that database, reading only bars newer than each ticker's stored watermark.
 """
 
 from __future__ import annotations
 
+import hashlib
+import math
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, Optional
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
+
+from r2_manifest import manifest_key
 
 try:
     import polars as pl
@@ -30,6 +57,194 @@ except ImportError:  # pragma: no cover - optional dependency
     pl = None
 
 
+# Relation used when the manifest resolves to no files: same columns, no rows.
+EMPTY_PRICES_RELATION = """(
+    SELECT NULL::VARCHAR AS ticker, NULL::TIMESTAMP AS date, NULL::DOUBLE AS open,
+           NULL::DOUBLE AS high, NULL::DOUBLE AS low, NULL::DOUBLE AS close,
+           NULL::BIGINT AS volume, NULL::DOUBLE AS adj_close, NULL::BIGINT AS year
+    WHERE false
+)"""
+
+
+# Query name -> (materialized table, ORDER BY used when reading it back).
+MATERIALIZED_TABLES = {
+    "latest_features": ("mat_latest_features", "ticker"),
+    "high_low_52_week": ("mat_high_low_52w", "ticker"),
+    "cross_section_momentum": ("mat_momentum_20d", "ret_1m DESC"),
+}
+
+MATERIALIZE_SQL = {
+    "mat_latest_features": """
+        WITH raw AS (
+          SELECT
+            ticker,
+            CAST(date AS DATE) AS trade_date,
+            close,
+            high,
+            volume,
+            LAG(close, 1) OVER w AS prev_close_1,
+            LAG(close, 5) OVER w AS prev_close_5,
+            LAG(close, 20) OVER w AS prev_close_20,
+            AVG(close) OVER (w ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS sma20,
+            AVG(close) OVER (w ROWS BETWEEN 59 PRECEDING AND CURRENT ROW) AS sma60,
+            AVG(close) OVER (w ROWS BETWEEN 119 PRECEDING AND CURRENT ROW) AS sma120,
+            AVG(volume) OVER (w ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS vol_avg20,
+            MAX(high) OVER (w ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS high_20,
+            ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+          FROM mat_price_history
+          WINDOW w AS (PARTITION BY ticker ORDER BY date)
+        )
+        SELECT
+          ticker,
+          trade_date,
+          close,
+          CASE WHEN prev_close_1 IS NULL OR prev_close_1 = 0 THEN NULL ELSE (close / prev_close_1 - 1) * 100 END AS ret_1d,
+          CASE WHEN prev_close_5 IS NULL OR prev_close_5 = 0 THEN NULL ELSE (close / prev_close_5 - 1) * 100 END AS ret_5d,
+          CASE WHEN prev_close_20 IS NULL OR prev_close_20 = 0 THEN NULL ELSE (close / prev_close_20 - 1) * 100 END AS ret_20d,
+          sma20,
+          sma60,
+          sma120,
+          CASE WHEN vol_avg20 IS NULL OR vol_avg20 = 0 THEN NULL ELSE volume / vol_avg20 END AS volume_ratio_20d,
+          CASE WHEN high_20 IS NULL OR high_20 = 0 THEN NULL ELSE close / high_20 END AS breakout_ratio_20d
+        FROM raw
+        WHERE rn = 1
+    """,
+    "mat_high_low_52w": """
+        SELECT ticker, max(high) AS high_52w, min(low) AS low_52w
+        FROM mat_price_history
+        WHERE date >= current_date - INTERVAL 365 DAY
+        GROUP BY ticker
+    """,
+    "mat_momentum_20d": """
+        WITH rets AS (
+            SELECT
+                ticker,
+                date,
+                close / lag(close, 20) OVER (PARTITION BY ticker ORDER BY date) - 1 AS ret_1m
+            FROM mat_price_history
+        )
+        SELECT ticker, date, ret_1m
+        FROM rets
+        WHERE ret_1m IS NOT NULL
+        QUALIFY row_number() OVER (PARTITION BY ticker ORDER BY date DESC) = 1
+    """,
+}
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _sql_value(value: Any) -> str:
+    """
+    SQL literal for an EXECUTE argument. DuckDB rejects bound parameters on an EXECUTE
+    statement ("Unexpected prepared parameter. This type of statement can't be prepared!"),
+    so arguments are inlined; non-finite floats use DuckDB's 'nan'/'inf' DOUBLE spellings.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int):
+        return str(int(value))
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "'nan'::DOUBLE"
+        if math.isinf(value):
+            return "'inf'::DOUBLE" if value > 0 else "'-inf'::DOUBLE"
+        return repr(value)
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return _sql_literal(value.isoformat())
+    return _sql_literal(str(value))
+
+
+class ParquetDiskCache:
+    """
+    Local read-through copy of R2 parquet objects, keyed by object key + ETag.
+
+    Writers never modify an object in place (rewrites and compaction produce new keys), so a
+    cached file stays valid for as long as the manifest lists the same key and ETag; a new
+    ETag is simply a different cache entry. Files keep their year=/ticker= directories so
+    hive_partitioning works on the local paths. Least recently used files are evicted once
+    the cache grows past max_bytes.
+
+    The directory is scanned once, at construction; after that an in-memory LRU index
+    (path -> size) and a running total track the cache, so ensure() only touches the
+    requested paths and evicts only while the total is over max_bytes. File mtimes are
+    still bumped on use so the LRU order survives a restart.
+    """
+
+    def __init__(self, root: str, max_bytes: int, fetch_batch: int = 64) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.fetch_batch = fetch_batch
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[Path, int]" = OrderedDict()
+        self._total = 0
+        files = []
+        for f in self.root.rglob("*.parquet"):
+            st = f.stat()
+            files.append((st.st_mtime, st.st_size, f))
+        for _, size, f in sorted(files, key=lambda item: item[0]):
+            self._track(f, size)
+
+    def local_path(self, key: str, etag: str) -> Path:
+        path = Path(key)
+        tag = (etag or "noetag")[:16]
+        return self.root / path.parent / f"{path.stem}.{tag}{path.suffix}"
+
+    def ensure(self, con: duckdb.DuckDBPyConnection, objects: Sequence[Tuple[str, str, str]]) -> List[str]:
+        """
+        Local paths for (uri, key, etag) objects, downloading the missing ones through
+        `con` (read_blob over httpfs, so the session's R2 credentials apply).
+        """
+        paths = [self.local_path(key, etag) for _, key, etag in objects]
+        with self._lock:
+            missing = {}
+            for (uri, _, _), path in zip(objects, paths):
+                if path.exists():
+                    if path not in self._index:
+                        self._track(path, path.stat().st_size)
+                else:
+                    self._untrack(path)
+                    missing[uri] = path
+            uris = list(missing)
+            for start in range(0, len(uris), self.fetch_batch):
+                batch = uris[start : start + self.fetch_batch]
+                for uri, content in con.execute("SELECT filename, content FROM read_blob(?)", [batch]).fetchall():
+                    dest = missing[uri]
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = dest.with_name(f"{dest.name}.{uuid4().hex[:8]}.tmp")
+                    tmp.write_bytes(content)
+                    os.replace(tmp, dest)
+                    self._track(dest, len(content))
+            now = time.time()
+            for path in paths:
+                os.utime(path, (now, now))
+                self._index.move_to_end(path)
+            if self._total > self.max_bytes:
+                self._evict(keep=set(paths))
+        return [path.as_posix() for path in paths]
+
+    def _track(self, path: Path, size: int) -> None:
+        self._untrack(path)
+        self._index[path] = size
+        self._total += size
+
+    def _untrack(self, path: Path) -> None:
+        self._total -= self._index.pop(path, 0)
+
+    def _evict(self, keep: set) -> None:
+        # Oldest first; the paths in use were just moved to the end, so stop at the first one.
+        while self._total > self.max_bytes and self._index:
+            path = next(iter(self._index))
+            if path in keep:
+                break
+            self._untrack(path)
+            path.unlink(missing_ok=True)
+
+
 @dataclass(frozen=True)
 class R2Config:
     endpoint: str
@@ -53,9 +268,25 @@ class StockDataAnalytic:
         db_path: str = ":memory:",
         temp_directory: Optional[str] = None,
         threads: int = max((os.cpu_count() or 4) - 1, 1),
+        use_manifest: bool = True,
+        manifest_ttl_seconds: float = 60.0,
+        cache_dir: Optional[str] = None,
+        cache_max_gb: Optional[float] = None,
     ) -> None:
         self.config = config or self._from_env()
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         self.con = duckdb.connect(database=db_path)
+        self.use_manifest = use_manifest
+        self.manifest_ttl_seconds = manifest_ttl_seconds
+        self._manifest: Optional[pd.DataFrame] = None
+        self._manifest_version: Optional[str] = None
+        self._manifest_loaded_at = float("-inf")
+        self._registry: Optional["QueryRegistry"] = None
+        cache_dir = cache_dir or os.getenv("R2_CACHE_DIR")
+        if cache_max_gb is None:
+            cache_max_gb = float(os.getenv("R2_CACHE_MAX_GB", "20"))
+        self.cache = ParquetDiskCache(cache_dir, int(cache_max_gb * 1024**3)) if cache_dir else None
         self._bootstrap(temp_directory=temp_directory, threads=threads)
 
     @staticmethod
@@ -104,21 +335,221 @@ class StockDataAnalytic:
             "year=*/ticker=*/part-*.parquet"
         )
 
+    @property
+    def manifest_uri(self) -> str:
+        return f"s3://{self.config.bucket}/{manifest_key(self.config.dataset_prefix)}"
+
+    def manifest(self, refresh: bool = False) -> Optional[pd.DataFrame]:
+        """The dataset manifest (cached for manifest_ttl_seconds), or None if there is none."""
+        if not self.use_manifest:
+            return None
+        now = time.monotonic()
+        if refresh or now - self._manifest_loaded_at > self.manifest_ttl_seconds:
+            try:
+                self._manifest = self.con.execute(
+                    f"SELECT * FROM read_parquet({_sql_literal(self.manifest_uri)})"
+                ).df()
+            except duckdb.IOException:
+                self._manifest = None
+            self._manifest_version = None
+            if self._manifest is not None:
+                listing = "\n".join(sorted(self._manifest["key"] + ":" + self._manifest["etag"].fillna("")))
+                self._manifest_version = hashlib.sha1(listing.encode("utf-8")).hexdigest()
+            self._manifest_loaded_at = now
+        return self._manifest
+
+    def manifest_version(self) -> Optional[str]:
+        """Digest of the manifest's (key, etag) set; changes with every writer commit."""
+        self.manifest()
+        return self._manifest_version
+
+    def _resolve_entries(
+        self,
+        tickers: Optional[Sequence[str]],
+        start_date: Optional[str],
+        end_date: Optional[str],
+    ) -> Optional[pd.DataFrame]:
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        mask = pd.Series(True, index=manifest.index)
+        if tickers is not None:
+            mask &= manifest["ticker"].isin([str(t).upper() for t in tickers])
+        # Entries without date stats are always kept.
+        if start_date is not None:
+            mask &= ~(manifest["max_date"] < pd.Timestamp(start_date))
+        if end_date is not None:
+            mask &= ~(manifest["min_date"] > pd.Timestamp(end_date))
+        return manifest.loc[mask].sort_values(["ticker", "year", "key"])
+
+    def resolve_files(
+        self,
+        tickers: Optional[Sequence[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Optional[List[str]]:
+        """
+        s3:// URIs of the objects that can hold rows for `tickers` in [start_date, end_date],
+        or None when there is no manifest (callers then scan the glob).
+        """
+        entries = self._resolve_entries(tickers, start_date, end_date)
+        if entries is None:
+            return None
+        return [f"s3://{self.config.bucket}/{key}" for key in entries["key"]]
+
+    def dataset_source(
+        self,
+        tickers: Optional[Sequence[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> str:
+        """FROM-clause relation over the price dataset, pruned through the manifest when available."""
+        entries = self._resolve_entries(tickers, start_date, end_date)
+        if entries is None:
+            return f"read_parquet({_sql_literal(self.data_glob)}, hive_partitioning=1)"
+        if entries.empty:
+            return EMPTY_PRICES_RELATION
+        files = [f"s3://{self.config.bucket}/{key}" for key in entries["key"]]
+        if self.cache is not None:
+            files = self.cache.ensure(self.con, list(zip(files, entries["key"], entries["etag"].fillna(""))))
+        file_list = ", ".join(_sql_literal(f) for f in files)
+        return f"read_parquet([{file_list}], hive_partitioning=1, union_by_name=true)"
+
+    def refresh_materialized(self, history_days: int = 400, overlap_days: int = 10) -> Dict[str, int]:
+        """
+        Bring mat_price_history (the last `history_days` of bars) up to date and rebuild the
+        MATERIALIZED_TABLES from it. Only bars newer than each ticker's stored max(date) are
+        inserted. Tickers the history lacks always get a full window (the ones the manifest
+        lists, or, without a manifest, any ticker in the glob). Stored tickers are read from
+        their own max(date) minus `overlap_days` (late rows), in two groups so one lagging
+        ticker does not widen the read for the rest: those within `overlap_days` of the
+        newest date, and the laggards from the oldest laggard's date.
+        """
+        self.con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS mat_price_history (
+                ticker VARCHAR, date TIMESTAMP, open DOUBLE, high DOUBLE, low DOUBLE,
+                close DOUBLE, volume BIGINT, adj_close DOUBLE
+            )
+            """
+        )
+        marks = self.con.execute("SELECT ticker, max(date) AS max_date FROM mat_price_history GROUP BY ticker").df()
+        window_start = pd.Timestamp.now().normalize() - pd.Timedelta(days=history_days)
+
+        # (tickers, start, new_only): new_only reads insert tickers absent from the history;
+        # the others are limited to `tickers` and insert rows past each ticker's max(date).
+        reads: List[Tuple[Optional[List[str]], pd.Timestamp, bool]] = []
+        manifest = self.manifest()
+        if manifest is None:
+            reads.append((None, window_start, True))
+        else:
+            new_tickers = sorted(set(manifest["ticker"].dropna()) - set(marks["ticker"]))
+            if new_tickers:
+                reads.append((new_tickers, window_start, True))
+        if not marks.empty:
+            overlap = pd.Timedelta(days=overlap_days)
+            max_dates = pd.to_datetime(marks["max_date"])
+            lagging = max_dates < max_dates.max() - overlap
+            for group in (marks[~lagging], marks[lagging]):
+                if not group.empty:
+                    start = max(window_start, pd.Timestamp(group["max_date"].min()) - overlap)
+                    reads.append((sorted(group["ticker"]), start, False))
+
+        added = 0
+        for tickers, start, new_only in reads:
+            source = self.dataset_source(tickers=tickers, start_date=start.strftime("%Y-%m-%d"))
+            ticker_filter = ""
+            if tickers is not None:
+                ticker_filter = f"AND upper(ticker) IN ({', '.join(_sql_literal(str(t).upper()) for t in tickers)})"
+            keep = "wm.max_date IS NULL" if new_only else "src.date > wm.max_date"
+            added += self.con.execute(
+                f"""
+                INSERT INTO mat_price_history
+                SELECT src.ticker, src.date, src.open, src.high, src.low, src.close, src.volume, src.adj_close
+                FROM (
+                    SELECT
+                        upper(ticker)::VARCHAR AS ticker, date::TIMESTAMP AS date, open::DOUBLE AS open,
+                        high::DOUBLE AS high, low::DOUBLE AS low, close::DOUBLE AS close,
+                        volume::BIGINT AS volume, COALESCE(adj_close, close)::DOUBLE AS adj_close
+                    FROM {source}
+                    WHERE date >= ?::TIMESTAMP {ticker_filter}
+                    QUALIFY row_number() OVER (PARTITION BY upper(ticker), date) = 1
+                ) src
+                LEFT JOIN (
+                    SELECT ticker, max(date) AS max_date FROM mat_price_history GROUP BY ticker
+                ) wm ON wm.ticker = src.ticker
+                WHERE {keep}
+                """,
+                [start],
+            ).fetchone()[0]
+
+        self.con.execute("BEGIN TRANSACTION")
+        try:
+            trimmed = self.con.execute("DELETE FROM mat_price_history WHERE date < ?", [window_start]).fetchone()[0]
+            for table, query in MATERIALIZE_SQL.items():
+                self.con.execute(f"CREATE OR REPLACE TABLE {table} AS {query}")
+            self.con.execute("COMMIT")
+        except Exception:
+            self.con.execute("ROLLBACK")
+            raise
+        history_rows = self.con.execute("SELECT count(*) FROM mat_price_history").fetchone()[0]
+        return {"rows_added": int(added), "rows_trimmed": int(trimmed), "history_rows": int(history_rows)}
+
+    def materialized(self, name: str) -> pd.DataFrame:
+        """A table built by refresh_materialized(), by query name (see MATERIALIZED_TABLES)."""
+        if name not in MATERIALIZED_TABLES:
+            raise KeyError(f"Unknown materialized query: {name}")
+        table, order_by = MATERIALIZED_TABLES[name]
+        return self.to_pandas(f"SELECT * FROM {table} ORDER BY {order_by}")
+
+    def _execute(self, query: str, params: Optional[Iterable[Any]] = None, con=None):
+        con = con or self.con
+        return con.execute(query, list(params) if params is not None else [])
+
     def sql(self, query: str, params: Optional[Iterable[Any]] = None) -> pd.DataFrame:
-        if params is None:
-            return self.con.sql(query).to_df()
-        return self.con.execute(query, list(params)).df()
+        return self.to_pandas(query, params=params)
+
+    def to_arrow(self, query: str, params: Optional[Iterable[Any]] = None) -> pa.Table:
+        result = self._execute(query, params)
+        fetch = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+        return fetch()
 
-    def to_pandas(self, query: str, params: Optional[Iterable[Any]] = None) -> pd.DataFrame:
-        if params is None:
-            return self.con.sql(query).to_df()
-        return self.con.execute(query, list(params)).df()
+    def to_pandas(
+        self,
+        query: str,
+        params: Optional[Iterable[Any]] = None,
+        arrow_dtypes: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Query result as pandas. arrow_dtypes=True keeps the Arrow buffers (pd.ArrowDtype
+        columns) instead of converting to NumPy dtypes.
+        """
+        if arrow_dtypes:
+            return self.to_arrow(query, params=params).to_pandas(types_mapper=pd.ArrowDtype)
+        return self._execute(query, params).df()
 
     def to_polars(self, query: str, params: Optional[Iterable[Any]] = None):
         if pl is None:
             raise RuntimeError("Polars is not installed. pip install polars")
-        df = self.to_pandas(query, params=params)
-        return pl.from_pandas(df)
+        return self._execute(query, params).pl()
+
+    def iter_batches(
+        self,
+        query: str,
+        params: Optional[Iterable[Any]] = None,
+        batch_rows: int = 1_000_000,
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Stream a result as Arrow record batches of up to batch_rows rows, for results that
+        do not fit in memory. Runs on its own cursor, so the engine stays usable meanwhile.
+        """
+        cursor = self.con.cursor()
+        try:
+            result = self._execute(query, params, con=cursor)
+            read = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+            yield from read(batch_rows)
+        finally:
+            cursor.close()
 
     def get_prices(
         self,
@@ -127,9 +558,10 @@ class StockDataAnalytic:
         end_date: str,
         as_polars: bool = False,
     ):
+        source = self.dataset_source(tickers=[ticker], start_date=start_date, end_date=end_date)
         query = f"""
         SELECT ticker, date, open, high, low, close, volume, adj_close
-        FROM read_parquet('{self.data_glob}', hive_partitioning=1)
+        FROM {source}
         WHERE ticker = ?
           AND date >= ?::TIMESTAMP
           AND date < ?::TIMESTAMP
@@ -139,62 +571,141 @@ class StockDataAnalytic:
             return self.to_polars(query, params=[ticker, start_date, end_date])
         return self.to_pandas(query, params=[ticker, start_date, end_date])
 
-    def with_indicators_pandas(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-        df = self.get_prices(ticker=ticker, start_date=start_date, end_date=end_date)
-        if df.empty:
-            return df
+    def get_prices_many(
+        self,
+        tickers: Sequence[str],
+        start_date: str,
+        end_date: str,
+        as_polars: bool = False,
+    ):
+        """One scan for a panel of tickers, long format ordered by (ticker, date)."""
+        tickers = sorted({str(t).upper() for t in tickers})
+        if not tickers:
+            tickers = [""]  # IN () is not valid SQL; '' matches no ticker.
+        source = self.dataset_source(tickers=tickers, start_date=start_date, end_date=end_date)
+        # Literal IN-list (not a bound list) so the glob fallback can prune ticker= partitions.
+        in_list = ", ".join(_sql_literal(t) for t in tickers)
+        query = f"""
+        SELECT ticker, date, open, high, low, close, volume, adj_close
+        FROM {source}
+        WHERE ticker IN ({in_list})
+          AND date >= ?::TIMESTAMP
+          AND date < ?::TIMESTAMP
+        ORDER BY ticker, date
+        """
+        if as_polars:
+            return self.to_polars(query, params=[start_date, end_date])
+        return self.to_pandas(query, params=[start_date, end_date])
+
+    @staticmethod
+    def _indicators_pandas(df: pd.DataFrame) -> pd.DataFrame:
+        """RSI(14) and MACD(12, 26, 9) per ticker on a (ticker, date)-ordered frame."""
+        by_ticker = df["ticker"]
         close = df["close"]
-        delta = close.diff()
+        delta = close.groupby(by_ticker, sort=False).diff()
         gains = delta.clip(lower=0.0)
         losses = (-delta).clip(lower=0.0)
-        avg_gain = gains.rolling(14).mean()
-        avg_loss = losses.rolling(14).mean().replace(0, pd.NA)
+        avg_gain = gains.groupby(by_ticker, sort=False).rolling(14).mean().droplevel(0)
+        avg_loss = losses.groupby(by_ticker, sort=False).rolling(14).mean().droplevel(0).replace(0, pd.NA)
         rs = avg_gain / avg_loss
         df["rsi_14"] = 100 - (100 / (1 + rs))
 
-        ema_fast = close.ewm(span=12, adjust=False).mean()
-        ema_slow = close.ewm(span=26, adjust=False).mean()
+        by_close = close.groupby(by_ticker, sort=False)
+        ema_fast = by_close.ewm(span=12, adjust=False).mean().droplevel(0)
+        ema_slow = by_close.ewm(span=26, adjust=False).mean().droplevel(0)
         df["macd"] = ema_fast - ema_slow
-        df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
+        df["macd_signal"] = df["macd"].groupby(by_ticker, sort=False).ewm(span=9, adjust=False).mean().droplevel(0)
         df["macd_hist"] = df["macd"] - df["macd_signal"]
         return df
 
-    def with_indicators_polars(self, ticker: str, start_date: str, end_date: str):
-        if pl is None:
-            raise RuntimeError("Polars is not installed. pip install polars")
-        df = self.get_prices(ticker=ticker, start_date=start_date, end_date=end_date, as_polars=True)
-        if df.is_empty():
-            return df
+    @staticmethod
+    def _indicators_polars(df):
+        """Polars counterpart of _indicators_pandas; every window runs .over("ticker")."""
         return df.with_columns(
             [
-                pl.col("close").ewm_mean(span=12).alias("ema_12"),
-                pl.col("close").ewm_mean(span=26).alias("ema_26"),
+                pl.col("close").ewm_mean(span=12).over("ticker").alias("ema_12"),
+                pl.col("close").ewm_mean(span=26).over("ticker").alias("ema_26"),
             ]
         ).with_columns(
             [
                 (pl.col("ema_12") - pl.col("ema_26")).alias("macd"),
-                pl.col("close").diff().alias("delta"),
+                pl.col("close").diff().over("ticker").alias("delta"),
             ]
         ).with_columns(
             [
-                pl.when(pl.col("delta") > 0).then(pl.col("delta")).otherwise(0.0).rolling_mean(14).alias("avg_gain"),
-                pl.when(pl.col("delta") < 0).then(-pl.col("delta")).otherwise(0.0).rolling_mean(14).alias("avg_loss"),
+                pl.when(pl.col("delta") > 0)
+                .then(pl.col("delta"))
+                .otherwise(0.0)
+                .rolling_mean(14)
+                .over("ticker")
+                .alias("avg_gain"),
+                pl.when(pl.col("delta") < 0)
+                .then(-pl.col("delta"))
+                .otherwise(0.0)
+                .rolling_mean(14)
+                .over("ticker")
+                .alias("avg_loss"),
             ]
         ).with_columns(
             [
                 (100 - (100 / (1 + (pl.col("avg_gain") / pl.col("avg_loss"))))).alias("rsi_14"),
-                pl.col("macd").ewm_mean(span=9).alias("macd_signal"),
+                pl.col("macd").ewm_mean(span=9).over("ticker").alias("macd_signal"),
             ]
         ).with_columns((pl.col("macd") - pl.col("macd_signal")).alias("macd_hist")).drop(
             ["ema_12", "ema_26", "delta", "avg_gain", "avg_loss"]
         )
 
+    def with_indicators_pandas(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        df = self.get_prices(ticker=ticker, start_date=start_date, end_date=end_date)
+        if df.empty:
+            return df
+        return self._indicators_pandas(df)
+
+    def with_indicators_polars(self, ticker: str, start_date: str, end_date: str):
+        if pl is None:
+            raise RuntimeError("Polars is not installed. pip install polars")
+        df = self.get_prices(ticker=ticker, start_date=start_date, end_date=end_date, as_polars=True)
+        if df.is_empty():
+            return df
+        return self._indicators_polars(df)
+
+    def with_indicators_many(
+        self,
+        tickers: Sequence[str],
+        start_date: str,
+        end_date: str,
+        as_polars: bool = False,
+        as_dict: bool = False,
+    ):
+        """
+        Indicators for a panel of tickers from a single get_prices_many scan. Returns one long
+        frame, or {ticker: frame} with as_dict=True.
+        """
+        if as_polars:
+            if pl is None:
+                raise RuntimeError("Polars is not installed. pip install polars")
+            df = self.get_prices_many(tickers, start_date, end_date, as_polars=True)
+            if not df.is_empty():
+                df = self._indicators_polars(df)
+            if not as_dict:
+                return df
+            return {frame["ticker"][0]: frame for frame in df.partition_by("ticker", maintain_order=True)}
+
+        df = self.get_prices_many(tickers, start_date, end_date)
+        if not df.empty:
+            df = self._indicators_pandas(df)
+        if not as_dict:
+            return df
+        return {ticker: frame.reset_index(drop=True) for ticker, frame in df.groupby("ticker", sort=False)}
+
     @staticmethod
-    def sql_templates(data_glob: str) -> Dict[str, str]:
+    def sql_templates(data_glob: str, source: Optional[str] = None) -> Dict[str, str]:
+        """Named queries over `source` (see dataset_source), or over data_glob when not given."""
+        source = source or f"read_parquet('{data_glob}', hive_partitioning=1)"
         return {
             "ohlcv_slice": f"""
                 SELECT ticker, date, open, high, low, close, volume, adj_close
-                FROM read_parquet('{data_glob}', hive_partitioning=1)
+                FROM {source}
                 WHERE ticker = ?
                   AND date BETWEEN ?::TIMESTAMP AND ?::TIMESTAMP
                 ORDER BY date
@@ -202,7 +713,7 @@ class StockDataAnalytic:
             "high_low_52_week": f"""
                 WITH last_year AS (
                     SELECT ticker, date, high, low
-                    FROM read_parquet('{data_glob}', hive_partitioning=1)
+                    FROM {source}
                     WHERE date >= current_date - INTERVAL 365 DAY
                 )
                 SELECT
@@ -219,7 +730,7 @@ class StockDataAnalytic:
                         ticker,
                         date,
                         close / lag(close, 20) OVER (PARTITION BY ticker ORDER BY date) - 1 AS ret_1m
-                    FROM read_parquet('{data_glob}', hive_partitioning=1)
+                    FROM {source}
                 )
                 SELECT ticker, date, ret_1m
                 FROM rets
@@ -229,5 +740,122 @@ class StockDataAnalytic:
             """,
         }
 
+    def query_registry(self) -> "QueryRegistry":
+        """This engine's QueryRegistry, with the sql_templates registered."""
+        if self._registry is None:
+            self._registry = QueryRegistry(self)
+            for name, query in self.sql_templates(self.data_glob, source="{source}").items():
+                self._registry.register(name, query)
+        return self._registry
+
     def close(self) -> None:
         self.con.close()
+
+
+@dataclass(frozen=True)
+class NamedQuery:
+    name: str
+    sql: str  # "{source}" marks the dataset relation; parameters are ? or $n
+    cacheable: bool = True
+
+
+class QueryRegistry:
+    """
+    Named, parameterized queries prepared once per connection.
+
+    A statement is re-prepared only when the dataset version (manifest digest) or the
+    start_date its file list was pruned to changes; otherwise EXECUTE just binds the
+    parameters. With a manifest, results are kept in an LRU keyed by (name, params,
+    start_date, manifest version, current date), so repeated calls return without touching
+    R2 until the next writer commit (watermarks are saved with the manifest). Without a
+    manifest there is no version to key on: the glob's file list is fixed when the statement
+    is prepared, so it is re-prepared once per manifest_ttl_seconds window to pick up new
+    objects, and results are not cached.
+    """
+
+    def __init__(self, engine: StockDataAnalytic, cache_entries: int = 64) -> None:
+        self.engine = engine
+        self.cache_entries = cache_entries
+        self._queries: Dict[str, NamedQuery] = {}
+        self._prepared: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._results: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+        self._results_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, sql: str, cacheable: bool = True) -> None:
+        self._queries[name] = NamedQuery(name=name, sql=sql, cacheable=cacheable)
+        self._prepared.pop(name, None)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._queries
+
+    def names(self) -> List[str]:
+        return sorted(self._queries)
+
+    @staticmethod
+    def _statement_name(name: str) -> str:
+        return "q_" + re.sub(r"[^0-9A-Za-z_]", "_", name)
+
+    def _glob_epoch(self) -> str:
+        """Stand-in version for a manifest-less (glob) source; changes every manifest TTL."""
+        ttl = max(1.0, float(self.engine.manifest_ttl_seconds))
+        return f"glob@{int(time.time() // ttl)}"
+
+    def _prepare(self, query: NamedQuery, start_date: Optional[str], version: str, force: bool) -> str:
+        stmt = self._statement_name(query.name)
+        identity = (version, start_date)
+        if force or self._prepared.get(query.name) != identity:
+            if query.name in self._prepared:
+                self.engine.con.execute(f"DEALLOCATE {stmt}")
+                del self._prepared[query.name]
+            source = self.engine.dataset_source(start_date=start_date)
+            self.engine.con.execute(f"PREPARE {stmt} AS {query.sql.replace('{source}', source)}")
+            self._prepared[query.name] = identity
+        return stmt
+
+    def run(
+        self,
+        name: str,
+        params: Sequence[Any] = (),
+        start_date: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Execute a registered query. start_date prunes the statement's file list to objects
+        holding rows on or after it (part of the prepared statement's identity).
+        """
+        if name not in self._queries:
+            raise KeyError(f"Unknown query: {name} | registered: {', '.join(self.names())}")
+        query = self._queries[name]
+        version = self.engine.manifest_version()
+        key = (name, tuple(params), start_date, version, date.today().isoformat())
+        cacheable = use_cache and query.cacheable and version is not None
+        identity = version if version is not None else self._glob_epoch()
+
+        with self._lock:
+            if version != self._results_version:
+                self._results.clear()
+                self._results_version = version
+            if cacheable and key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key].copy()
+
+            args = f"({', '.join(_sql_value(v) for v in params)})" if params else ""
+            stmt = self._prepare(query, start_date, identity, force=False)
+            try:
+                df = self.engine.to_pandas(f"EXECUTE {stmt}{args}")
+            except duckdb.IOException:
+                # A local cache file the statement was prepared with may have been evicted.
+                stmt = self._prepare(query, start_date, identity, force=True)
+                df = self.engine.to_pandas(f"EXECUTE {stmt}{args}")
+
+            if cacheable:
+                self._results[key] = df
+                while len(self._results) > self.cache_entries:
+                    self._results.popitem(last=False)
+                return df.copy()
+        return df
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,56 @@
+"""
+File layout of the parallel_technical_indicators output.
+
+A full run writes one parquet file (<output>). Each --append run adds its new bars as one
+part file under <output_dir>/<stem>.appends/part-<stamp>.parquet instead of rewriting the
+output; `parallel_technical_indicators.py --compact` merges the pending parts back into the
+output in ticker order. Readers take output_files(output) to see both.
+
+Compaction writes the merged output first and deletes the absorbed parts afterwards. The
+merged output lists those part names in its footer metadata, so parts left behind by an
+interrupted compaction are skipped here rather than read twice.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List, Set
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+APPENDS_SUFFIX = ".appends"
+COMPACTED_PARTS_KEY = b"indicator_output.compacted_parts"
+
+
+def append_parts_dir(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}{APPENDS_SUFFIX}")
+
+
+def compacted_part_names(schema: pa.Schema) -> Set[str]:
+    """Part file names already merged into the output whose schema this is."""
+    raw = (schema.metadata or {}).get(COMPACTED_PARTS_KEY)
+    return set(json.loads(raw)) if raw else set()
+
+
+def with_compacted_part_names(schema: pa.Schema, names: List[str]) -> pa.Schema:
+    metadata = {k: v for k, v in (schema.metadata or {}).items() if k != COMPACTED_PARTS_KEY}
+    if names:
+        metadata[COMPACTED_PARTS_KEY] = json.dumps(sorted(names)).encode("utf-8")
+    return schema.with_metadata(metadata)
+
+
+def append_parts(output_path: Path) -> List[Path]:
+    """Append part files not yet merged into output_path, oldest first."""
+    parts_dir = append_parts_dir(output_path)
+    if not parts_dir.is_dir():
+        return []
+    merged = compacted_part_names(pq.read_schema(output_path.as_posix())) if output_path.exists() else set()
+    return [p for p in sorted(parts_dir.glob("part-*.parquet")) if p.name not in merged]
+
+
+def output_files(output_path: Path) -> List[Path]:
+    """The output file followed by its pending append parts: everything a reader should scan."""
+    return [output_path, *append_parts(output_path)]
@@ -12,15 +12,23 @@ Output columns:
 Usage:
   python kospi_tomorrow_signal.py --top-n 20
   python kospi_tomorrow_signal.py --as-of 2026-02-12 --top-n 30 --save-csv logs/kospi_top30.csv
+  python kospi_tomorrow_signal.py --db-path .duckdb/analytics.duckdb   # incremental, materialized
+  python kospi_tomorrow_signal.py --from 2025-01-02 --to 2025-12-30 --out-dir logs/kospi_rankings
 """
 
 from __future__ import annotations
 
 import argparse
-from datetime import datetime
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 from dotenv import load_dotenv
 
 from duckdb_r2_analytics import StockDataAnalytic
@@ -42,25 +50,32 @@ def parse_args() -> argparse.Namespace:
         help="as-of date in YYYY-MM-DD. default: latest available date",
     )
     parser.add_argument("--save-csv", type=str, default="", help="optional output csv path")
+    parser.add_argument(
+        "--db-path",
+        type=str,
+        default=os.getenv("R2_DUCKDB_PATH", ""),
+        help="persistent DuckDB file; latest features are read from its materialized table",
+    )
+    parser.add_argument(
+        "--from",
+        dest="date_from",
+        type=str,
+        default="",
+        help="range mode: rank every trading day from this date (YYYY-MM-DD)",
+    )
+    parser.add_argument("--to", dest="date_to", type=str, default="", help="range mode end date. default: today")
+    parser.add_argument(
+        "--out-dir",
+        type=str,
+        default="logs/kospi_rankings",
+        help="range mode output: parquet partitioned by trade_date",
+    )
     return parser.parse_args()
 
 
-def _as_of_filter(as_of: str) -> str:
-    if not as_of:
-        return ""
-    try:
-        datetime.strptime(as_of, "%Y-%m-%d")
-    except ValueError as exc:
-        raise ValueError("--as-of must be YYYY-MM-DD") from exc
-    return f"AND date <= DATE '{as_of}'"
+FEATURE_QUERY_NAME = "kospi_latest_features"
 
-
-def load_feature_frame(engine: StockDataAnalytic, lookback_days: int, as_of: str) -> pd.DataFrame:
-    as_of_clause = _as_of_filter(as_of)
-
-    query = f"""
-    WITH raw AS (
-      SELECT
+_FEATURE_WINDOW_COLUMNS = """
         ticker,
         CAST(date AS DATE) AS trade_date,
         close,
@@ -73,14 +88,9 @@ def load_feature_frame(engine: StockDataAnalytic, lookback_days: int, as_of: str
         AVG(close) OVER (PARTITION BY ticker ORDER BY date ROWS BETWEEN 59 PRECEDING AND CURRENT ROW) AS sma60,
         AVG(close) OVER (PARTITION BY ticker ORDER BY date ROWS BETWEEN 119 PRECEDING AND CURRENT ROW) AS sma120,
         AVG(volume) OVER (PARTITION BY ticker ORDER BY date ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS vol_avg20,
-        MAX(high) OVER (PARTITION BY ticker ORDER BY date ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS high_20,
-        ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
-      FROM read_parquet('{engine.data_glob}', hive_partitioning=1)
-      WHERE regexp_matches(ticker, '^[0-9]{{6}}$')
-        AND date >= current_date - INTERVAL {lookback_days} DAY
-        {as_of_clause}
-    )
-    SELECT
+        MAX(high) OVER (PARTITION BY ticker ORDER BY date ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS high_20"""
+
+_FEATURE_OUTPUT_COLUMNS = """
       ticker,
       trade_date,
       close,
@@ -91,84 +101,229 @@ def load_feature_frame(engine: StockDataAnalytic, lookback_days: int, as_of: str
       sma60,
       sma120,
       CASE WHEN vol_avg20 IS NULL OR vol_avg20 = 0 THEN NULL ELSE volume / vol_avg20 END AS volume_ratio_20d,
-      CASE WHEN high_20 IS NULL OR high_20 = 0 THEN NULL ELSE close / high_20 END AS breakout_ratio_20d
+      CASE WHEN high_20 IS NULL OR high_20 = 0 THEN NULL ELSE close / high_20 END AS breakout_ratio_20d"""
+
+# $1 = lookback days, $2 = as-of date (NULL for latest); {source} is filled in by the registry.
+FEATURE_QUERY = (
+    "WITH raw AS (SELECT"
+    + _FEATURE_WINDOW_COLUMNS
+    + """,
+        ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+      FROM {source}
+      WHERE regexp_matches(ticker, '^[0-9]{6}$')
+        AND date >= current_date - ($1::INTEGER * INTERVAL 1 DAY)
+        AND ($2::DATE IS NULL OR date <= $2::DATE)
+    )
+    SELECT"""
+    + _FEATURE_OUTPUT_COLUMNS
+    + """
     FROM raw
     WHERE rn = 1
-    """
+"""
+)
+
+RANGE_FEATURE_QUERY_NAME = "kospi_range_features"
+
+# Every trading day in [$1, $2], windows warmed up over $3 days before $1.
+RANGE_FEATURE_QUERY = (
+    "WITH raw AS (SELECT"
+    + _FEATURE_WINDOW_COLUMNS
+    + """
+      FROM {source}
+      WHERE regexp_matches(ticker, '^[0-9]{6}$')
+        AND date >= $1::DATE - ($3::INTEGER * INTERVAL 1 DAY)
+        AND date < $2::DATE + INTERVAL 1 DAY
+    )
+    SELECT"""
+    + _FEATURE_OUTPUT_COLUMNS
+    + """
+    FROM raw
+    WHERE trade_date BETWEEN $1::DATE AND $2::DATE
+"""
+)
+
+REQUIRED_FEATURES = ["ret_1d", "ret_5d", "ret_20d", "sma20", "sma60", "sma120"]
+
+
+def _validate_as_of(as_of: str) -> None:
+    if not as_of:
+        return
+    try:
+        datetime.strptime(as_of, "%Y-%m-%d")
+    except ValueError as exc:
+        raise ValueError("--as-of must be YYYY-MM-DD") from exc
 
-    frame = engine.to_pandas(query)
+
+def load_feature_frame(engine: StockDataAnalytic, lookback_days: int, as_of: str) -> pd.DataFrame:
+    _validate_as_of(as_of)
+    registry = engine.query_registry()
+    if FEATURE_QUERY_NAME not in registry:
+        registry.register(FEATURE_QUERY_NAME, FEATURE_QUERY)
+    window_start = (datetime.now() - timedelta(days=lookback_days + 1)).strftime("%Y-%m-%d")
+    frame = registry.run(FEATURE_QUERY_NAME, params=[int(lookback_days), as_of or None], start_date=window_start)
     if frame.empty:
         return frame
 
-    frame = frame.dropna(subset=["ret_1d", "ret_5d", "ret_20d", "sma20", "sma60", "sma120"]).copy()
+    frame = frame.dropna(subset=REQUIRED_FEATURES).copy()
     return frame
 
 
-def score_row(row: pd.Series) -> tuple[float, float, str]:
-    score = 0.0
-    reasons: list[str] = []
-
-    close = float(row["close"])
-    sma20 = float(row["sma20"])
-    sma60 = float(row["sma60"])
-    sma120 = float(row["sma120"])
-    ret_1d = float(row["ret_1d"])
-    ret_5d = float(row["ret_5d"])
-    ret_20d = float(row["ret_20d"])
-    volume_ratio = float(row["volume_ratio_20d"]) if pd.notna(row["volume_ratio_20d"]) else 0.0
-    breakout_ratio = float(row["breakout_ratio_20d"]) if pd.notna(row["breakout_ratio_20d"]) else 0.0
-
-    if close > sma20:
-        score += 15
-        reasons.append("close>sma20")
-    if close > sma60:
-        score += 12
-        reasons.append("close>sma60")
-    if sma20 > sma60:
-        score += 10
-        reasons.append("sma20>sma60")
-    if sma60 > sma120:
-        score += 8
-        reasons.append("sma60>sma120")
-
-    if ret_20d > 0:
-        score += min(15, ret_20d * 0.8)
-        reasons.append("20d_momentum")
-    if ret_5d > 0:
-        score += min(10, ret_5d * 1.2)
-        reasons.append("5d_momentum")
-
-    if 1.2 <= volume_ratio <= 3.5:
-        score += 10
-        reasons.append("volume_spike")
-    elif volume_ratio > 3.5:
-        score += 5
-        reasons.append("high_volume")
-
-    if breakout_ratio >= 0.995:
-        score += 10
-        reasons.append("near_20d_high")
+def _parse_date(value: str, flag: str) -> str:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError as exc:
+        raise ValueError(f"{flag} must be YYYY-MM-DD") from exc
+
+
+def load_feature_range(engine: StockDataAnalytic, date_from: str, date_to: str, lookback_days: int) -> pd.DataFrame:
+    """
+    Features for every (ticker, trading day) in [date_from, date_to] from one scan. Windows
+    warm up over lookback_days before date_from, so each day matches a single --as-of run
+    whose window holds at least 120 prior bars.
+    """
+    registry = engine.query_registry()
+    if RANGE_FEATURE_QUERY_NAME not in registry:
+        registry.register(RANGE_FEATURE_QUERY_NAME, RANGE_FEATURE_QUERY)
+    window_start = (pd.Timestamp(date_from) - pd.Timedelta(days=lookback_days + 1)).strftime("%Y-%m-%d")
+    frame = registry.run(
+        RANGE_FEATURE_QUERY_NAME,
+        params=[date_from, date_to, int(lookback_days)],
+        start_date=window_start,
+    )
+    return frame.dropna(subset=REQUIRED_FEATURES).reset_index(drop=True)
+
+
+def build_daily_rankings(frame: pd.DataFrame) -> pd.DataFrame:
+    """build_ranking for every trade_date at once: scores are per row, ranks per day."""
+    if frame.empty:
+        return frame
+    scored = pd.concat([frame, score_frame(frame)], axis=1)
+    scored = scored.sort_values(
+        ["trade_date", "probability_next_up", "score", "ret_20d"],
+        ascending=[True, False, False, False],
+    )
+    scored.insert(0, "rank", scored.groupby("trade_date").cumcount() + 1)
+    return scored.reset_index(drop=True)
+
+
+def write_daily_rankings(rankings: pd.DataFrame, out_dir: str) -> None:
+    """Hive-partitioned parquet (trade_date=YYYY-MM-DD/); rerun dates are replaced."""
+    frame = rankings.assign(trade_date=pd.to_datetime(rankings["trade_date"]).dt.strftime("%Y-%m-%d"))
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    ds.write_dataset(
+        table,
+        out_dir,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("trade_date", pa.string())]), flavor="hive"),
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+    )
+
+
+def load_materialized_feature_frame(engine: StockDataAnalytic, lookback_days: int) -> pd.DataFrame:
+    engine.refresh_materialized()
+    frame = engine.to_pandas(
+        f"""
+        SELECT *
+        FROM mat_latest_features
+        WHERE regexp_matches(ticker, '^[0-9]{{6}}$')
+          AND trade_date >= current_date - INTERVAL {int(lookback_days)} DAY
+        """
+    )
+    if frame.empty:
+        return frame
+    return frame.dropna(subset=["ret_1d", "ret_5d", "ret_20d", "sma20", "sma60", "sma120"]).copy()
+
+
+@dataclass(frozen=True)
+class ScoreRule:
+    """
+    One scoring rule: when `column op ref` holds (ref is a column name or a number; for
+    "between" a (low, high) pair, inclusive), add `points`, or min(cap, scale_by * factor)
+    when scale_by is set. score_frame evaluates the rules as numpy masks.
+    """
 
+    reason: str
+    column: str
+    op: str
+    ref: Union[str, float, Tuple[float, float]]
+    points: float = 0.0
+    scale_by: Optional[str] = None
+    factor: float = 0.0
+    cap: float = 0.0
+
+
+SCORE_RULES: Tuple[ScoreRule, ...] = (
+    ScoreRule("close>sma20", "close", ">", "sma20", points=15),
+    ScoreRule("close>sma60", "close", ">", "sma60", points=12),
+    ScoreRule("sma20>sma60", "sma20", ">", "sma60", points=10),
+    ScoreRule("sma60>sma120", "sma60", ">", "sma120", points=8),
+    ScoreRule("20d_momentum", "ret_20d", ">", 0.0, scale_by="ret_20d", factor=0.8, cap=15),
+    ScoreRule("5d_momentum", "ret_5d", ">", 0.0, scale_by="ret_5d", factor=1.2, cap=10),
+    ScoreRule("volume_spike", "volume_ratio_20d", "between", (1.2, 3.5), points=10),
+    ScoreRule("high_volume", "volume_ratio_20d", ">", 3.5, points=5),
+    ScoreRule("near_20d_high", "breakout_ratio_20d", ">=", 0.995, points=10),
     # Penalize excessive single-day surge (mean reversion risk).
-    if ret_1d >= 8:
-        score -= 8
-        reasons.append("overheated_1d")
+    ScoreRule("overheated_1d", "ret_1d", ">=", 8.0, points=-8),
+)
+
+# Missing values scored as 0.0 (the other inputs are required by load_feature_frame).
+SCORE_FILL_ZERO = ("volume_ratio_20d", "breakout_ratio_20d")
+
+# Score -> pseudo-probability: clip(BASE + score * SLOPE, LOW, HIGH).
+PROBABILITY_BASE, PROBABILITY_SLOPE, PROBABILITY_LOW, PROBABILITY_HIGH = 28.0, 0.72, 5.0, 95.0
+
+_NUMPY_OPS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+
+
+def _rule_mask(rule: ScoreRule, values: Dict[str, np.ndarray]) -> np.ndarray:
+    lhs = values[rule.column]
+    if rule.op == "between":
+        low, high = rule.ref
+        return (lhs >= low) & (lhs <= high)
+    rhs = values[rule.ref] if isinstance(rule.ref, str) else rule.ref
+    return _NUMPY_OPS[rule.op](lhs, rhs)
+
+
+def score_frame(frame: pd.DataFrame, rules: Sequence[ScoreRule] = SCORE_RULES) -> pd.DataFrame:
+    """score, probability_next_up and reason_mask (bit i = rules[i] fired) for every row."""
+    columns = {r.column for r in rules} | {r.ref for r in rules if isinstance(r.ref, str)}
+    columns |= {r.scale_by for r in rules if r.scale_by}
+    values = {}
+    for col in columns:
+        series = frame[col].astype("float64")
+        values[col] = (series.fillna(0.0) if col in SCORE_FILL_ZERO else series).to_numpy()
+
+    score = np.zeros(len(frame))
+    reason_mask = np.zeros(len(frame), dtype=np.int64)
+    for bit, rule in enumerate(rules):
+        fired = _rule_mask(rule, values)
+        points = np.minimum(rule.cap, values[rule.scale_by] * rule.factor) if rule.scale_by else rule.points
+        score = score + np.where(fired, points, 0.0)
+        reason_mask |= fired.astype(np.int64) << bit
+
+    probability = np.clip(PROBABILITY_BASE + score * PROBABILITY_SLOPE, PROBABILITY_LOW, PROBABILITY_HIGH)
+    return pd.DataFrame(
+        {
+            "score": np.round(score, 2),
+            "probability_next_up": np.round(probability, 2),
+            "reason_mask": reason_mask,
+        },
+        index=frame.index,
+    )
 
-    # Convert score to pseudo-probability range.
-    probability = max(5.0, min(95.0, 28.0 + score * 0.72))
 
-    return round(score, 2), round(probability, 2), ",".join(reasons)
+def decode_reasons(reason_mask: pd.Series, rules: Sequence[ScoreRule] = SCORE_RULES) -> pd.Series:
+    """Comma-joined rule names per row; only meant for the handful of rows that get printed."""
+    names = [rule.reason for rule in rules]
+    return reason_mask.map(lambda m: ",".join(name for bit, name in enumerate(names) if int(m) >> bit & 1))
 
 
 def build_ranking(frame: pd.DataFrame) -> pd.DataFrame:
     if frame.empty:
         return frame
 
-    scored = frame.copy()
-    out = scored.apply(score_row, axis=1, result_type="expand")
-    out.columns = ["score", "probability_next_up", "reason"]
-    scored = pd.concat([scored, out], axis=1)
-
+    scored = pd.concat([frame, score_frame(frame)], axis=1)
     scored = scored.sort_values(["probability_next_up", "score", "ret_20d"], ascending=False)
     scored.insert(0, "rank", range(1, len(scored) + 1))
     return scored
@@ -180,10 +335,16 @@ def main() -> None:
     load_dotenv(Path(__file__).resolve().parent / ".env", override=False)
 
     args = parse_args()
+    if args.date_from:
+        run_range(args)
+        return
 
-    engine = StockDataAnalytic()
+    engine = StockDataAnalytic(db_path=args.db_path or ":memory:")
     try:
-        frame = load_feature_frame(engine, lookback_days=args.lookback_days, as_of=args.as_of)
+        if args.db_path and not args.as_of:
+            frame = load_materialized_feature_frame(engine, lookback_days=args.lookback_days)
+        else:
+            frame = load_feature_frame(engine, lookback_days=args.lookback_days, as_of=args.as_of)
         ranking = build_ranking(frame)
     finally:
         engine.close()
@@ -193,6 +354,7 @@ def main() -> None:
         return
 
     top = ranking.head(args.top_n).copy()
+    top["reason"] = decode_reasons(top["reason_mask"])
 
     # Pretty print selected columns.
     cols = [
@@ -218,5 +380,32 @@ def main() -> None:
         print(f"\nSaved: {out_path}")
 
 
+def run_range(args: argparse.Namespace) -> None:
+    if args.as_of:
+        raise ValueError("--as-of cannot be combined with --from/--to")
+    date_from = _parse_date(args.date_from, "--from")
+    date_to = _parse_date(args.date_to, "--to") if args.date_to else datetime.now().strftime("%Y-%m-%d")
+    if date_from > date_to:
+        raise ValueError("--from must not be after --to")
+
+    engine = StockDataAnalytic(db_path=args.db_path or ":memory:")
+    try:
+        frame = load_feature_range(engine, date_from, date_to, lookback_days=args.lookback_days)
+    finally:
+        engine.close()
+    if frame.empty:
+        print("No KOSPI rows found in dataset for the requested range.")
+        return
+
+    rankings = build_daily_rankings(frame)
+    write_daily_rankings(rankings, args.out_dir)
+    days = rankings["trade_date"].nunique()
+    print(f"Saved {days} daily rankings ({len(rankings)} rows) to {args.out_dir}")
+
+    last = rankings[rankings["trade_date"] == rankings["trade_date"].max()].head(args.top_n).copy()
+    last["reason"] = decode_reasons(last["reason_mask"])
+    print(last[["rank", "ticker", "trade_date", "close", "score", "probability_next_up", "reason"]].to_string(index=False))
+
+
 if __name__ == "__main__":
     main()
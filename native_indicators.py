@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Vectorized NumPy engine for the BigDataStrategy indicator set.
+
+Computes exactly the columns parallel_technical_indicators keeps after prune_columns,
+following the pandas_ta (non TA-Lib) formulas so results match a pandas_ta study within
+float32 tolerance. Everything is written straight into one preallocated float32 matrix.
+
+Rolling statistics use sliding-window views; the recursive kernels (EMA/RMA, PSAR) are
+compiled with numba when it is installed and run as plain loops otherwise.
+
+The recursive kernels can also resume from a saved IndicatorState, so a ticker that only
+gained a few bars is extended from a WARMUP_ROWS tail instead of its whole history.
+"""
+
+from __future__ import annotations
+
+from sys import float_info
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from numba import njit
+except ImportError:  # numba ships with pandas_ta but is optional here
+    njit = None
+
+
+EPS = float_info.epsilon
+
+PSAR_AF0 = 0.02
+PSAR_MAX_AF = 0.2
+PSAR_REVERSAL_COLUMN = f"PSARr_{PSAR_AF0}_{PSAR_MAX_AF}"
+
+# Output order of the pandas_ta study after prune_columns.
+NATIVE_COLUMNS: Tuple[str, ...] = (
+    "SMA_5",
+    "SMA_20",
+    "SMA_60",
+    "SMA_120",
+    "EMA_12",
+    "EMA_26",
+    "MACD_12_26_9",
+    "MACDh_12_26_9",
+    "MACDs_12_26_9",
+    "ADX_14",
+    "DMP_14",
+    "DMN_14",
+    f"PSARl_{PSAR_AF0}_{PSAR_MAX_AF}",
+    f"PSARs_{PSAR_AF0}_{PSAR_MAX_AF}",
+    f"PSARaf_{PSAR_AF0}_{PSAR_MAX_AF}",
+    PSAR_REVERSAL_COLUMN,
+    "ITS_9",
+    "IKS_26",
+    "RSI_14",
+    "STOCHk_14_3_3",
+    "STOCHd_14_3_3",
+    "CCI_14_0.015",
+    "ROC_10",
+    "WILLR_14",
+    "MOM_10",
+    "BBL_20_2.0_2.0",
+    "BBM_20_2.0_2.0",
+    "BBU_20_2.0_2.0",
+    "BBB_20_2.0_2.0",
+    "BBP_20_2.0_2.0",
+    "KCLe_20_2",
+    "KCBe_20_2",
+    "KCUe_20_2",
+    "STDEV_20",
+    "OBV",
+    "MFI_14",
+    "CMF_20",
+    "VWMA_20",
+)
+
+# PSAR reversal flags are integers in pandas_ta; everything else lands in the float32 matrix.
+NATIVE_FLOAT_COLUMNS: Tuple[str, ...] = tuple(c for c in NATIVE_COLUMNS if c != PSAR_REVERSAL_COLUMN)
+
+# Last-bar values of every recursive series (float64, unlike the float32 outputs), which is
+# everything needed to continue them bar by bar exactly as a full recompute would.
+STATE_FIELDS: Tuple[str, ...] = (
+    "ema_12",
+    "ema_26",
+    "macd_signal",
+    "atr_14",
+    "dm_pos_14",
+    "dm_neg_14",
+    "adx_14",
+    "rsi_gain",
+    "rsi_loss",
+    "kc_basis",
+    "kc_band",
+    "obv",
+    "psar_sar",
+    "psar_ep",
+    "psar_af",
+    "psar_falling",
+)
+
+# Rows of raw OHLCV history needed in front of new bars when resuming from a state:
+# the longest rolling window (SMA_120) plus headroom. Every pandas_ta minimum length and
+# recursion seed is also inside this many rows.
+WARMUP_ROWS = 130
+
+IndicatorState = Dict[str, float]
+
+
+def _jit(fn: Callable) -> Callable:
+    return njit(cache=True)(fn) if njit is not None else fn
+
+
+@_jit
+def _ewm(x: np.ndarray, alpha: float, avg: float) -> np.ndarray:
+    """
+    Series.ewm(alpha=alpha, adjust=False).mean(), including pandas' NaN carry-forward.
+    `avg` is the average before x[0]: NaN starts fresh, a value resumes a saved series.
+    """
+    n = x.shape[0]
+    out = np.empty(n)
+    old_wt_factor = 1.0 - alpha
+    new_wt = alpha
+    old_wt = 1.0
+    for i in range(n):
+        cur = x[i]
+        is_obs = cur == cur
+        if avg == avg:
+            old_wt *= old_wt_factor
+            if is_obs:
+                if avg != cur:
+                    avg = ((old_wt * avg) + (new_wt * cur)) / (old_wt + new_wt)
+                old_wt = 1.0
+        elif is_obs:
+            avg = cur
+        out[i] = avg
+    return out
+
+
+@_jit
+def _psar(
+    high: np.ndarray,
+    low: np.ndarray,
+    falling: bool,
+    af0: float,
+    max_af: float,
+    start: int,
+    sar_prev: float,
+    ep: float,
+    af: float,
+):
+    """PSAR from bar `start` onward, given the SAR/EP/AF/direction after bar start-1."""
+    m = high.shape[0]
+    sar = np.zeros(m)
+    long = np.full(m, np.nan)
+    short = np.full(m, np.nan)
+    reversal = np.zeros(m, dtype=np.int64)
+    af_out = np.zeros(m)
+    af_out[start - 1] = af
+    sar[start - 1] = sar_prev
+
+    for i in range(start, m):
+        sar[i] = sar[i - 1] + af * (ep - sar[i - 1])
+        if falling:
+            reverse = high[i] > sar[i]
+            if low[i] < ep:
+                ep = low[i]
+                af = min(af + af0, max_af)
+            sar[i] = max(high[i - 1], sar[i])
+        else:
+            reverse = low[i] < sar[i]
+            if high[i] > ep:
+                ep = high[i]
+                af = min(af + af0, max_af)
+            sar[i] = min(low[i - 1], sar[i])
+
+        if reverse:
+            sar[i] = ep
+            af = af0
+            falling = not falling
+            ep = low[i] if falling else high[i]
+
+        if falling:
+            short[i] = sar[i]
+        else:
+            long[i] = sar[i]
+        af_out[i] = af
+        reversal[i] = 1 if reverse else 0
+
+    return long, short, af_out, reversal, sar[m - 1], ep, af, falling
+
+
+def _nan_like(x: np.ndarray) -> np.ndarray:
+    return np.full(x.shape[0], np.nan)
+
+
+def _shift(x: np.ndarray, n: int) -> np.ndarray:
+    out = _nan_like(x)
+    if 0 < n < x.shape[0]:
+        out[n:] = x[:-n]
+    return out
+
+
+def _rolling(x: np.ndarray, length: int, reduce: Callable[..., np.ndarray]) -> np.ndarray:
+    """Full-length rolling reduction with pandas min_periods=length semantics (NaN poisons the window)."""
+    out = _nan_like(x)
+    if x.shape[0] >= length:
+        out[length - 1 :] = reduce(sliding_window_view(x, length), axis=1)
+    return out
+
+
+def _first_valid(x: np.ndarray) -> int:
+    valid = np.flatnonzero(~np.isnan(x))
+    return int(valid[0]) if valid.size else x.shape[0]
+
+
+def _non_zero_range(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # pandas_ta shifts the whole series by epsilon as soon as any difference is exactly zero.
+    diff = x - y
+    if np.any(diff == 0):
+        diff = diff + EPS
+    return diff
+
+
+def _zero(x: np.ndarray) -> np.ndarray:
+    return np.where(np.abs(x) < EPS, 0.0, x)
+
+
+def _sma(x: np.ndarray, length: int) -> np.ndarray:
+    return _rolling(x, length, np.mean)
+
+
+def _ema(x: np.ndarray, length: int) -> np.ndarray:
+    """EMA seeded with the SMA of the first `length` values (pandas_ta presma=True)."""
+    if x.shape[0] < length:
+        return _nan_like(x)
+    seeded = x.astype(np.float64, copy=True)
+    head = seeded[:length]
+    seed = head[~np.isnan(head)].mean() if np.any(~np.isnan(head)) else np.nan
+    seeded[: length - 1] = np.nan
+    seeded[length - 1] = seed
+    return _ewm(seeded, 2.0 / (length + 1.0), np.nan)
+
+
+def _rma(x: np.ndarray, length: int) -> np.ndarray:
+    return _ewm(np.ascontiguousarray(x, dtype=np.float64), 1.0 / length, np.nan)
+
+
+def _on_valid_tail(x: np.ndarray, fn: Callable[[np.ndarray], np.ndarray], min_size: int) -> np.ndarray:
+    """Apply fn from the first valid value onward (pandas_ta's `series.loc[first_valid_index():]`)."""
+    start = _first_valid(x)
+    out = _nan_like(x)
+    if x.shape[0] - start >= min_size:
+        out[start:] = fn(x[start:])
+    return out
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = _shift(close, 1)
+    ranges = np.fmax(np.abs(_non_zero_range(high, low)), np.abs(high - prev_close))
+    return np.fmax(ranges, np.abs(prev_close - low))
+
+
+def _psar_falling(high: np.ndarray, low: np.ndarray) -> bool:
+    if high.shape[0] < 2:
+        return False
+    up = high[1] - high[0]
+    dn = low[0] - low[1]
+    return bool(dn > up and dn > 0 and dn >= EPS)
+
+
+def compute_bigdata_indicators(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    state: Optional[IndicatorState] = None,
+    warmup_rows: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, IndicatorState]:
+    """
+    Compute the BigDataStrategy outputs for one date-sorted ticker.
+
+    Returns (matrix, psar_reversal, state): a float32 matrix shaped
+    (rows, len(NATIVE_FLOAT_COLUMNS)), the int64 PSAR reversal flags, and the recursive
+    state after the last row. Indicators whose pandas_ta minimum length is not met are
+    left as NaN, mirroring the columns pandas_ta would skip.
+
+    When `state` is given, the first `warmup_rows` rows (at least WARMUP_ROWS) are
+    already-computed history and `state` is what this function returned for it; only rows
+    from `warmup_rows` onward are meaningful in the returned matrix and flags.
+    """
+    h = np.ascontiguousarray(high, dtype=np.float64)
+    lo = np.ascontiguousarray(low, dtype=np.float64)
+    c = np.ascontiguousarray(close, dtype=np.float64)
+    v = np.ascontiguousarray(volume, dtype=np.float64)
+    n = c.shape[0]
+
+    resume = state is not None
+    if resume and warmup_rows < WARMUP_ROWS:
+        raise ValueError(f"Resuming needs at least {WARMUP_ROWS} warm-up rows, got {warmup_rows}")
+    start = warmup_rows if resume else 0
+
+    out = np.full((n, len(NATIVE_FLOAT_COLUMNS)), np.nan, dtype=np.float32)
+    col: Dict[str, int] = {name: i for i, name in enumerate(NATIVE_FLOAT_COLUMNS)}
+    reversal = np.zeros(n, dtype=np.int64)
+    if n == 0 or (resume and n <= start):
+        return out, reversal, dict(state) if resume else {f: np.nan for f in STATE_FIELDS}
+
+    def put(name: str, values: np.ndarray, min_rows: int) -> None:
+        if n >= min_rows:
+            out[:, col[name]] = values
+
+    def recursive(x: np.ndarray, alpha: float, field: str, fresh: Callable[[], np.ndarray]) -> np.ndarray:
+        # Full runs seed the series as pandas_ta does; resumed runs continue the saved average.
+        if not resume:
+            return fresh()
+        values = _nan_like(x)
+        values[start:] = _ewm(np.ascontiguousarray(x[start:], dtype=np.float64), alpha, state[field])
+        return values
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Trend
+        for length in (5, 20, 60, 120):
+            put(f"SMA_{length}", _sma(c, length), length)
+        ema12 = recursive(c, 2.0 / 13.0, "ema_12", lambda: _ema(c, 12))
+        ema26 = recursive(c, 2.0 / 27.0, "ema_26", lambda: _ema(c, 26))
+        put("EMA_12", ema12, 12)
+        put("EMA_26", ema26, 26)
+
+        macd = ema12 - ema26
+        signal = recursive(macd, 0.2, "macd_signal", lambda: _on_valid_tail(macd, lambda s: _ema(s, 9), 9))
+        put("MACD_12_26_9", macd, 34)
+        put("MACDh_12_26_9", macd - signal, 34)
+        put("MACDs_12_26_9", signal, 34)
+
+        true_range = _true_range(h, lo, c)
+        atr = dm_pos = dm_neg = adx = _nan_like(c)
+        if n >= 15:
+
+            def seeded_atr() -> np.ndarray:
+                tr = true_range.copy()
+                tr[0] = np.nan  # adx calls atr with prenan=True
+                head = tr[:14]
+                seed = head[~np.isnan(head)].mean() if np.any(~np.isnan(head)) else np.nan
+                tr[:13] = np.nan
+                tr[13] = seed
+                return _rma(tr, 14)
+
+            atr = recursive(true_range, 1.0 / 14.0, "atr_14", seeded_atr)
+            k = 100.0 / atr
+            up = h - _shift(h, 1)
+            dn = _shift(lo, 1) - lo
+            pos = _zero(((up > dn) & (up > 0)) * up)
+            neg = _zero(((dn > up) & (dn > 0)) * dn)
+            dm_pos = recursive(pos, 1.0 / 14.0, "dm_pos_14", lambda: _rma(pos, 14))
+            dm_neg = recursive(neg, 1.0 / 14.0, "dm_neg_14", lambda: _rma(neg, 14))
+            dmp = k * dm_pos
+            dmn = k * dm_neg
+            dx = 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+            adx = recursive(dx, 1.0 / 14.0, "adx_14", lambda: _rma(dx, 14))
+            put("ADX_14", adx, 15)
+            put("DMP_14", dmp, 15)
+            put("DMN_14", dmn, 15)
+
+        if resume:
+            psar = _psar(
+                h,
+                lo,
+                bool(state["psar_falling"]),
+                PSAR_AF0,
+                PSAR_MAX_AF,
+                start,
+                state["psar_sar"],
+                state["psar_ep"],
+                state["psar_af"],
+            )
+        else:
+            falling = _psar_falling(h, lo)
+            psar = _psar(
+                h,
+                lo,
+                falling,
+                PSAR_AF0,
+                PSAR_MAX_AF,
+                1,
+                h[0] if falling else lo[0],
+                lo[0] if falling else h[0],
+                PSAR_AF0,
+            )
+        long, short, af, reversal, psar_sar, psar_ep, psar_af, psar_falling = psar
+        put(f"PSARl_{PSAR_AF0}_{PSAR_MAX_AF}", long, 1)
+        put(f"PSARs_{PSAR_AF0}_{PSAR_MAX_AF}", short, 1)
+        put(f"PSARaf_{PSAR_AF0}_{PSAR_MAX_AF}", af, 1)
+
+        put("ITS_9", 0.5 * (_rolling(lo, 9, np.min) + _rolling(h, 9, np.max)), 52)
+        put("IKS_26", 0.5 * (_rolling(lo, 26, np.min) + _rolling(h, 26, np.max)), 52)
+
+        # Momentum
+        diff = c - _shift(c, 1)
+        gains = np.where(diff < 0, 0.0, diff)
+        losses = np.where(diff > 0, 0.0, diff)
+        gain_avg = recursive(gains, 1.0 / 14.0, "rsi_gain", lambda: _rma(gains, 14))
+        loss_avg = recursive(losses, 1.0 / 14.0, "rsi_loss", lambda: _rma(losses, 14))
+        put("RSI_14", 100.0 * gain_avg / (gain_avg + np.abs(loss_avg)), 15)
+
+        ll14 = _rolling(lo, 14, np.min)
+        hh14 = _rolling(h, 14, np.max)
+        stoch = 100.0 * (c - ll14) / _non_zero_range(hh14, ll14)
+        stoch_k = _on_valid_tail(stoch, lambda s: _sma(s, 3), 3)
+        stoch_d = _on_valid_tail(stoch_k, lambda s: _sma(s, 3), 3)
+        put("STOCHk_14_3_3", stoch_k, 20)
+        put("STOCHd_14_3_3", stoch_d, 20)
+
+        tp = (h + lo + c) / 3.0
+        if n >= 14:
+            windows = sliding_window_view(tp, 14)
+            mad = _nan_like(tp)
+            mad[13:] = np.abs(windows - windows.mean(axis=1)[:, None]).mean(axis=1)
+            # pandas_ta (0.4.71b0, non-TA-Lib path) computes tp - sma / (c * mad), not
+            # (tp - sma) / (c * mad); tests/test_native_indicators.py pins this against it.
+            put("CCI_14_0.015", tp - _sma(tp, 14) / (0.015 * mad), 14)
+
+        c10 = _shift(c, 10)
+        put("ROC_10", 100.0 * (c - c10) / c10, 11)
+        put("WILLR_14", 100.0 * ((c - ll14) / (hh14 - ll14) - 1.0), 14)
+        put("MOM_10", c - c10, 11)
+
+        # Volatility
+        std20 = np.sqrt(_rolling(c, 20, lambda w, axis: w.var(axis=axis, ddof=1)))
+        mid = _sma(c, 20)
+        lower = mid - 2.0 * std20
+        upper = mid + 2.0 * std20
+        ulr = _non_zero_range(upper, lower)
+        put("BBL_20_2.0_2.0", lower, 20)
+        put("BBM_20_2.0_2.0", mid, 20)
+        put("BBU_20_2.0_2.0", upper, 20)
+        put("BBB_20_2.0_2.0", 100.0 * ulr / mid, 20)
+        put("BBP_20_2.0_2.0", _non_zero_range(c, lower) / ulr, 20)
+
+        basis = recursive(c, 2.0 / 21.0, "kc_basis", lambda: _ema(c, 20))
+        band = recursive(true_range, 2.0 / 21.0, "kc_band", lambda: _ema(true_range, 20))
+        put("KCLe_20_2", basis - 2 * band, 21)
+        put("KCBe_20_2", basis, 21)
+        put("KCUe_20_2", basis + 2 * band, 21)
+        put("STDEV_20", std20, 20)
+
+        # Volume
+        signed_volume = np.sign(diff) * v  # sign[0] is NaN, as in pandas_ta's signed_series
+        if resume:
+            # Prepend the saved total so the running sum adds in the same order as a full run.
+            running = np.nancumsum(np.concatenate(([state["obv"]], signed_volume[start:])))[1:]
+            obv = _nan_like(c)
+            obv[start:] = np.where(np.isnan(signed_volume[start:]), np.nan, running)
+        else:
+            obv = np.where(np.isnan(signed_volume), np.nan, np.nancumsum(signed_volume))
+        put("OBV", obv, 1)
+
+        smf = tp * v * np.where(tp > np.roll(tp, 1), 1, -1)
+        window = np.ones(14)
+        gain = np.convolve(np.maximum(smf, 0), window)[:n]
+        loss = np.convolve(np.maximum(-smf, 0), window)[:n]
+        mfi = (100.0 * gain) / (gain + loss + EPS)
+        mfi[:14] = np.nan
+        put("MFI_14", mfi, 15)
+
+        ad = (2 * c - (h + lo)) * (v / _non_zero_range(h, lo))
+        put("CMF_20", _rolling(ad, 20, np.sum) / _rolling(v, 20, np.sum), 20)
+        put("VWMA_20", _sma(c * v, 20) / _sma(v, 20), 20)
+
+    last = {
+        "ema_12": ema12,
+        "ema_26": ema26,
+        "macd_signal": signal,
+        "atr_14": atr,
+        "dm_pos_14": dm_pos,
+        "dm_neg_14": dm_neg,
+        "adx_14": adx,
+        "rsi_gain": gain_avg,
+        "rsi_loss": loss_avg,
+        "kc_basis": basis,
+        "kc_band": band,
+        "obv": obv,
+    }
+    new_state: IndicatorState = {field: float(values[-1]) for field, values in last.items()}
+    new_state.update(
+        psar_sar=float(psar_sar),
+        psar_ep=float(psar_ep),
+        psar_af=float(psar_af),
+        psar_falling=float(psar_falling),
+    )
+    return out, reversal, new_state
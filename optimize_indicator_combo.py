@@ -2,10 +2,11 @@
 """Optimize indicator combinations for next-day up probability on KRX data.
 
 Pipeline summary:
-1) Load daily indicator parquet
+1) Load daily indicator parquet (optionally streamed into a float32 memmap via --stream-load)
 2) Build next-day up label per ticker
 3) Create walk-forward validation folds
 4) Convert each indicator into fold-wise probability features via train-only binning
+   (fanned out over the worker pool, written into per-fold prediction memmaps)
 5) Search indicator combinations in parallel with ProcessPoolExecutor (time-budgeted)
 6) Fit best combo on full labeled data and rank latest tickers by next-day up probability
 """
@@ -18,7 +19,7 @@ import json
 import math
 import os
 import time
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -26,11 +27,18 @@ from typing import Any
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from indicator_output import output_files
 
 
 # Worker globals (loaded once per process)
+_WORKER_ARTIFACT_DIR: str = ""
 _WORKER_FOLD_PREDS: list[np.ndarray] = []
 _WORKER_FOLD_Y: list[np.ndarray] = []
+_WORKER_SHARED_ARRAYS: dict[tuple[str, str], np.ndarray] = {}
 
 
 @dataclass
@@ -39,6 +47,20 @@ class FoldSpec:
     val_end_date: np.datetime64
 
 
+@dataclass
+class FeatureMatrix:
+    """Labeled rows ordered by (Date, Ticker) with a column-major float32 feature matrix."""
+
+    dates: np.ndarray
+    y: np.ndarray
+    x: np.ndarray
+    feature_cols: list[str]
+    path: Path | None = None
+
+    def __len__(self) -> int:
+        return int(self.y.shape[0])
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="4-hour indicator-combo optimizer")
     parser.add_argument(
@@ -60,6 +82,17 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--alpha", type=float, default=120.0, help="Bayesian smoothing strength")
     parser.add_argument("--top-n", type=int, default=25, help="Number of final ticker picks")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument(
+        "--stream-load",
+        action="store_true",
+        help="Stream parquet batches into a memory-mapped float32 feature matrix (bounded memory)",
+    )
+    parser.add_argument(
+        "--stream-batch-rows",
+        type=int,
+        default=262_144,
+        help="Rows per pyarrow batch when --stream-load is used",
+    )
     return parser.parse_args()
 
 
@@ -76,7 +109,8 @@ def load_data(path: Path) -> tuple[pd.DataFrame, pd.DataFrame, list[str]]:
         raise FileNotFoundError(f"Input parquet not found: {path}")
 
     _log(f"Loading parquet: {path}")
-    raw = pd.read_parquet(path)
+    # The indicator output plus any --append parts not yet compacted into it.
+    raw = pd.concat([pd.read_parquet(p) for p in output_files(path)], ignore_index=True)
 
     required = {"Date", "Ticker", "Close"}
     missing = required - set(raw.columns)
@@ -126,6 +160,171 @@ def load_data(path: Path) -> tuple[pd.DataFrame, pd.DataFrame, list[str]]:
     return df, latest_rows, feature_cols
 
 
+_LOAD_BASE_COLS = {"Date", "Ticker", "Open", "High", "Low", "Close", "Volume", "NextClose", "TargetUp", "FwdRet1D"}
+
+
+def _arrow_dates(col: pa.ChunkedArray) -> np.ndarray:
+    dates = pd.to_datetime(col.to_pandas())
+    if getattr(dates.dt, "tz", None) is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[ns]")
+
+
+def _arrow_ticker_codes(col: pa.ChunkedArray) -> tuple[np.ndarray, np.ndarray]:
+    """Dictionary-encode tickers; codes follow lexical ticker order so sorts match string sorts."""
+    encoded = pc.dictionary_encode(pc.cast(col, pa.string())).combine_chunks()
+    labels = np.asarray(encoded.dictionary.to_pylist(), dtype=object)
+    order = np.argsort(labels.astype(str), kind="stable")
+    rank = np.empty(order.size, dtype=np.int32)
+    rank[order] = np.arange(order.size, dtype=np.int32)
+    codes = rank[encoded.indices.to_numpy(zero_copy_only=False)]
+    return codes, labels[order]
+
+
+def load_data_streaming(
+    path: Path,
+    work_dir: Path,
+    batch_rows: int = 262_144,
+) -> tuple[FeatureMatrix, pd.DataFrame, list[str]]:
+    """Bounded-memory variant of load_data.
+
+    Pass 1 reads only Date/Ticker/Close to build NextClose labels and the (Date, Ticker)
+    destination of every labeled row. Pass 2 streams feature batches through pyarrow and
+    scatters them as float32 straight into a column-major memmap, so each feature column
+    is contiguous on disk for prepare_fold_artifacts.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Input parquet not found: {path}")
+
+    _log(f"Streaming parquet: {path}")
+    # The indicator output plus any --append parts not yet compacted into it, in that order.
+    files = [pq.ParquetFile(p) for p in output_files(path)]
+    schema = files[0].schema_arrow
+
+    required = {"Date", "Ticker", "Close"}
+    missing = required - set(schema.names)
+    if missing:
+        raise ValueError(f"Missing required columns: {sorted(missing)}")
+
+    pandas_meta = schema.pandas_metadata or {}
+    index_cols = {c for c in pandas_meta.get("index_columns", []) if isinstance(c, str)}
+    feature_cols = [
+        f.name
+        for f in schema
+        if f.name not in _LOAD_BASE_COLS
+        and f.name not in index_cols
+        and (pa.types.is_floating(f.type) or pa.types.is_integer(f.type) or pa.types.is_boolean(f.type))
+    ]
+    if not feature_cols:
+        raise ValueError("No indicator feature columns found")
+
+    keys = pa.concat_tables([pf.read(columns=["Date", "Ticker", "Close"]) for pf in files])
+    n_rows = keys.num_rows
+    dates = _arrow_dates(keys.column("Date"))
+    codes, ticker_labels = _arrow_ticker_codes(keys.column("Ticker"))
+    close = pc.cast(keys.column("Close"), pa.float64()).to_numpy()
+    del keys
+
+    # NextClose per ticker on a (Ticker, Date) ordering; only index arrays are materialized.
+    by_ticker = np.lexsort((dates.view(np.int64), codes))
+    sorted_codes = codes[by_ticker]
+    same_next = sorted_codes[1:] == sorted_codes[:-1]
+    next_sorted = np.full(n_rows, np.nan, dtype=np.float64)
+    next_sorted[:-1][same_next] = close[by_ticker][1:][same_next]
+    next_close = np.empty(n_rows, dtype=np.float64)
+    next_close[by_ticker] = next_sorted
+
+    is_last = np.ones(n_rows, dtype=bool)
+    is_last[by_ticker[:-1][same_next]] = False
+    del by_ticker, sorted_codes, same_next, next_sorted
+
+    latest_market_date = dates.max()
+    latest_mask = is_last & (dates == latest_market_date)
+    del is_last
+
+    labeled = np.isfinite(next_close) & (close > 0)
+    by_date = np.lexsort((codes, dates.view(np.int64)))
+    by_date = by_date[labeled[by_date]]
+    n_labeled = int(by_date.size)
+
+    dest = np.full(n_rows, -1, dtype=np.int64)
+    dest[by_date] = np.arange(n_labeled, dtype=np.int64)
+
+    out_dates = dates[by_date]
+    y = (next_close[by_date] > close[by_date]).astype(np.uint8)
+    n_tickers = int(np.unique(codes[by_date]).size)
+    del by_date, next_close
+
+    work_dir.mkdir(parents=True, exist_ok=True)
+    matrix_path = work_dir / "feature_matrix.npy"
+    x = np.lib.format.open_memmap(
+        matrix_path,
+        mode="w+",
+        dtype=np.float32,
+        shape=(n_labeled, len(feature_cols)),
+        fortran_order=True,
+    )
+
+    latest_src = np.flatnonzero(latest_mask)
+    latest_feats = np.full((latest_src.size, len(feature_cols)), np.nan, dtype=np.float32)
+
+    offset = 0
+    batches = (b for pf in files for b in pf.iter_batches(batch_size=max(1, batch_rows), columns=feature_cols))
+    for batch in batches:
+        n = batch.num_rows
+        batch_dest = dest[offset : offset + n]
+        keep = batch_dest >= 0
+        keep_dest = batch_dest[keep]
+        lo, hi = np.searchsorted(latest_src, [offset, offset + n])
+        latest_local = latest_src[lo:hi] - offset
+
+        for fi in range(len(feature_cols)):
+            vals = pc.cast(batch.column(fi), pa.float32()).to_numpy(zero_copy_only=False)
+            if keep_dest.size:
+                x[keep_dest, fi] = vals[keep]
+            if latest_local.size:
+                latest_feats[lo:hi, fi] = vals[latest_local]
+
+        offset += n
+        del batch
+
+    x.flush()
+
+    latest_rows = pd.DataFrame(
+        {
+            "Date": dates[latest_src],
+            "Ticker": pd.array(ticker_labels[codes[latest_src]].astype(str), dtype="string"),
+            "Close": close[latest_src],
+        }
+    )
+    latest_rows = pd.concat(
+        [latest_rows, pd.DataFrame(latest_feats, columns=feature_cols)],
+        axis=1,
+    )
+    latest_rows = latest_rows.sort_values(["Date", "Ticker"], kind="mergesort").reset_index(drop=True)
+
+    matrix = FeatureMatrix(dates=out_dates, y=y, x=x, feature_cols=feature_cols, path=matrix_path)
+    _log(
+        "Loaded rows="
+        f"{n_labeled:,}, tickers={n_tickers:,}, dates={np.unique(out_dates).size:,}, "
+        f"features={len(feature_cols)} (memmap={matrix_path.name})"
+    )
+    return matrix, latest_rows, feature_cols
+
+
+def _fold_inputs(
+    data: pd.DataFrame | FeatureMatrix,
+    feature_cols: list[str],
+) -> tuple[np.ndarray, np.ndarray, list[np.ndarray]]:
+    if isinstance(data, FeatureMatrix):
+        return data.dates, data.y, [data.x[:, fi] for fi in range(len(feature_cols))]
+    return (
+        data["Date"].to_numpy(),
+        data["TargetUp"].to_numpy(dtype=np.uint8, copy=False),
+        [data[c].to_numpy(dtype=np.float32, copy=False) for c in feature_cols],
+    )
+
+
 def build_folds(dates: np.ndarray) -> list[FoldSpec]:
     unique_dates = np.unique(dates)
     if unique_dates.size < 400:
@@ -208,73 +407,169 @@ def apply_prob_mapper(x: np.ndarray, inner: np.ndarray | None, probs: np.ndarray
     return out
 
 
+def ensure_feature_matrix(
+    data: pd.DataFrame | FeatureMatrix,
+    feature_cols: list[str],
+    work_dir: Path,
+) -> FeatureMatrix:
+    """Return a file-backed FeatureMatrix that worker processes can memory-map."""
+    if isinstance(data, FeatureMatrix) and data.path is not None:
+        return data
+
+    dates, y, feature_arrays = _fold_inputs(data, feature_cols)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    matrix_path = work_dir / "feature_matrix.npy"
+    x = np.lib.format.open_memmap(
+        matrix_path,
+        mode="w+",
+        dtype=np.float32,
+        shape=(y.shape[0], len(feature_cols)),
+        fortran_order=True,
+    )
+    for fi, col in enumerate(feature_arrays):
+        x[:, fi] = col
+    x.flush()
+    return FeatureMatrix(dates=dates, y=y, x=x, feature_cols=feature_cols, path=matrix_path)
+
+
+def _open_shared_array(path: str, mode: str = "r") -> np.ndarray:
+    key = (path, mode)
+    arr = _WORKER_SHARED_ARRAYS.get(key)
+    if arr is None:
+        arr = np.load(path, mmap_mode=mode)
+        _WORKER_SHARED_ARRAYS[key] = arr
+    return arr
+
+
+def fit_fold_feature_chunk(task: dict[str, Any]) -> tuple[int, int]:
+    """Fit train-only mappers for a slice of features and write val predictions in place."""
+    x_all = _open_shared_array(task["matrix_path"])
+    y_all = _open_shared_array(task["labels_path"])
+    preds = _open_shared_array(task["preds_path"], mode="r+")
+
+    train_end = task["train_end"]
+    val_end = task["val_end"]
+    y_train = np.asarray(y_all[:train_end])
+
+    for fi in task["features"]:
+        x_col = x_all[:, fi]
+        inner, probs, base = fit_prob_mapper(
+            x_train=np.asarray(x_col[:train_end]),
+            y_train=y_train,
+            n_bins=task["n_bins"],
+            alpha=task["alpha"],
+        )
+        preds[:, fi] = apply_prob_mapper(
+            x=np.asarray(x_col[train_end:val_end]),
+            inner=inner,
+            probs=probs,
+            base=base,
+        )
+
+    preds.flush()
+    return task["fold_idx"], len(task["features"])
+
+
 def prepare_fold_artifacts(
-    df: pd.DataFrame,
+    df: pd.DataFrame | FeatureMatrix,
     feature_cols: list[str],
     folds: list[FoldSpec],
     n_bins: int,
     alpha: float,
     output_dir: Path,
+    executor: ProcessPoolExecutor | None = None,
+    features_per_task: int = 8,
 ) -> list[Path]:
-    dates = df["Date"].to_numpy()
-    y_all = df["TargetUp"].to_numpy(dtype=np.uint8, copy=False)
-    feature_arrays = [df[c].to_numpy(dtype=np.float32, copy=False) for c in feature_cols]
-
+    """Write fold_<k>_preds.npy / fold_<k>_y.npy for every usable fold.
+
+    Rows are ordered by date, so each fold is a contiguous train prefix followed by a
+    contiguous validation range. Mapper fitting is split into (fold, feature-chunk) tasks;
+    with an executor they run in the worker pool against the shared feature memmap and
+    write straight into the preallocated prediction memmaps.
+    """
+    matrix = ensure_feature_matrix(df, feature_cols, work_dir=output_dir)
+    labels_path = output_dir / "labels.npy"
+    np.save(labels_path, matrix.y)
+
+    n_features = len(feature_cols)
+    chunk = max(1, features_per_task)
     artifact_paths: list[Path] = []
+    fold_sizes: dict[int, tuple[int, int]] = {}
+    tasks: list[dict[str, Any]] = []
 
     for fold_idx, fold in enumerate(folds, start=1):
-        train_mask = dates <= fold.train_end_date
-        val_mask = (dates > fold.train_end_date) & (dates <= fold.val_end_date)
-
-        train_idx = np.flatnonzero(train_mask)
-        val_idx = np.flatnonzero(val_mask)
+        train_end = int(np.searchsorted(matrix.dates, fold.train_end_date, side="right"))
+        val_end = int(np.searchsorted(matrix.dates, fold.val_end_date, side="right"))
+        train_n = train_end
+        val_n = max(0, val_end - train_end)
 
-        if train_idx.size < 200_000 or val_idx.size < 20_000:
+        if train_n < 200_000 or val_n < 20_000:
             _log(
-                f"Fold {fold_idx} skipped (train={train_idx.size:,}, val={val_idx.size:,})"
+                f"Fold {fold_idx} skipped (train={train_n:,}, val={val_n:,})"
             )
             continue
 
-        y_train = y_all[train_idx]
-        y_val = y_all[val_idx]
-
-        pred_matrix = np.empty((val_idx.size, len(feature_cols)), dtype=np.float32)
-
-        for fi, x_all in enumerate(feature_arrays):
-            inner, probs, base = fit_prob_mapper(
-                x_train=x_all[train_idx],
-                y_train=y_train,
-                n_bins=n_bins,
-                alpha=alpha,
-            )
-            pred_matrix[:, fi] = apply_prob_mapper(
-                x=x_all[val_idx],
-                inner=inner,
-                probs=probs,
-                base=base,
+        preds_path = output_dir / f"fold_{fold_idx}_preds.npy"
+        np.lib.format.open_memmap(preds_path, mode="w+", dtype=np.float32, shape=(val_n, n_features)).flush()
+        np.save(output_dir / f"fold_{fold_idx}_y.npy", matrix.y[train_end:val_end])
+        artifact_paths.append(preds_path)
+        fold_sizes[fold_idx] = (train_n, val_n)
+
+        for lo in range(0, n_features, chunk):
+            tasks.append(
+                {
+                    "fold_idx": fold_idx,
+                    "matrix_path": str(matrix.path),
+                    "labels_path": str(labels_path),
+                    "preds_path": str(preds_path),
+                    "train_end": train_end,
+                    "val_end": val_end,
+                    "features": list(range(lo, min(n_features, lo + chunk))),
+                    "n_bins": n_bins,
+                    "alpha": alpha,
+                }
             )
 
-        path = output_dir / f"fold_{fold_idx}.npz"
-        np.savez_compressed(path, preds=pred_matrix, y=y_val)
-        artifact_paths.append(path)
-        _log(
-            f"Prepared fold {fold_idx}: train={train_idx.size:,}, val={val_idx.size:,}, file={path.name}"
-        )
-
     if not artifact_paths:
         raise ValueError("No usable folds were prepared")
 
+    remaining = {fold_idx: n_features for fold_idx in fold_sizes}
+    if executor is None:
+        results = map(fit_fold_feature_chunk, tasks)
+    else:
+        results = (fut.result() for fut in as_completed([executor.submit(fit_fold_feature_chunk, t) for t in tasks]))
+
+    for fold_idx, done in results:
+        remaining[fold_idx] -= done
+        if remaining[fold_idx] == 0:
+            train_n, val_n = fold_sizes[fold_idx]
+            _log(
+                f"Prepared fold {fold_idx}: train={train_n:,}, val={val_n:,}, file=fold_{fold_idx}_preds.npy"
+            )
+
     return artifact_paths
 
 
-def _worker_init(paths: list[str]) -> None:
-    global _WORKER_FOLD_PREDS, _WORKER_FOLD_Y
+def _worker_init(artifact_dir: str) -> None:
+    global _WORKER_ARTIFACT_DIR, _WORKER_FOLD_PREDS, _WORKER_FOLD_Y
+    _WORKER_ARTIFACT_DIR = artifact_dir
     _WORKER_FOLD_PREDS = []
     _WORKER_FOLD_Y = []
-    for p in paths:
-        data = np.load(p)
-        _WORKER_FOLD_PREDS.append(data["preds"].astype(np.float32, copy=False))
-        _WORKER_FOLD_Y.append(data["y"].astype(np.uint8, copy=False))
+    _WORKER_SHARED_ARRAYS.clear()
+
+
+def _load_worker_folds() -> None:
+    """Map fold predictions lazily: the pool starts before fold preparation finishes."""
+    global _WORKER_FOLD_PREDS, _WORKER_FOLD_Y
+    pred_paths = sorted(
+        Path(_WORKER_ARTIFACT_DIR).glob("fold_*_preds.npy"),
+        key=lambda p: int(p.name.split("_")[1]),
+    )
+    _WORKER_FOLD_PREDS = [np.load(p, mmap_mode="r") for p in pred_paths]
+    _WORKER_FOLD_Y = [
+        np.load(p.with_name(p.name.replace("_preds", "_y"))).astype(np.uint8, copy=False)
+        for p in pred_paths
+    ]
 
 
 def _safe_logloss(y: np.ndarray, p: np.ndarray) -> float:
@@ -294,6 +589,9 @@ def evaluate_candidate(candidate: tuple[list[int], list[float]]) -> dict[str, An
     fold_briers: list[float] = []
     fold_logloss: list[float] = []
 
+    if not _WORKER_FOLD_PREDS:
+        _load_worker_folds()
+
     for preds, y in zip(_WORKER_FOLD_PREDS, _WORKER_FOLD_Y):
         p = preds[:, idx_arr] @ w
         p = np.clip(p, 1e-4, 1 - 1e-4)
@@ -381,16 +679,15 @@ def save_checkpoint(path: Path, payload: dict[str, Any]) -> None:
 
 
 def fit_full_mappers(
-    df: pd.DataFrame,
+    df: pd.DataFrame | FeatureMatrix,
     feature_cols: list[str],
     n_bins: int,
     alpha: float,
 ) -> dict[str, dict[str, Any]]:
-    y = df["TargetUp"].to_numpy(dtype=np.uint8, copy=False)
+    _, y, feature_arrays = _fold_inputs(df, feature_cols)
     out: dict[str, dict[str, Any]] = {}
 
-    for col in feature_cols:
-        x = df[col].to_numpy(dtype=np.float32, copy=False)
+    for col, x in zip(feature_cols, feature_arrays):
         inner, probs, base = fit_prob_mapper(x, y, n_bins=n_bins, alpha=alpha)
         out[col] = {
             "inner": inner.tolist() if inner is not None else None,
@@ -447,19 +744,23 @@ def main() -> int:
     out_dir = args.output_dir / run_tag
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    df, latest_rows, feature_cols = load_data(args.input)
+    data: pd.DataFrame | FeatureMatrix
+    if args.stream_load:
+        data, latest_rows, feature_cols = load_data_streaming(
+            args.input,
+            work_dir=out_dir,
+            batch_rows=args.stream_batch_rows,
+        )
+        dates = data.dates
+    else:
+        data, latest_rows, feature_cols = load_data(args.input)
+        dates = data["Date"].to_numpy()
 
-    folds = build_folds(df["Date"].to_numpy())
+    folds = build_folds(dates)
     _log(f"Using {len(folds)} walk-forward folds")
 
-    artifact_paths = prepare_fold_artifacts(
-        df=df,
-        feature_cols=feature_cols,
-        folds=folds,
-        n_bins=args.n_bins,
-        alpha=args.alpha,
-        output_dir=out_dir,
-    )
+    # Workers share one file-backed matrix; the in-memory frame is no longer needed.
+    data = ensure_feature_matrix(data, feature_cols, work_dir=out_dir)
 
     rng = np.random.default_rng(args.seed)
 
@@ -468,16 +769,26 @@ def main() -> int:
 
     checkpoint_path = out_dir / "best_logic.json"
 
-    _log(
-        f"Start search: workers={args.workers}, batch_size={args.batch_size}, max_hours={args.max_hours:.2f}"
-    )
-
     iteration = 0
     with ProcessPoolExecutor(
         max_workers=args.workers,
         initializer=_worker_init,
-        initargs=([str(p) for p in artifact_paths],),
+        initargs=(str(out_dir),),
     ) as executor:
+        prepare_fold_artifacts(
+            df=data,
+            feature_cols=feature_cols,
+            folds=folds,
+            n_bins=args.n_bins,
+            alpha=args.alpha,
+            output_dir=out_dir,
+            executor=executor,
+        )
+
+        _log(
+            f"Start search: workers={args.workers}, batch_size={args.batch_size}, max_hours={args.max_hours:.2f}"
+        )
+
         while time.time() < deadline:
             iteration += 1
 
@@ -540,7 +851,11 @@ def main() -> int:
     }
 
     _log("Fitting full-data mappers for latest ranking")
-    mappers = fit_full_mappers(df, feature_cols, n_bins=args.n_bins, alpha=args.alpha)
+    mappers = fit_full_mappers(data, feature_cols, n_bins=args.n_bins, alpha=args.alpha)
+    matrix_path = data.path
+    del data
+    if matrix_path is not None:
+        matrix_path.unlink(missing_ok=True)
 
     top_df = predict_latest(
         latest_rows=latest_rows,
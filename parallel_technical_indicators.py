@@ -3,11 +3,17 @@
 High-performance technical indicator pipeline for large Korean daily OHLCV datasets.
 
 Key features:
-- ProcessPoolExecutor parallelism across tickers
-- pandas_ta custom strategy ("BigDataStrategy")
-- Batch submission to avoid OOM
+- ProcessPoolExecutor parallelism across tickers (input shared via a memory-mapped Arrow file)
+- pandas_ta custom strategy ("BigDataStrategy"), or the vectorized native engine (--engine native)
+- Optional content-addressed per-ticker result cache (--cache-dir) for cheap reruns
+- Memory-governed submission: in-flight work is sized by estimated bytes and held under an RSS budget
 - Float downcast (float64 -> float32)
-- Single Parquet output with zstd compression
+- Single Parquet output with zstd compression, coalesced into large row groups in ticker order
+- Optional Hive-partitioned copy (year=YYYY/ticker=TICKER) matching the R2 layout
+- --append: incremental refresh that reloads only per-ticker warm-up tails and resumes
+  recursive indicators from a state sidecar (<output>.state.parquet, also written by full
+  runs). The new bars go to one part file under <stem>.appends/ (see indicator_output), so
+  a nightly run costs O(new bars); --compact merges the pending parts into the output
 
 Install:
   pip install pandas numpy pyarrow tqdm pandas_ta yfinance finance-datareader
@@ -17,23 +23,53 @@ from __future__ import annotations
 
 import argparse
 import gc
+import hashlib
+import json
 import math
 import os
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 import pandas_ta as ta
 from pandas.api.types import is_float_dtype
 from tqdm import tqdm
 
+import native_indicators
+from indicator_output import (
+    append_parts,
+    append_parts_dir,
+    compacted_part_names,
+    output_files,
+    with_compacted_part_names,
+)
+from native_indicators import (
+    NATIVE_COLUMNS,
+    NATIVE_FLOAT_COLUMNS,
+    PSAR_REVERSAL_COLUMN,
+    STATE_FIELDS,
+    WARMUP_ROWS,
+    IndicatorState,
+    compute_bigdata_indicators,
+)
+
 
 BASE_COLS = ["Date", "Ticker", "Open", "High", "Low", "Close", "Volume"]
 
+# "pandas_ta" runs the BigDataStrategy study; "native" uses native_indicators.py.
+ENGINES = ("pandas_ta", "native")
+
+# Bookkeeping columns of the --append state sidecar (followed by native STATE_FIELDS).
+STATE_META_COLS = ["Ticker", "LastDate", "Rows", "TailStart"]
+
 # Keep only main indicator outputs (plus base OHLCV/Ticker).
 KEEP_PREFIXES = (
     "SMA_",
@@ -162,7 +198,64 @@ def _normalize_single_ticker_df(df_chunk: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def calculate_indicators(df_chunk: pd.DataFrame) -> Tuple[str, pd.DataFrame, Optional[str]]:
+def _native_indicator_frame(
+    df: pd.DataFrame,
+    state: Optional[IndicatorState] = None,
+    warmup_rows: int = 0,
+) -> Tuple[pd.DataFrame, IndicatorState]:
+    """Native outputs for df's rows after the first `warmup_rows`, plus the end-of-frame state."""
+    matrix, reversal, end_state = compute_bigdata_indicators(
+        high=df["High"].to_numpy(dtype=np.float64),
+        low=df["Low"].to_numpy(dtype=np.float64),
+        close=df["Close"].to_numpy(dtype=np.float64),
+        volume=df["Volume"].to_numpy(dtype=np.float64),
+        state=state,
+        warmup_rows=warmup_rows,
+    )
+    index = df.index[warmup_rows:]
+    indicators = pd.DataFrame(matrix[warmup_rows:], index=index, columns=list(NATIVE_FLOAT_COLUMNS))
+    indicators.insert(
+        NATIVE_COLUMNS.index(PSAR_REVERSAL_COLUMN), PSAR_REVERSAL_COLUMN, reversal[warmup_rows:]
+    )
+    return pd.concat([df[BASE_COLS[1:]].iloc[warmup_rows:], indicators], axis=1), end_state
+
+
+def _compute_indicator_frame(
+    df: pd.DataFrame,
+    ticker: str,
+    engine: str = "pandas_ta",
+) -> Tuple[pd.DataFrame, IndicatorState]:
+    """
+    Run the study on a Date-indexed, sorted single-ticker frame. Returns the output schema
+    and the native end-of-frame state --append resumes from (NaN fields when OHLCV has gaps).
+    """
+    ohlcv = df[["High", "Low", "Close", "Volume"]].to_numpy(dtype=np.float64)
+    finite = bool(np.isfinite(ohlcv).all())
+    state: IndicatorState = {f: np.nan for f in STATE_FIELDS}
+    if engine == "native" and finite:
+        df, state = _native_indicator_frame(df)
+    else:
+        if finite:
+            # The study keeps no resumable state; the native kernels provide it.
+            _, _, state = compute_bigdata_indicators(ohlcv[:, 0], ohlcv[:, 1], ohlcv[:, 2], ohlcv[:, 3])
+        # Slices with gaps/NaNs keep the reference implementation so outputs stay identical.
+        # Disable pandas_ta internal multiprocessing to avoid nested parallelism.
+        df.ta.cores = 0
+        df.ta.study(build_bigdata_strategy(), timed=False, verbose=False, cores=0)
+
+        # Keep only base + main outputs.
+        df = prune_columns(df)
+    df["Ticker"] = ticker
+
+    # Move Date back to column for stable schema handling in parent.
+    df = df.reset_index()
+    return downcast_float64_to_float32(df), state
+
+
+def calculate_indicators(
+    df_chunk: pd.DataFrame,
+    engine: str = "pandas_ta",
+) -> Tuple[str, pd.DataFrame, Optional[str]]:
     """
     Worker-safe function for one ticker chunk.
     Returns: (ticker, processed_df, error_message)
@@ -177,20 +270,181 @@ def calculate_indicators(df_chunk: pd.DataFrame) -> Tuple[str, pd.DataFrame, Opt
         if len(df) == 0:
             return ticker, pd.DataFrame(), "no valid rows after normalization"
 
-        # Disable pandas_ta internal multiprocessing to avoid nested parallelism.
-        df.ta.cores = 0
-        df.ta.study(build_bigdata_strategy(), timed=False, verbose=False, cores=0)
+        frame, _ = _compute_indicator_frame(df, ticker, engine)
+        return ticker, frame, None
+    except Exception as exc:
+        return ticker, pd.DataFrame(), f"{type(exc).__name__}: {exc}"
 
-        # Keep only base + main outputs.
-        df = prune_columns(df)
-        df["Ticker"] = ticker
 
-        # Move Date back to column for stable schema handling in parent.
-        df = df.reset_index()
-        df = downcast_float64_to_float32(df)
-        return ticker, df, None
+# Worker-side cache of the parent's memory-mapped OHLCV table (opened once per process).
+_SHARED_INPUT: Dict[str, pa.Table] = {}
+
+
+def publish_shared_input(df: pd.DataFrame, path: Path) -> None:
+    """
+    Write sorted, deduplicated OHLCV columns once as an uncompressed Arrow IPC file.
+    Workers memory-map it and read their (offset, length) slice without pickling.
+    """
+    table = pa.Table.from_pandas(df[["Date", "Open", "High", "Low", "Close", "Volume"]], preserve_index=False)
+    with pa.OSFile(path.as_posix(), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as ipc_writer:
+            ipc_writer.write_table(table)
+
+
+def _shared_input_table(path: str) -> pa.Table:
+    table = _SHARED_INPUT.get(path)
+    if table is None:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        _SHARED_INPUT[path] = table
+    return table
+
+
+def calculate_indicators_shared(
+    source_path: str,
+    ticker: str,
+    offset: int,
+    length: int,
+    engine: str = "pandas_ta",
+) -> Tuple[str, pd.DataFrame, Optional[str], Optional[IndicatorState]]:
+    """
+    Worker entry point for the shared-input path. The parent guarantees the slice is
+    already sorted by Date, deduplicated and numeric, so normalization is skipped.
+    Returns (ticker, processed_df, error_message, end-of-frame state).
+    """
+    try:
+        if length <= 0:
+            return ticker, pd.DataFrame(), "empty chunk", None
+
+        df = _shared_input_table(source_path).slice(offset, length).to_pandas()
+        df.insert(1, "Ticker", ticker)
+        df = df.set_index("Date")
+        frame, state = _compute_indicator_frame(df, ticker, engine)
+        return ticker, frame, None, state
     except Exception as exc:
-        return ticker, pd.DataFrame(), f"{type(exc).__name__}: {exc}"
+        return ticker, pd.DataFrame(), f"{type(exc).__name__}: {exc}", None
+
+
+def compare_indicator_frames(
+    reference: pd.DataFrame,
+    candidate: pd.DataFrame,
+    rtol: float = 1e-4,
+    atol: float = 1e-6,
+) -> Dict[str, int]:
+    """Return {column: mismatching rows} between two engine outputs for the same ticker."""
+    mismatches: Dict[str, int] = {}
+    for col in candidate.columns:
+        if col in ("Date", "Ticker"):
+            continue
+        got = candidate[col].to_numpy(dtype=np.float64)
+        if col not in reference.columns:
+            # pandas_ta skips indicators whose minimum length is not met.
+            bad = int(np.count_nonzero(~np.isnan(got)))
+        else:
+            ref = reference[col].to_numpy(dtype=np.float64)
+            bad = int(np.count_nonzero(~np.isclose(ref, got, rtol=rtol, atol=atol, equal_nan=True)))
+        if bad:
+            mismatches[col] = bad
+    for col in set(reference.columns).difference(candidate.columns):
+        mismatches[col] = len(reference)
+    return mismatches
+
+
+def validate_native_engine(
+    source_path: Path,
+    tickers: Sequence[str],
+    offsets: np.ndarray,
+    lengths: np.ndarray,
+    sample_tickers: int = 3,
+) -> None:
+    """Pre-flight check: the native engine must reproduce pandas_ta on the longest tickers."""
+    if sample_tickers <= 0:
+        return
+    picks = np.argsort(-np.asarray(lengths), kind="stable")[:sample_tickers]
+    try:
+        for pos in picks:
+            args = (source_path.as_posix(), tickers[pos], int(offsets[pos]), int(lengths[pos]))
+            _, reference, ref_err, _ = calculate_indicators_shared(*args, engine="pandas_ta")
+            _, candidate, cand_err, _ = calculate_indicators_shared(*args, engine="native")
+            if ref_err or cand_err:
+                raise RuntimeError(f"Native engine check failed for {tickers[pos]}: {ref_err or cand_err}")
+            mismatches = compare_indicator_frames(reference, candidate)
+            if mismatches:
+                raise RuntimeError(f"Native engine differs from pandas_ta for {tickers[pos]}: {mismatches}")
+    finally:
+        # Release the parent's memory map so the temp file can be removed on every platform.
+        _SHARED_INPUT.pop(source_path.as_posix(), None)
+    print(f"Native engine matches pandas_ta on {len(picks)} sample ticker(s).")
+
+
+def study_fingerprint(engine: str) -> str:
+    """Everything apart from a ticker's OHLCV that determines its output, as stable JSON."""
+    definition = {
+        "engine": engine,
+        "study": build_bigdata_strategy().ta,
+        "keep_prefixes": KEEP_PREFIXES,
+        "drop_prefixes": DROP_PREFIXES,
+        "pandas_ta": getattr(ta, "version", "unknown"),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+    if engine == "native":
+        # The native engine has no release number; its source is its version.
+        definition["native_indicators"] = hashlib.sha256(Path(native_indicators.__file__).read_bytes()).hexdigest()
+    return json.dumps(definition, sort_keys=True, default=str)
+
+
+class ResultCache:
+    """
+    Content-addressed store of per-ticker outputs: <cache_dir>/<key[:2]>/<key>.parquet.
+
+    The key is a SHA-256 over the study fingerprint, the ticker and its normalized
+    OHLCV slice, so any change to the data, study or library versions misses. Each entry
+    also carries the ticker's end-of-frame IndicatorState in its footer metadata (entries
+    written without one count as misses), so cache hits still feed the --append sidecar.
+    """
+
+    STATE_KEY = b"pti.indicator_state"
+
+    def __init__(self, cache_dir: Path, fingerprint: str) -> None:
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint.encode("utf-8")
+        self.hits = 0
+        self.stored = 0
+
+    def key(self, ticker: str, dates_ns: np.ndarray, ohlcv: np.ndarray) -> str:
+        digest = hashlib.sha256(self.fingerprint)
+        digest.update(b"\0" + ticker.encode("utf-8") + b"\0")
+        digest.update(np.ascontiguousarray(dates_ns, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(ohlcv, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, IndicatorState]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            table = pq.read_table(path.as_posix())
+        except (OSError, pa.ArrowInvalid):
+            return None  # truncated/corrupt entry: recompute and overwrite
+        raw_state = (table.schema.metadata or {}).get(self.STATE_KEY)
+        if raw_state is None:
+            return None
+        self.hits += 1
+        return table.to_pandas(), json.loads(raw_state)
+
+    def put(self, key: str, df: pd.DataFrame, state: IndicatorState) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[self.STATE_KEY] = json.dumps({f: float(state[f]) for f in STATE_FIELDS}).encode("utf-8")
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path.as_posix(), compression="zstd")
+        os.replace(tmp_path, path)
+        self.stored += 1
 
 
 def load_input_dataframe(input_path: Path) -> pd.DataFrame:
@@ -231,19 +485,294 @@ def align_to_master_columns(df: pd.DataFrame, master_cols: Sequence[str]) -> pd.
     return out
 
 
+class OrderedRowGroupWriter:
+    """
+    Buffering writer stage between workers and the output parquet.
+
+    Worker results arrive in completion order; they are parked in a reorder buffer
+    until every earlier ticker (by position) has been emitted, so the file is laid
+    out in stable ticker order. Emitted tables are coalesced and written as row
+    groups of exactly `row_group_rows` rows (the tail goes out on close), each with
+    min/max column statistics for predicate pushdown.
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        row_group_rows: int = 262_144,
+        compression: str = "zstd",
+        partition_dir: Optional[Path] = None,
+        partition_suffix: str = "",
+    ) -> None:
+        self.output_path = output_path
+        self.row_group_rows = max(1, int(row_group_rows))
+        self.compression = compression
+        self.partition_dir = partition_dir
+        self.partition_suffix = partition_suffix
+        self.rows_written = 0
+        self.row_groups_written = 0
+        self.partition_files_written = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._schema: Optional[pa.Schema] = None
+        self._next_position = 0
+        self._reorder: Dict[int, Optional[pa.Table]] = {}
+        self._pending: List[pa.Table] = []
+        self._pending_rows = 0
+
+    def add(self, position: int, table: Optional[pa.Table]) -> List[int]:
+        """
+        Register the result for ticker `position`; None marks a failed/empty ticker.
+        Returns the positions that left the reorder buffer (possibly none, if an earlier
+        ticker is still outstanding).
+        """
+        self._reorder[position] = table
+        released: List[int] = []
+        while self._next_position in self._reorder:
+            ready = self._reorder.pop(self._next_position)
+            released.append(self._next_position)
+            self._next_position += 1
+            if ready is not None and ready.num_rows > 0:
+                self._emit(ready)
+        return released
+
+    def _emit(self, table: pa.Table) -> None:
+        if self._schema is None:
+            self._schema = table.schema
+        elif not table.schema.equals(self._schema):
+            table = table.cast(self._schema)
+
+        if self.partition_dir is not None:
+            self._write_partitions(table)
+
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            self._flush(final=False)
+
+    def _flush(self, final: bool) -> None:
+        if not self._pending:
+            return
+        combined = pa.concat_tables(self._pending).combine_chunks()
+        full_groups = combined.num_rows // self.row_group_rows
+        cut = combined.num_rows if final else full_groups * self.row_group_rows
+
+        for start in range(0, cut, self.row_group_rows):
+            self._write_row_group(combined.slice(start, min(self.row_group_rows, cut - start)))
+
+        rest = combined.slice(cut)
+        self._pending = [rest] if rest.num_rows else []
+        self._pending_rows = rest.num_rows
+
+    def _write_row_group(self, table: pa.Table) -> None:
+        if self._writer is None:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(
+                self.output_path.as_posix(),
+                table.schema,
+                compression=self.compression,
+                write_statistics=True,
+            )
+        self._writer.write_table(table, row_group_size=self.row_group_rows)
+        self.rows_written += table.num_rows
+        self.row_groups_written += 1
+
+    def _write_partitions(self, table: pa.Table) -> None:
+        ticker = str(table.column("Ticker")[0].as_py())
+        years = pc.year(table.column("Date")).to_numpy(zero_copy_only=False)
+        for year in np.unique(years):
+            part = table.filter(pa.array(years == year))
+            part_dir = self.partition_dir / f"year={int(year)}" / f"ticker={ticker}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            pq.write_table(
+                part,
+                (part_dir / f"part-{int(year)}{self.partition_suffix}.parquet").as_posix(),
+                compression=self.compression,
+                write_statistics=True,
+            )
+            self.partition_files_written += 1
+
+    def close(self) -> None:
+        # Anything still parked belongs to tickers after a gap that never reported.
+        for position in sorted(self._reorder):
+            table = self._reorder.pop(position)
+            if table is not None and table.num_rows > 0:
+                self._emit(table)
+        self._flush(final=True)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# Rough peak working set per input row of one worker task, in float64 cells: the study
+# fans a ticker out to ~70 indicator columns plus intermediate copies; the native engine
+# fills one preallocated matrix.
+TASK_CELLS_PER_ROW = {"pandas_ta": 240, "native": 64}
+
+
+def estimate_task_bytes(rows: int, engine: str = "pandas_ta") -> int:
+    return int(rows) * TASK_CELLS_PER_ROW.get(engine, TASK_CELLS_PER_ROW["pandas_ta"]) * 8
+
+
+def _proc_status_kb(pid: str, field: str) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii", errors="replace") as fh:
+            for line in fh:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _child_pids(pid: int) -> List[str]:
+    children: List[str] = []
+    for task_dir in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            children.extend((task_dir / "children").read_text().split())
+        except OSError:
+            continue
+    return children
+
+
+def process_tree_rss_bytes() -> Optional[int]:
+    """RSS of this process plus its direct children (pool workers); None without /proc."""
+    if not Path("/proc/self/status").exists():
+        return None
+    pids = ["self"] + _child_pids(os.getpid())
+    return sum(_proc_status_kb(pid, "VmRSS:") for pid in pids) * 1024
+
+
+def default_memory_budget_bytes() -> Optional[int]:
+    """80% of what is available right now on top of what this process already holds."""
+    available_kb = 0
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    available_kb = int(line.split()[1])
+                    break
+    except (OSError, ValueError, IndexError):
+        return None
+    if available_kb <= 0:
+        return None
+    return int(available_kb * 1024 * 0.8) + (process_tree_rss_bytes() or 0)
+
+
+class MemoryGovernor:
+    """
+    Admission control for worker submissions.
+
+    A task is admitted while the estimated bytes of everything in flight stay under
+    `inflight_bytes` and the measured RSS of the parent plus pool workers stays under
+    `rss_budget_bytes`. With nothing in flight every task is admitted, so one oversized
+    ticker still runs (alone) instead of deadlocking the pipeline.
+    """
+
+    def __init__(
+        self,
+        rss_budget_bytes: Optional[int],
+        inflight_bytes: Optional[int] = None,
+        max_inflight_tasks: int = 120,
+        rss_poll_seconds: float = 0.25,
+    ) -> None:
+        self.rss_budget_bytes = rss_budget_bytes
+        if inflight_bytes is None and rss_budget_bytes is not None:
+            inflight_bytes = rss_budget_bytes // 2
+        self.inflight_bytes = inflight_bytes
+        self.max_inflight_tasks = max(1, int(max_inflight_tasks))
+        self.rss_poll_seconds = rss_poll_seconds
+        self.current_bytes = 0
+        self.current_tasks = 0
+        self.peak_rss_bytes = 0
+        self.throttled = 0
+        self._rss_checked_at = 0.0
+        self._rss_bytes = 0
+
+    def _rss(self) -> Optional[int]:
+        now = time.monotonic()
+        if now - self._rss_checked_at >= self.rss_poll_seconds:
+            rss = process_tree_rss_bytes()
+            if rss is None:
+                return None
+            self._rss_bytes = rss
+            self._rss_checked_at = now
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        return self._rss_bytes
+
+    def admit(self, task_bytes: int) -> bool:
+        if self.current_tasks == 0:
+            return True
+        if self.current_tasks >= self.max_inflight_tasks:
+            return False
+        if self.inflight_bytes is not None and self.current_bytes + task_bytes > self.inflight_bytes:
+            self.throttled += 1
+            return False
+        if self.rss_budget_bytes is not None:
+            rss = self._rss()
+            if rss is not None and rss + task_bytes > self.rss_budget_bytes:
+                self.throttled += 1
+                return False
+        return True
+
+    def started(self, task_bytes: int) -> None:
+        self.current_bytes += task_bytes
+        self.current_tasks += 1
+
+    def finished(self, task_bytes: int) -> None:
+        self.current_bytes -= task_bytes
+        self.current_tasks -= 1
+
+
+def prepare_input_frame(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize once in the parent (sorted, one row per Ticker/Date) so workers can skip it."""
+    df = raw_df[BASE_COLS].copy()
+    df["Ticker"] = df["Ticker"].astype(str)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    for col in ("Open", "High", "Low", "Close", "Volume"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(np.float64)
+    return (
+        df.dropna(subset=["Date"])
+        .sort_values(["Ticker", "Date"])
+        .drop_duplicates(subset=["Ticker", "Date"], keep="last")
+        .reset_index(drop=True)
+    )
+
+
 def run_parallel_pipeline(
     raw_df: pd.DataFrame,
     output_path: Path,
     batch_tickers: int = 120,
     max_workers: Optional[int] = None,
+    row_group_rows: int = 262_144,
+    partition_dir: Optional[Path] = None,
+    engine: str = "pandas_ta",
+    native_check_tickers: int = 3,
+    memory_budget_mb: Optional[float] = None,
+    inflight_mb: Optional[float] = None,
+    cache_dir: Optional[Path] = None,
 ) -> None:
-    df = raw_df[BASE_COLS].copy()
-    df["Ticker"] = df["Ticker"].astype(str)
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(subset=["Date"]).sort_values(["Ticker", "Date"]).reset_index(drop=True)
+    """
+    `batch_tickers` caps how many tickers are queued on the pool at once. Within that,
+    submissions are throttled by MemoryGovernor: estimated bytes in flight stay under
+    `inflight_mb` (default half the budget) and parent+worker RSS under `memory_budget_mb`
+    (default 80% of currently available memory). A ticker's share is held until the writer
+    emits it, so results parked in the reorder buffer behind a slow earlier ticker still
+    count (and `batch_tickers` also bounds that buffer).
+
+    With `cache_dir`, tickers whose OHLCV slice and study are unchanged since an earlier
+    run are read from the ResultCache and go straight to the writer without a worker.
+
+    The run replaces the output wholesale: pending --append parts are dropped and a fresh
+    state sidecar is written, so the next --append resumes from it instead of reloading
+    the full history.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine} (expected one of {ENGINES})")
+
+    df = prepare_input_frame(raw_df)
 
-    ticker_to_index = df.groupby("Ticker", sort=False).indices
-    tickers = list(ticker_to_index.keys())
+    tickers, offsets, lengths = np.unique(df["Ticker"].to_numpy(), return_index=True, return_counts=True)
+    tickers = [str(t) for t in tickers]
     if not tickers:
         raise RuntimeError("No tickers found in input dataframe.")
 
@@ -251,73 +780,159 @@ def run_parallel_pipeline(
         max_workers = max(1, (os.cpu_count() or 2) - 1)
 
     print(f"Input rows: {len(df):,}, tickers: {len(tickers):,}")
-    print(f"Using workers: {max_workers}, ticker batch size: {batch_tickers}")
+    if memory_budget_mb is not None:
+        rss_budget = int(memory_budget_mb * 1024 * 1024)
+    else:
+        rss_budget = default_memory_budget_bytes()
+    governor = MemoryGovernor(
+        rss_budget_bytes=rss_budget,
+        inflight_bytes=int(inflight_mb * 1024 * 1024) if inflight_mb is not None else None,
+        max_inflight_tasks=batch_tickers,
+    )
+    task_bytes = [estimate_task_bytes(n, engine) for n in lengths]
+
+    print(f"Using workers: {max_workers}, max tickers in flight: {batch_tickers}")
+    if governor.rss_budget_bytes is not None:
+        print(
+            f"Memory budget: {governor.rss_budget_bytes / 2**20:,.0f} MB RSS, "
+            f"{governor.inflight_bytes / 2**20:,.0f} MB estimated in flight"
+        )
+    print(f"Row group target: {row_group_rows:,} rows")
+    print(f"Indicator engine: {engine}")
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    writer: Optional[pq.ParquetWriter] = None
+    # Appends and state describe the output being replaced.
+    shutil.rmtree(append_parts_dir(output_path), ignore_errors=True)
+    state_path = indicator_state_path(output_path)
+    state_path.unlink(missing_ok=True)
+    states: Dict[str, dict] = {}
+    writer = OrderedRowGroupWriter(
+        output_path,
+        row_group_rows=row_group_rows,
+        compression="zstd",
+        partition_dir=partition_dir,
+    )
     master_cols: Optional[List[str]] = None
     master_dtypes: Optional[dict] = None
 
     errors: List[Tuple[str, str]] = []
     total_ok = 0
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    cache: Optional[ResultCache] = None
+    cache_keys: List[Optional[str]] = [None] * len(tickers)
+    if cache_dir is not None:
+        cache = ResultCache(cache_dir, study_fingerprint(engine))
+        dates_ns = df["Date"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        ohlcv = df[["Open", "High", "Low", "Close", "Volume"]].to_numpy(dtype=np.float64)
+        for pos, ticker in enumerate(tickers):
+            rows = slice(int(offsets[pos]), int(offsets[pos] + lengths[pos]))
+            cache_keys[pos] = cache.key(ticker, dates_ns[rows], ohlcv[rows])
+        del dates_ns, ohlcv
+        print(f"Result cache: {cache_dir}")
+
+    def accept(
+        pos: int,
+        ticker: str,
+        result_df: pd.DataFrame,
+        err: Optional[str],
+        state: Optional[IndicatorState],
+        cached: bool,
+    ) -> List[int]:
+        """Hand a result to the writer; returns the positions it emitted."""
+        nonlocal master_cols, master_dtypes, total_ok
+        if err is not None:
+            errors.append((ticker, err))
+            return writer.add(pos, None)
+        if result_df.empty:
+            errors.append((ticker, "empty output"))
+            return writer.add(pos, None)
+
+        result_df = result_df.sort_values(["Date", "Ticker"]).reset_index(drop=True)
+        result_df = downcast_float64_to_float32(result_df)
+        if cache is not None and not cached:
+            cache.put(cache_keys[pos], result_df, state)
+        states[ticker] = indicator_state_record(
+            ticker, pd.DatetimeIndex(result_df["Date"]), len(result_df), state
+        )
+
+        if master_cols is None:
+            master_cols = list(result_df.columns)
+            master_dtypes = {c: result_df[c].dtype for c in master_cols}
+        result_df = align_to_master_columns(result_df, master_cols)
+        for c, dt in (master_dtypes or {}).items():
+            try:
+                result_df[c] = result_df[c].astype(dt, copy=False)
+            except Exception:
+                # Fallback to float32 for float-like columns when exact cast fails.
+                if is_float_dtype(result_df[c]):
+                    result_df[c] = result_df[c].astype(np.float32, copy=False)
+
+        total_ok += 1
+        return writer.add(pos, pa.Table.from_pandas(result_df, preserve_index=False))
+
+    shared_dir = tempfile.TemporaryDirectory(prefix="pti_input_")
+    shared_path = Path(shared_dir.name) / "ohlcv.arrow"
+    publish_shared_input(df, shared_path)
+    del df
+    gc.collect()
+
+    if engine == "native":
+        validate_native_engine(shared_path, tickers, offsets, lengths, sample_tickers=native_check_tickers)
+
+    with shared_dir, ProcessPoolExecutor(max_workers=max_workers) as executor:
         pbar = tqdm(total=len(tickers), desc="Tickers processed", unit="ticker")
 
-        for batch in chunked(tickers, batch_tickers):
-            futures = []
-            for tk in batch:
-                idx = ticker_to_index[tk]
-                # Send only one ticker slice to worker to preserve time-series integrity.
-                ticker_df = df.iloc[idx][BASE_COLS].copy()
-                futures.append(executor.submit(calculate_indicators, ticker_df))
-
-            for fut in as_completed(futures):
-                ticker, result_df, err = fut.result()
-                pbar.update(1)
-
-                if err is not None:
-                    errors.append((ticker, err))
+        def release(positions: List[int]) -> None:
+            # Budget is returned only once the writer has emitted the table.
+            for released in positions:
+                governor.finished(task_bytes[released])
+
+        inflight = {}
+        next_pos = 0
+        looked_up = -1
+        cached_hit: Optional[Tuple[pd.DataFrame, IndicatorState]] = None
+        while next_pos < len(tickers) or inflight:
+            # Backpressure: keep submitting until the governor says the pool is full.
+            while next_pos < len(tickers):
+                if looked_up != next_pos:
+                    cached_hit = cache.get(cache_keys[next_pos]) if cache is not None else None
+                    looked_up = next_pos
+                if not governor.admit(task_bytes[next_pos]):
+                    break
+                governor.started(task_bytes[next_pos])
+                # Cache hits bypass the pool but may still park in the reorder buffer.
+                if cached_hit is not None:
+                    (result_df, state), cached_hit = cached_hit, None
+                    release(accept(next_pos, tickers[next_pos], result_df, None, state, cached=True))
+                    pbar.update(1)
+                    next_pos += 1
                     continue
-                if result_df.empty:
-                    errors.append((ticker, "empty output"))
-                    continue
-
-                result_df = result_df.sort_values(["Date", "Ticker"]).reset_index(drop=True)
-                result_df = downcast_float64_to_float32(result_df)
-
-                if master_cols is None:
-                    master_cols = list(result_df.columns)
-                    master_dtypes = {c: result_df[c].dtype for c in master_cols}
-                result_df = align_to_master_columns(result_df, master_cols)
-                for c, dt in (master_dtypes or {}).items():
-                    try:
-                        result_df[c] = result_df[c].astype(dt, copy=False)
-                    except Exception:
-                        # Fallback to float32 for float-like columns when exact cast fails.
-                        if is_float_dtype(result_df[c]):
-                            result_df[c] = result_df[c].astype(np.float32, copy=False)
-
-                table = pa.Table.from_pandas(result_df, preserve_index=False)
-                if writer is None:
-                    writer = pq.ParquetWriter(
-                        output_path.as_posix(),
-                        table.schema,
-                        compression="zstd",
-                    )
-                writer.write_table(table)
-                total_ok += 1
-
-                del result_df, table
-
-            gc.collect()
+                # Workers read one contiguous ticker slice from the shared file.
+                fut = executor.submit(
+                    calculate_indicators_shared,
+                    shared_path.as_posix(),
+                    tickers[next_pos],
+                    int(offsets[next_pos]),
+                    int(lengths[next_pos]),
+                    engine,
+                )
+                inflight[fut] = next_pos
+                next_pos += 1
+
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                pos = inflight.pop(fut)
+                ticker, result_df, err, state = fut.result()
+                pbar.update(1)
+                release(accept(pos, ticker, result_df, err, state, cached=False))
+                del result_df
 
         pbar.close()
 
-    if writer is not None:
-        writer.close()
-    else:
+    writer.close()
+    if writer.rows_written == 0:
         raise RuntimeError("No successful ticker output. Nothing written.")
+    save_indicator_state(state_path, states)
 
     size_mb = output_path.stat().st_size / (1024 * 1024)
     print("\nPipeline complete.")
@@ -325,7 +940,287 @@ def run_parallel_pipeline(
     print(f"Failed tickers: {len(errors):,}")
     print(f"Output: {output_path}")
     print(f"Output size: {size_mb:,.2f} MB")
+    print(f"Row groups: {writer.row_groups_written:,} ({writer.rows_written:,} rows)")
+    print(f"State: {state_path}")
+    if governor.peak_rss_bytes:
+        print(f"Peak RSS (parent + workers): {governor.peak_rss_bytes / 2**20:,.0f} MB")
+    print(f"Submissions deferred by memory governor: {governor.throttled:,}")
+    if cache is not None:
+        print(f"Result cache: {cache.hits:,} hit(s), {cache.stored:,} new entr{'y' if cache.stored == 1 else 'ies'}")
+    if partition_dir is not None:
+        print(f"Partitioned copy: {partition_dir} ({writer.partition_files_written:,} files)")
+
+    if errors:
+        err_preview = "\n".join([f"  - {tk}: {msg}" for tk, msg in errors[:20]])
+        print("Error preview (first 20):")
+        print(err_preview)
+
+
+def indicator_state_path(output_path: Path) -> Path:
+    """Sidecar next to the output holding per-ticker recursive state for --append runs."""
+    return output_path.with_name(f"{output_path.stem}.state.parquet")
+
+
+def load_indicator_state(path: Path) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    records = pq.read_table(path.as_posix()).to_pandas().to_dict("records")
+    return {str(rec["Ticker"]): rec for rec in records}
+
+
+def save_indicator_state(path: Path, states: Dict[str, dict]) -> None:
+    frame = pd.DataFrame([states[t] for t in sorted(states)], columns=STATE_META_COLS + list(STATE_FIELDS))
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def indicator_state_record(
+    ticker: str,
+    dates: pd.DatetimeIndex,
+    rows: int,
+    state: Optional[IndicatorState],
+) -> dict:
+    """
+    Sidecar record of one ticker: `rows` stored bars ending at dates[-1] (dates holds at
+    least the last min(rows, WARMUP_ROWS) of them) and the recursive state after the last.
+    """
+    record = {
+        "Ticker": ticker,
+        "LastDate": dates[-1],
+        "Rows": rows,
+        "TailStart": dates[-min(rows, WARMUP_ROWS)],
+    }
+    record.update({f: (state or {}).get(f, np.nan) for f in STATE_FIELDS})
+    return record
+
+
+def _read_output_ohlcv(output_path: Path, filters: Optional[list] = None) -> pd.DataFrame:
+    """
+    Base OHLCV columns of an existing output and its pending append parts (float32 as
+    stored), sorted by Ticker/Date.
+    """
+    tables = [pq.read_table(p.as_posix(), columns=BASE_COLS, filters=filters) for p in output_files(output_path)]
+    df = pa.concat_tables(tables).to_pandas()
+    df["Ticker"] = df["Ticker"].astype(str)
+    return df.sort_values(["Ticker", "Date"]).reset_index(drop=True)
+
+
+def _has_resumable_state(state: Optional[dict]) -> bool:
+    return state is not None and all(np.isfinite(float(state[f])) for f in STATE_FIELDS)
+
+
+def _append_ticker(
+    ticker: str,
+    history: pd.DataFrame,
+    rows_before: int,
+    fresh: pd.DataFrame,
+    state: Optional[dict],
+    load_full_history,
+) -> Tuple[pd.DataFrame, dict]:
+    """
+    Indicator rows for `fresh` bars of one ticker plus its updated state record.
+    `history` is the Date-indexed tail (or all) of the rows already in the output.
+    """
+    combined = pd.concat([history, fresh])
+    finite = bool(np.isfinite(combined[["High", "Low", "Close", "Volume"]].to_numpy(dtype=np.float64)).all())
+    new_state: IndicatorState = {f: np.nan for f in STATE_FIELDS}
+
+    if not (finite and _has_resumable_state(state) and rows_before > len(history)):
+        # No usable state: recompute from the full stored history and keep only the new bars.
+        if rows_before > len(history):
+            history = load_full_history(ticker)
+            combined = pd.concat([history, fresh])
+        state = None
+
+    warmup = len(history)
+    if finite:
+        frame, new_state = _native_indicator_frame(combined, state=state, warmup_rows=warmup)
+        frame["Ticker"] = ticker
+        frame = downcast_float64_to_float32(frame.reset_index())
+    elif len(fresh):
+        frame, _ = _compute_indicator_frame(combined, ticker, "pandas_ta")
+        frame = frame.iloc[warmup:]
+    else:
+        frame = pd.DataFrame()
+
+    record = indicator_state_record(ticker, combined.index, rows_before + len(fresh), new_state)
+    return frame.reset_index(drop=True), record
 
+
+def merge_appended_rows(output_path: Path, parts: Sequence[Path], row_group_rows: int) -> int:
+    """
+    Rewrite output_path with the rows of the append `parts` merged in (Ticker, Date) order,
+    so the file keeps the full-run layout: ticker-ordered, full `row_group_rows` groups.
+    Existing groups are streamed one at a time (no indicator recompute); the new rows of
+    each ticker join the group holding its last stored bar. The merged file lists the part
+    names in its footer (see indicator_output). Returns the row group count.
+    """
+    current = pq.ParquetFile(output_path.as_posix())
+    schema = with_compacted_part_names(current.schema_arrow, [p.name for p in parts])
+    order = [("Ticker", "ascending"), ("Date", "ascending")]
+
+    def conform(table: pa.Table) -> pa.Table:
+        return table.select(schema.names).cast(schema).replace_schema_metadata(schema.metadata)
+
+    fresh = conform(pa.concat_tables([pq.read_table(p.as_posix()) for p in parts])).sort_by(order)
+    fresh_tickers = fresh.column("Ticker")
+
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp")
+    writer = OrderedRowGroupWriter(tmp_path, row_group_rows=row_group_rows, compression="zstd")
+    taken = 0
+    for i in range(current.num_row_groups):
+        group = conform(current.read_row_group(i))
+        if group.num_rows and taken < fresh.num_rows:
+            # Tickers before this group's last one have no stored rows in later groups.
+            last = group.column("Ticker")[-1]
+            cut = taken + int(pc.sum(pc.less(fresh_tickers.slice(taken), last)).as_py() or 0)
+            if cut > taken:
+                group = pa.concat_tables([group, fresh.slice(taken, cut - taken)]).sort_by(order)
+                taken = cut
+        writer.add(i, group)
+    if taken < fresh.num_rows:
+        writer.add(current.num_row_groups, fresh.slice(taken))
+    writer.close()
+    os.replace(tmp_path, output_path)
+    return writer.row_groups_written
+
+
+def run_compaction(output_path: Path, row_group_rows: int = 262_144) -> None:
+    """
+    Merge the pending --append parts into output_path (one rewrite of the output), then
+    delete them. Parts an interrupted compaction already merged are only deleted.
+    """
+    if not output_path.exists():
+        raise FileNotFoundError(f"--compact needs an existing output: {output_path}")
+    parts_dir = append_parts_dir(output_path)
+    leftovers = compacted_part_names(pq.read_schema(output_path.as_posix()))
+    for name in leftovers:
+        (parts_dir / name).unlink(missing_ok=True)
+
+    parts = append_parts(output_path)
+    if not parts:
+        print(f"Compaction: no pending append parts for {output_path}")
+        return
+    output_groups = merge_appended_rows(output_path, parts, row_group_rows)
+    for part in parts:
+        part.unlink()
+
+    print("\nCompaction complete.")
+    print(f"Merged part files: {len(parts):,}")
+    print(f"Output: {output_path} ({output_groups:,} row group(s))")
+
+
+def run_append_pipeline(
+    raw_df: pd.DataFrame,
+    output_path: Path,
+    row_group_rows: int = 262_144,
+    partition_dir: Optional[Path] = None,
+) -> None:
+    """
+    Incremental refresh: compute indicators only for bars newer than what output_path holds.
+
+    Per ticker, only the last WARMUP_ROWS stored bars are reloaded; recursive indicators
+    (EMA/MACD, ADX/ATR, RSI, Keltner, OBV, PSAR) continue from the float64 state sidecar,
+    so appended rows match a full native recompute (bit for bit when prices survive the
+    output's float32 storage, as integer KRX prices do). Tickers without usable state
+    (NaN gaps, a sidecar that no longer matches the output) are recomputed from their full
+    stored history instead. New rows are written as one part file under
+    append_parts_dir(output_path), and as part files under partition_dir; the output
+    itself is not rewritten (run_compaction merges the parts).
+    """
+    if not output_path.exists():
+        raise FileNotFoundError(f"--append needs an existing output: {output_path}")
+
+    incoming = prepare_input_frame(raw_df)
+    state_path = indicator_state_path(output_path)
+    states = load_indicator_state(state_path)
+
+    # The state is only trusted while it accounts for exactly the rows in the output.
+    output_rows = sum(pq.ParquetFile(p.as_posix()).metadata.num_rows for p in output_files(output_path))
+    tracked = bool(states) and sum(int(s["Rows"]) for s in states.values()) == output_rows
+    if tracked:
+        since = min(pd.Timestamp(s["TailStart"]) for s in states.values())
+        stored = _read_output_ohlcv(output_path, filters=[("Date", ">=", since)])
+        print(f"Reloading warm-up tails since {since.date()} ({len(stored):,} rows)")
+    else:
+        states = {}
+        stored = _read_output_ohlcv(output_path)
+        print(f"No matching state at {state_path}; reloading full history ({len(stored):,} rows)")
+
+    def load_full_history(ticker: str) -> pd.DataFrame:
+        return _read_output_ohlcv(output_path, filters=[("Ticker", "=", ticker)]).set_index("Date")
+
+    stored_by_ticker = {str(t): g.set_index("Date") for t, g in stored.groupby("Ticker", sort=False)}
+    incoming_by_ticker = {str(t): g.set_index("Date") for t, g in incoming.groupby("Ticker", sort=False)}
+    del stored, incoming
+
+    schema = with_compacted_part_names(pq.read_schema(output_path.as_posix()), [])
+    stamp = pd.Timestamp.now().strftime("%Y%m%d%H%M%S%f")
+    part_path = append_parts_dir(output_path) / f"part-{stamp}.parquet"
+    tmp_path = part_path.with_name(f"{part_path.name}.tmp")
+    writer = OrderedRowGroupWriter(
+        tmp_path,
+        row_group_rows=row_group_rows,
+        compression="zstd",
+        partition_dir=partition_dir,
+        partition_suffix=f"-{stamp}",
+    )
+
+    errors: List[Tuple[str, str]] = []
+    updated = 0
+    tickers = sorted(set(stored_by_ticker) | set(incoming_by_ticker))
+    for pos, ticker in enumerate(tqdm(tickers, desc="Tickers appended", unit="ticker")):
+        fresh = incoming_by_ticker.get(ticker)
+        history = stored_by_ticker.get(ticker)
+        if history is None:
+            history = fresh.iloc[:0]
+        state = states.get(ticker)
+        if state is not None:
+            history = history.loc[history.index >= pd.Timestamp(state["TailStart"])]
+        rows_before = int(state["Rows"]) if state is not None else len(history)
+
+        if fresh is not None and len(history):
+            fresh = fresh.loc[fresh.index > history.index[-1]]
+        if fresh is None or fresh.empty:
+            if state is None and len(history):
+                # Bootstrap the state so the next append can resume instead of reloading.
+                fresh = history.iloc[:0]
+            else:
+                writer.add(pos, None)
+                continue
+
+        try:
+            frame, record = _append_ticker(ticker, history, rows_before, fresh, state, load_full_history)
+        except Exception as exc:
+            errors.append((ticker, f"{type(exc).__name__}: {exc}"))
+            writer.add(pos, None)
+            continue
+        states[ticker] = record
+        if frame.empty:
+            writer.add(pos, None)
+            continue
+        frame = align_to_master_columns(frame, schema.names)
+        writer.add(pos, pa.Table.from_pandas(frame, preserve_index=False).cast(schema))
+        updated += 1
+
+    writer.close()
+    if writer.rows_written:
+        os.replace(tmp_path, part_path)
+    # Written after the part so an interrupted run only forces a full reload next time.
+    save_indicator_state(state_path, states)
+
+    print("\nAppend complete.")
+    print(f"Tickers with new bars: {updated:,}/{len(tickers):,}")
+    if writer.rows_written:
+        print(f"Rows appended: {writer.rows_written:,} -> {part_path}")
+    else:
+        print("Rows appended: 0")
+    pending = len(append_parts(output_path))
+    print(f"Pending append parts: {pending:,} (merge them into {output_path} with --compact)")
+    print(f"State: {state_path}")
+    if partition_dir is not None:
+        print(f"Partition files added under {partition_dir}: {writer.partition_files_written:,}")
     if errors:
         err_preview = "\n".join([f"  - {tk}: {msg}" for tk, msg in errors[:20]])
         print("Error preview (first 20):")
@@ -399,8 +1294,63 @@ def parse_args() -> argparse.Namespace:
         default="stock_data/korean_market_10y_with_indicators.parquet",
         help="Output parquet path.",
     )
-    parser.add_argument("--batch-tickers", type=int, default=120, help="Tickers submitted per batch.")
+    parser.add_argument("--batch-tickers", type=int, default=120, help="Maximum tickers in flight on the pool.")
     parser.add_argument("--max-workers", type=int, default=0, help="0 means auto (cpu_count-1).")
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=float,
+        default=0,
+        help="Target RSS for parent + workers; 0 means 80%% of currently available memory.",
+    )
+    parser.add_argument(
+        "--inflight-mb",
+        type=float,
+        default=0,
+        help="Cap on estimated bytes of submitted-but-unfinished tickers; 0 means half the memory budget.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default="",
+        help="Optional per-ticker result cache keyed by OHLCV slice + study + library versions.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="pandas_ta",
+        help="Indicator engine: pandas_ta study or the vectorized native_indicators engine.",
+    )
+    parser.add_argument(
+        "--native-check-tickers",
+        type=int,
+        default=3,
+        help="With --engine native, compare this many of the longest tickers against pandas_ta first (0 disables).",
+    )
+    parser.add_argument(
+        "--row-group-rows",
+        type=int,
+        default=262_144,
+        help="Target rows per output row group (worker outputs are coalesced in ticker order).",
+    )
+    parser.add_argument(
+        "--partition-dir",
+        type=str,
+        default="",
+        help="Optional directory for an extra Hive-partitioned copy (year=YYYY/ticker=TICKER/part-YYYY.parquet).",
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help=(
+            "Only add bars newer than the existing --output as a part file under <stem>.appends/ "
+            "(native engine, resumes from <output>.state.parquet)."
+        ),
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Merge pending --append part files into --output (one rewrite of it). Alone, no input is read.",
+    )
     parser.add_argument(
         "--sample-tickers",
         type=str,
@@ -414,6 +1364,10 @@ def main() -> None:
     args = parse_args()
     output_path = Path(args.output)
 
+    if args.compact and not args.append:
+        run_compaction(output_path, row_group_rows=args.row_group_rows)
+        return
+
     if args.input:
         raw_df = load_input_dataframe(Path(args.input))
     else:
@@ -421,12 +1375,31 @@ def main() -> None:
         print("No --input provided. Downloading sample data via yfinance...")
         raw_df = download_sample_data_for_testing(sample_tickers, years=10)
 
+    partition_dir = Path(args.partition_dir) if args.partition_dir else None
+    if args.append:
+        run_append_pipeline(
+            raw_df=raw_df,
+            output_path=output_path,
+            row_group_rows=args.row_group_rows,
+            partition_dir=partition_dir,
+        )
+        if args.compact:
+            run_compaction(output_path, row_group_rows=args.row_group_rows)
+        return
+
     max_workers = None if args.max_workers <= 0 else args.max_workers
     run_parallel_pipeline(
         raw_df=raw_df,
         output_path=output_path,
         batch_tickers=args.batch_tickers,
         max_workers=max_workers,
+        row_group_rows=args.row_group_rows,
+        partition_dir=partition_dir,
+        engine=args.engine,
+        native_check_tickers=args.native_check_tickers,
+        memory_budget_mb=args.memory_budget_mb or None,
+        inflight_mb=args.inflight_mb or None,
+        cache_dir=Path(args.cache_dir) if args.cache_dir else None,
     )
 
 
@@ -4,8 +4,11 @@ One-time migration script: PostgreSQL -> partitioned Parquet on Cloudflare R2.
 This avoids a database server at query time by exporting to data-lake files:
   s3://<bucket>/<prefix>/year=<YYYY>/ticker=<TICKER>/part-*.parquet
 
+and then (re)builds the dataset manifest (<prefix>/_manifest/manifest.parquet) that
+readers use to resolve files without listing the bucket.
+
 Requirements:
-  pip install duckdb
+  pip install duckdb boto3 pyarrow pandas
 
 Environment:
   PG_HOST, PG_PORT, PG_DATABASE, PG_USER, PG_PASSWORD
@@ -22,8 +25,11 @@ from __future__ import annotations
 import os
 import sys
 
+import boto3
 import duckdb
 
+from r2_manifest import list_objects, load_manifest, save_manifest, sync_manifest
+
 
 def required_env(name: str) -> str:
     value = os.getenv(name)
@@ -100,13 +106,27 @@ def migrate() -> None:
         PARTITION_BY (year, ticker),
         ROW_GROUP_SIZE 200000,
         COMPRESSION ZSTD,
-        PER_THREAD_OUTPUT 1
+        PER_THREAD_OUTPUT 1,
+        FILENAME_PATTERN 'part-{{uuid}}'
     )
     """
     con.execute(export_sql)
     con.close()
     print(f"Migration complete: {destination}/year=*/ticker=*")
 
+    s3 = boto3.client(
+        "s3",
+        endpoint_url=required_env("R2_ENDPOINT"),
+        aws_access_key_id=required_env("R2_ACCESS_KEY_ID"),
+        aws_secret_access_key=required_env("R2_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("R2_REGION", "auto"),
+    )
+    manifest, synced = sync_manifest(
+        s3, bucket, prefix, load_manifest(s3, bucket, prefix), list_objects(s3, bucket, prefix)
+    )
+    save_manifest(s3, bucket, prefix, manifest)
+    print(f"Manifest updated: objects={len(manifest)} added={synced['added']} removed={synced['removed']}")
+
 
 if __name__ == "__main__":
     try:
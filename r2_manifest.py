@@ -0,0 +1,317 @@
+"""
+Dataset manifest for the Hive-partitioned Parquet layout on R2.
+
+One object, <prefix>/_manifest/manifest.parquet, lists every live data object:
+  key, ticker, year, rows, min_date, max_date, size, etag
+
+Writers publish their data objects first and the manifest afterwards, and delete
+replaced objects only after that, so anything resolving files through the manifest
+sees either the old or the new set of objects, never both.
+
+The manifest has a single writer at a time (the daily update, the compactor or the
+initial migration). Concurrent upload workers record into a ManifestJournal that is
+committed in batches during the run and once more at its end, so a crash only leaves the
+objects of the last, uncommitted batch outside the manifest.
+
+Every manifest save also rewrites <prefix>/_manifest/watermarks.parquet (ticker,
+max_date, rows), so the latest stored bar per ticker is one small GET away.
+verify_r2_watermarks.py checks it against the bucket and rebuilds it on drift.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+MANIFEST_DIR = "_manifest"
+MANIFEST_NAME = "manifest.parquet"
+
+MANIFEST_SCHEMA = pa.schema(
+    [
+        ("key", pa.string()),
+        ("ticker", pa.string()),
+        ("year", pa.int32()),
+        ("rows", pa.int64()),
+        ("min_date", pa.timestamp("us")),
+        ("max_date", pa.timestamp("us")),
+        ("size", pa.int64()),
+        ("etag", pa.string()),
+    ]
+)
+MANIFEST_COLUMNS = MANIFEST_SCHEMA.names
+
+WATERMARK_NAME = "watermarks.parquet"
+WATERMARK_SCHEMA = pa.schema(
+    [
+        ("ticker", pa.string()),
+        ("max_date", pa.timestamp("us")),
+        ("rows", pa.int64()),
+    ]
+)
+
+_PARTITION_RE = re.compile(r"year=(\d{4})/ticker=([^/]+)/[^/]+\.parquet$")
+
+# One ranged GET usually covers the whole footer of our small daily/yearly objects.
+_FOOTER_PROBE_BYTES = 64 * 1024
+
+
+def manifest_key(prefix: str) -> str:
+    return f"{prefix.strip('/')}/{MANIFEST_DIR}/{MANIFEST_NAME}"
+
+
+def watermark_key(prefix: str) -> str:
+    return f"{prefix.strip('/')}/{MANIFEST_DIR}/{WATERMARK_NAME}"
+
+
+def parse_partition(key: str) -> Optional[Tuple[int, str]]:
+    """(year, ticker) from a .../year=YYYY/ticker=T/<file>.parquet key, else None."""
+    match = _PARTITION_RE.search(key)
+    if not match:
+        return None
+    return int(match.group(1)), match.group(2)
+
+
+def list_objects(s3, bucket: str, prefix: str) -> List[dict]:
+    """Every data object under prefix as {Key, Size, ETag, LastModified} (manifest excluded)."""
+    objects: List[dict] = []
+    token = None
+    root = prefix.strip("/") + "/"
+    while True:
+        kwargs = {"Bucket": bucket, "Prefix": root}
+        if token:
+            kwargs["ContinuationToken"] = token
+        resp = s3.list_objects_v2(**kwargs)
+        for obj in resp.get("Contents", []):
+            if parse_partition(obj["Key"]) is None:
+                continue
+            objects.append(
+                {
+                    "Key": obj["Key"],
+                    "Size": int(obj["Size"]),
+                    "ETag": str(obj.get("ETag", "")).strip('"'),
+                    "LastModified": obj.get("LastModified"),
+                }
+            )
+        if not resp.get("IsTruncated"):
+            break
+        token = resp.get("NextContinuationToken")
+    return objects
+
+
+def _date_range(metadata: pq.FileMetaData) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+    if "date" not in names:
+        return None, None
+    idx = names.index("date")
+    lows: List[pd.Timestamp] = []
+    highs: List[pd.Timestamp] = []
+    for rg in range(metadata.num_row_groups):
+        stats = metadata.row_group(rg).column(idx).statistics
+        if stats is None or not stats.has_min_max:
+            return None, None
+        lows.append(pd.Timestamp(stats.min))
+        highs.append(pd.Timestamp(stats.max))
+    if not lows:
+        return None, None
+    return min(lows), max(highs)
+
+
+def manifest_entry(
+    key: str,
+    metadata: pq.FileMetaData,
+    size: int,
+    etag: str = "",
+    date_range: Optional[Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]] = None,
+) -> dict:
+    year, ticker = parse_partition(key) or (None, None)
+    min_date, max_date = date_range if date_range is not None else _date_range(metadata)
+    return {
+        "key": key,
+        "ticker": ticker,
+        "year": year,
+        "rows": int(metadata.num_rows),
+        "min_date": min_date,
+        "max_date": max_date,
+        "size": int(size),
+        "etag": etag,
+    }
+
+
+def describe_local_file(key: str, local_path: Path, etag: str = "") -> dict:
+    """Manifest entry for a file a writer is about to upload (or just uploaded) as `key`."""
+    if not etag:
+        # Single-part uploads get the content MD5 as ETag on S3 and R2.
+        etag = hashlib.md5(local_path.read_bytes()).hexdigest()
+    return manifest_entry(key, pq.read_metadata(local_path.as_posix()), local_path.stat().st_size, etag)
+
+
+def describe_object(s3, bucket: str, key: str, size: int, etag: str = "") -> dict:
+    """Manifest entry for an existing object, reading only its footer via ranged GETs."""
+    probe = min(size, _FOOTER_PROBE_BYTES)
+    tail = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=-{probe}")["Body"].read()
+    footer_len = struct.unpack("<I", tail[-8:-4])[0]
+    if footer_len + 8 > len(tail):
+        tail = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=-{footer_len + 8}")["Body"].read()
+    metadata = pq.read_metadata(pa.BufferReader(tail))
+
+    date_range = _date_range(metadata)
+    if date_range[0] is None and "date" in metadata.schema.names:
+        # No row-group statistics (old writers): read the date column itself.
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+        dates = pq.read_table(pa.BufferReader(body), columns=["date"]).column("date").to_pandas()
+        date_range = (dates.min(), dates.max()) if len(dates) else (None, None)
+    return manifest_entry(key, metadata, size, etag, date_range=date_range)
+
+
+def empty_manifest() -> pd.DataFrame:
+    return MANIFEST_SCHEMA.empty_table().to_pandas()
+
+
+def _get_parquet(s3, bucket: str, key: str) -> Optional[pd.DataFrame]:
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+    except Exception as exc:
+        if getattr(exc, "response", {}).get("Error", {}).get("Code") in {"404", "NoSuchKey"}:
+            return None
+        raise
+    return pq.read_table(pa.BufferReader(body)).to_pandas()
+
+
+def _put_parquet(s3, bucket: str, key: str, table: pa.Table) -> None:
+    buf = io.BytesIO()
+    pq.write_table(table, buf, compression="zstd")
+    s3.put_object(Bucket=bucket, Key=key, Body=buf.getvalue())
+
+
+def load_manifest(s3, bucket: str, prefix: str) -> Optional[pd.DataFrame]:
+    """The current manifest, or None when the dataset has none yet."""
+    return _get_parquet(s3, bucket, manifest_key(prefix))
+
+
+def watermarks_from_manifest(manifest: pd.DataFrame) -> pd.DataFrame:
+    """Per-ticker max_date and row count over the manifest's objects."""
+    live = manifest.dropna(subset=["ticker"])
+    out = live.groupby("ticker", sort=True).agg(max_date=("max_date", "max"), rows=("rows", "sum"))
+    return out.reset_index().reindex(columns=WATERMARK_SCHEMA.names)
+
+
+def load_watermarks(s3, bucket: str, prefix: str) -> Optional[pd.DataFrame]:
+    """The watermark table (ticker, max_date, rows), or None when it was never written."""
+    return _get_parquet(s3, bucket, watermark_key(prefix))
+
+
+def save_watermarks(s3, bucket: str, prefix: str, watermarks: pd.DataFrame) -> None:
+    table = pa.Table.from_pandas(watermarks, schema=WATERMARK_SCHEMA, preserve_index=False)
+    _put_parquet(s3, bucket, watermark_key(prefix), table)
+
+
+def save_manifest(s3, bucket: str, prefix: str, manifest: pd.DataFrame) -> None:
+    """Publish the manifest, then the watermarks derived from it."""
+    frame = manifest.reindex(columns=MANIFEST_COLUMNS).sort_values(["year", "ticker", "key"])
+    table = pa.Table.from_pandas(frame, schema=MANIFEST_SCHEMA, preserve_index=False)
+    _put_parquet(s3, bucket, manifest_key(prefix), table)
+    save_watermarks(s3, bucket, prefix, watermarks_from_manifest(frame))
+
+
+def apply_manifest_changes(
+    manifest: Optional[pd.DataFrame],
+    added: Sequence[dict] = (),
+    removed: Iterable[str] = (),
+) -> pd.DataFrame:
+    """Drop `removed` keys and upsert `added` entries (by key)."""
+    base = manifest if manifest is not None else empty_manifest()
+    drop = set(removed) | {entry["key"] for entry in added}
+    kept = base[~base["key"].isin(drop)]
+    if not added:
+        return kept.reset_index(drop=True)
+    return pd.concat([kept, pd.DataFrame(list(added), columns=MANIFEST_COLUMNS)], ignore_index=True)
+
+
+def sync_manifest(
+    s3,
+    bucket: str,
+    prefix: str,
+    manifest: Optional[pd.DataFrame],
+    objects: Sequence[dict],
+    workers: int = 16,
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Reconcile a manifest with a bucket listing: describe objects it is missing (or whose
+    ETag changed) and drop entries whose objects are gone. Builds it from scratch when
+    `manifest` is None.
+    """
+    base = manifest if manifest is not None else empty_manifest()
+    known = dict(zip(base["key"], base["etag"].fillna("")))
+    listed = {obj["Key"] for obj in objects}
+    missing = [obj for obj in objects if known.get(obj["Key"]) != obj["ETag"]]
+    stale = [key for key in known if key not in listed]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        added = list(ex.map(lambda o: describe_object(s3, bucket, o["Key"], o["Size"], o["ETag"]), missing))
+    return apply_manifest_changes(base, added, stale), {"added": len(added), "removed": len(stale)}
+
+
+def delete_keys(s3, bucket: str, keys: Sequence[str]) -> int:
+    keys = list(keys)
+    for i in range(0, len(keys), 1000):
+        chunk = keys[i : i + 1000]
+        s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True})
+    return len(keys)
+
+
+class ManifestJournal:
+    """
+    Thread-safe record of objects written and replaced during one writer run.
+
+    Replaced objects are only deleted by commit(), after the manifest that drops them has
+    been published. commit() may be called repeatedly during a run; calls are serialised
+    so two batches never read-modify-write the manifest at the same time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self.added: List[dict] = []
+        self.replaced: List[str] = []
+
+    def record_upload(self, entry: dict) -> None:
+        with self._lock:
+            self.added.append(entry)
+
+    def record_replaced(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self.replaced.extend(keys)
+
+    def commit(self, s3, bucket: str, prefix: str, workers: int = 16) -> Dict[str, int]:
+        with self._commit_lock:
+            return self._commit(s3, bucket, prefix, workers)
+
+    def _commit(self, s3, bucket: str, prefix: str, workers: int) -> Dict[str, int]:
+        with self._lock:
+            added, replaced = list(self.added), list(self.replaced)
+            self.added, self.replaced = [], []
+        if not added and not replaced:
+            return {"added": 0, "removed": 0, "deleted": 0}
+
+        manifest = load_manifest(s3, bucket, prefix)
+        if manifest is None:
+            # First manifest for this dataset: cover everything already in the bucket.
+            manifest, _ = sync_manifest(s3, bucket, prefix, None, list_objects(s3, bucket, prefix), workers)
+        new_keys = {entry["key"] for entry in added}
+        stale = [key for key in replaced if key not in new_keys]
+        save_manifest(s3, bucket, prefix, apply_manifest_changes(manifest, added, stale))
+        deleted = delete_keys(s3, bucket, stale)
+        return {"added": len(added), "removed": len(stale), "deleted": deleted}
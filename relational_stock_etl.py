@@ -5,8 +5,14 @@
 - 필수 컬럼: symbol, trade_date, OHLCV, adj_close
 - 파생 컬럼: daily_return, rsi_14, sma_20, sma_60, sma_120
 - 업서트: (symbol, trade_date) 충돌 시 update
-- 배치 처리: execute_values 기반 bulk upsert
-- 검증 레이어: NaN/누락 컬럼/API 실패 처리
+- 배치 처리: execute_values 기반 bulk upsert (--load-method values)
+  또는 COPY -> 임시 staging 테이블 -> insert ... on conflict (--load-method copy)
+- 검증 레이어: NaN/누락 컬럼/API 실패 처리 (컬럼 단위 벡터 연산)
+- 증분 모드: 심볼별 max(trade_date)를 group by 한 번으로 조회
+- 다운로드: 같은 시작일 심볼을 --download-chunk 개씩 yfinance 다중 티커 download(threads=True)로 묶고,
+  다운로드 스레드 하나가 --prefetch-chunks 개 청크를 미리 받아 DB 쓰기와 겹친다
+  (yf.download는 모듈 전역 상태를 쓰므로 호출은 직렬화)
+- 트랜잭션: --commit-every 심볼마다 commit, 심볼별 savepoint로 실패 심볼만 롤백
 
 사전 준비:
 1) relational_stock_schema.sql 적용
@@ -19,12 +25,16 @@
 from __future__ import annotations
 
 import argparse
+import io
 import logging
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
 from psycopg2 import connect
@@ -37,7 +47,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger("relational_stock_etl")
 
-Q4 = Decimal("0.0001")
+PRICE_COLUMNS = ["open", "high", "low", "close", "adj_close"]
+METRIC_COLUMNS = ["daily_return", "rsi_14", "sma_20", "sma_60", "sma_120"]
+ROW_COLUMNS = ["symbol", "trade_date", *PRICE_COLUMNS, "volume", *METRIC_COLUMNS]
+# execute_values 행 템플릿: ROW_COLUMNS 값 + updated_at = now()
+ROW_TEMPLATE = "(" + ", ".join(["%s"] * len(ROW_COLUMNS)) + ", now())"
+
+UPSERT_SET_SQL = """
+      open = excluded.open,
+      high = excluded.high,
+      low = excluded.low,
+      close = excluded.close,
+      adj_close = excluded.adj_close,
+      volume = excluded.volume,
+      daily_return = excluded.daily_return,
+      rsi_14 = excluded.rsi_14,
+      sma_20 = excluded.sma_20,
+      sma_60 = excluded.sma_60,
+      sma_120 = excluded.sma_120,
+      updated_at = now()
+"""
 
 
 def env_required(name: str) -> str:
@@ -67,35 +96,67 @@ def rsi(series: pd.Series, period: int = 14) -> pd.Series:
     return 100 - (100 / (1 + rs))
 
 
-def to_decimal_4(value: object) -> Optional[Decimal]:
-    if value is None or pd.isna(value):
-        return None
-    try:
-        return Decimal(str(value)).quantize(Q4, rounding=ROUND_HALF_UP)
-    except (InvalidOperation, ValueError, TypeError):
-        return None
+# yf.download는 호출마다 모듈 전역 결과(shared._DFS/_ERRORS)를 초기화하므로 동시 호출 금지.
+# 병렬성은 호출 내부(threads=True)에 맡긴다.
+_YF_DOWNLOAD_LOCK = threading.Lock()
+
+
+def download_history(
+    symbols: Sequence[str], start_date: date, end_date: date
+) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    yfinance download 한 번으로 여러 심볼 수집 -> 심볼별 원본 프레임.
+    API 오류, 결과에서 빠졌거나 yfinance가 오류로 보고한 심볼은 None(실패)이다.
+    """
+    with _YF_DOWNLOAD_LOCK:
+        try:
+            df = yf.download(
+                list(symbols),
+                start=start_date.isoformat(),
+                end=(end_date + timedelta(days=1)).isoformat(),
+                auto_adjust=False,
+                progress=False,
+                group_by="ticker",
+                threads=True,
+            )
+        except Exception as exc:
+            logger.error("API 오류 | %s | %s", ",".join(symbols), exc)
+            return {symbol: None for symbol in symbols}
+        errors = dict(getattr(getattr(yf, "shared", None), "_ERRORS", None) or {})
+
+    out: Dict[str, Optional[pd.DataFrame]] = {}
+    for symbol in symbols:
+        if symbol in errors:
+            logger.error("API 오류 | %s | %s", symbol, errors[symbol])
+            out[symbol] = None
+            continue
+        if not isinstance(df.columns, pd.MultiIndex):
+            sub = df if len(symbols) == 1 or df.empty else None
+        elif symbol in df.columns.get_level_values(0):
+            sub = df[symbol]
+        elif symbol in df.columns.get_level_values(-1):
+            sub = df.xs(symbol, axis=1, level=-1)
+        else:
+            sub = None
+        if sub is None:
+            logger.error("다운로드 결과 누락 | %s", symbol)
+            out[symbol] = None
+            continue
+        # 다중 티커 결과는 날짜 합집합이므로 해당 심볼 값이 없는 행 제거
+        out[symbol] = sub.dropna(how="all")
+    return out
 
 
 def fetch_history(symbol: str, start_date: date, end_date: date) -> pd.DataFrame:
-    try:
-        df = yf.download(
-            symbol,
-            start=start_date.isoformat(),
-            end=(end_date + timedelta(days=1)).isoformat(),
-            auto_adjust=False,
-            progress=False,
-        )
-    except Exception as exc:
-        logger.error("API 오류 | %s | %s", symbol, exc)
-        return pd.DataFrame()
+    raw = download_history([symbol], start_date, end_date)[symbol]
+    return pd.DataFrame() if raw is None else prepare_history(symbol, raw)
+
 
+def prepare_history(symbol: str, df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         logger.warning("데이터 없음 | %s", symbol)
         return df
 
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = [c[0] for c in df.columns]
-
     df = df.reset_index().rename(
         columns={
             "Date": "trade_date",
@@ -133,50 +194,44 @@ def fetch_history(symbol: str, start_date: date, end_date: date) -> pd.DataFrame
     return df
 
 
-def to_rows(symbol: str, df: pd.DataFrame) -> List[Tuple]:
-    rows: List[Tuple] = []
-    for _, r in df.iterrows():
-        open_v = to_decimal_4(r["open"])
-        high_v = to_decimal_4(r["high"])
-        low_v = to_decimal_4(r["low"])
-        close_v = to_decimal_4(r["close"])
-        adj_close_v = to_decimal_4(r["adj_close"])
-
-        # Validation layer: 가격 필드 파싱 실패 시 skip
-        if None in (open_v, high_v, low_v, close_v, adj_close_v):
-            continue
+def clean_frame(symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    업서트 컬럼(ROW_COLUMNS 순서)으로 정리한 프레임.
+    Validation layer: 가격 필드가 숫자가 아니거나 NaN/inf인 행은 제외, 지표 inf는 NaN(null) 처리.
+    반올림은 하지 않는다: values/copy 두 경로 모두 float의 최단 10진 표현(repr)을 보내고
+    numeric(18,4) 캐스팅이 반올림(half away from zero)한다.
+    기존 Decimal(str(x)).quantize(0.0001, ROUND_HALF_UP)와 같은 결과 (예: 10.12345 -> 10.1235, 5e-05 -> 0.0001).
+    """
+    out = pd.DataFrame({"symbol": symbol, "trade_date": df["trade_date"].to_numpy()}, index=df.index)
+    for col in PRICE_COLUMNS + METRIC_COLUMNS:
+        out[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    out[METRIC_COLUMNS] = out[METRIC_COLUMNS].where(np.isfinite(out[METRIC_COLUMNS]))
+    out = out[np.isfinite(out[PRICE_COLUMNS]).all(axis=1)]
+    out["volume"] = pd.to_numeric(df["volume"], errors="coerce").reindex(out.index).fillna(0).astype("int64")
+    return out[ROW_COLUMNS].reset_index(drop=True)
 
-        rows.append(
-            (
-                symbol,
-                r["trade_date"],
-                open_v,
-                high_v,
-                low_v,
-                close_v,
-                adj_close_v,
-                int(r["volume"]) if not pd.isna(r["volume"]) else 0,
-                to_decimal_4(r["daily_return"]),
-                to_decimal_4(r["rsi_14"]),
-                to_decimal_4(r["sma_20"]),
-                to_decimal_4(r["sma_60"]),
-                to_decimal_4(r["sma_120"]),
-            )
-        )
-    return rows
 
+def frame_to_rows(frame: pd.DataFrame) -> List[Tuple]:
+    # NaN -> None 을 컬럼 단위로 변환 후 itertuples로 튜플 생성
+    frame = frame.astype(object).where(frame.notna(), None)
+    return list(frame.itertuples(index=False, name=None))
 
-def last_trade_date(cur, symbol: str) -> Optional[date]:
+
+def to_rows(symbol: str, df: pd.DataFrame) -> List[Tuple]:
+    return frame_to_rows(clean_frame(symbol, df))
+
+
+def last_trade_dates(cur, symbols: Sequence[str]) -> Dict[str, date]:
     cur.execute(
         """
-        select max(trade_date)
+        select symbol, max(trade_date)
         from public.stock_daily_prices
-        where symbol = %s
+        where symbol = any(%s)
+        group by symbol
         """,
-        (symbol,),
+        (list(symbols),),
     )
-    value = cur.fetchone()[0]
-    return value
+    return dict(cur.fetchall())
 
 
 def upsert_batch(cur, rows: Sequence[Tuple], batch_size: int) -> int:
@@ -190,70 +245,156 @@ def upsert_batch(cur, rows: Sequence[Tuple], batch_size: int) -> int:
     )
     values %s
     on conflict (symbol, trade_date) do update set
-      open = excluded.open,
-      high = excluded.high,
-      low = excluded.low,
-      close = excluded.close,
-      adj_close = excluded.adj_close,
-      volume = excluded.volume,
-      daily_return = excluded.daily_return,
-      rsi_14 = excluded.rsi_14,
-      sma_20 = excluded.sma_20,
-      sma_60 = excluded.sma_60,
-      sma_120 = excluded.sma_120,
-      updated_at = now()
-    """
+    """ + UPSERT_SET_SQL
 
     total = 0
     for i in range(0, len(rows), batch_size):
         chunk = rows[i : i + batch_size]
-        execute_values(cur, sql, chunk, page_size=batch_size)
+        execute_values(cur, sql, chunk, template=ROW_TEMPLATE, page_size=batch_size)
         total += len(chunk)
     return total
 
 
+def copy_upsert(cur, frame: pd.DataFrame) -> int:
+    """
+    COPY(csv)로 세션 임시 테이블에 적재 후 insert ... on conflict 한 번으로 반영.
+    가격/지표 반올림은 staging 테이블의 numeric(18,4) 캐스팅이 처리한다 (clean_frame 참고).
+    """
+    if frame.empty:
+        return 0
+    cols = ", ".join(ROW_COLUMNS)
+    cur.execute(
+        f"""
+        create temp table if not exists stock_daily_prices_staging
+        as select {cols} from public.stock_daily_prices with no data
+        """
+    )
+    cur.execute("truncate stock_daily_prices_staging")
+
+    buf = io.StringIO()
+    frame[ROW_COLUMNS].to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    cur.copy_expert(f"copy stock_daily_prices_staging ({cols}) from stdin with (format csv)", buf)
+
+    cur.execute(
+        f"""
+        insert into public.stock_daily_prices ({cols}, updated_at)
+        select {cols}, now() from stock_daily_prices_staging
+        on conflict (symbol, trade_date) do update set
+        """
+        + UPSERT_SET_SQL
+    )
+    return cur.rowcount
+
+
+def write_symbol(cur, symbol: str, raw: pd.DataFrame, batch_size: int, load_method: str) -> int:
+    df = prepare_history(symbol, raw)
+    if df.empty:
+        return 0
+
+    frame = clean_frame(symbol, df)
+    if frame.empty:
+        logger.warning("검증 후 업서트 대상 없음 | %s", symbol)
+        return 0
+
+    if load_method == "copy":
+        return copy_upsert(cur, frame)
+    return upsert_batch(cur, frame_to_rows(frame), batch_size=batch_size)
+
+
+def iter_downloads(
+    chunks: Sequence[Tuple[date, List[str]]],
+    end_date: date,
+    prefetch: int,
+) -> Iterator[Dict[str, Optional[pd.DataFrame]]]:
+    """다운로드 스레드 하나로 청크를 순서대로 받으며, 최대 prefetch + 1개 청크만 미리 받아 둔다."""
+    prefetch = max(1, prefetch)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        pending: deque = deque()
+        for start_date, chunk in chunks:
+            pending.append(ex.submit(download_history, chunk, start_date, end_date))
+            if len(pending) > prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
 def run_etl(
     symbols: Iterable[str],
     mode: str,
     full_start_date: date,
     end_date: date,
     batch_size: int,
+    load_method: str = "values",
+    download_chunk: int = 50,
+    prefetch_chunks: int = 2,
+    commit_every: int = 50,
 ) -> Dict[str, int]:
+    """
+    download_chunk=commit_every=1 이면 심볼별 다운로드/commit(기존 동작).
+    commit_every > 1 이면 심볼마다 savepoint를 두어 실패 심볼만 롤백한다.
+    다운로드 실패 심볼(API 오류/결과 누락)은 0 rows가 아니라 실패로 집계한다.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
     results: Dict[str, int] = {}
+    failed: List[str] = []
     with db_connect() as conn:
         with conn.cursor() as cur:
-            for raw in symbols:
-                symbol = raw.strip().upper()
-                if not symbol:
-                    continue
-
-                if mode == "incremental":
-                    max_dt = last_trade_date(cur, symbol)
-                    start_date = (max_dt + timedelta(days=1)) if max_dt else full_start_date
-                else:
-                    start_date = full_start_date
+            watermarks = last_trade_dates(cur, symbols) if mode == "incremental" else {}
 
+            by_start: Dict[date, List[str]] = {}
+            for symbol in symbols:
+                max_dt = watermarks.get(symbol)
+                start_date = (max_dt + timedelta(days=1)) if max_dt else full_start_date
                 if start_date > end_date:
                     results[symbol] = 0
                     logger.info("skip | %s | 최신 데이터", symbol)
                     continue
-
-                logger.info("fetch | %s | %s -> %s", symbol, start_date, end_date)
-                df = fetch_history(symbol, start_date, end_date)
-                if df.empty:
-                    results[symbol] = 0
-                    continue
-
-                rows = to_rows(symbol, df)
-                if not rows:
-                    results[symbol] = 0
-                    logger.warning("검증 후 업서트 대상 없음 | %s", symbol)
-                    continue
-
-                written = upsert_batch(cur, rows, batch_size=batch_size)
-                conn.commit()
-                results[symbol] = written
-                logger.info("upsert 완료 | %s | %s rows", symbol, written)
+                by_start.setdefault(start_date, []).append(symbol)
+
+            step = max(1, download_chunk)
+            chunks = [
+                (start_date, group[i : i + step])
+                for start_date, group in sorted(by_start.items())
+                for i in range(0, len(group), step)
+            ]
+
+            use_savepoint = commit_every > 1
+            uncommitted = 0
+            for (start_date, chunk), frames in zip(chunks, iter_downloads(chunks, end_date, prefetch_chunks)):
+                logger.info("fetch | %s | %s -> %s", ",".join(chunk), start_date, end_date)
+                for symbol in chunk:
+                    if frames[symbol] is None:
+                        results[symbol] = 0
+                        failed.append(symbol)
+                        continue
+                    if use_savepoint:
+                        cur.execute("savepoint etl_symbol")
+                    try:
+                        written = write_symbol(cur, symbol, frames[symbol], batch_size, load_method)
+                    except Exception as exc:
+                        if use_savepoint:
+                            cur.execute("rollback to savepoint etl_symbol")
+                        else:
+                            conn.rollback()
+                        results[symbol] = 0
+                        failed.append(symbol)
+                        logger.error("upsert 실패 | %s | %s", symbol, exc)
+                        continue
+                    if use_savepoint:
+                        cur.execute("release savepoint etl_symbol")
+
+                    results[symbol] = written
+                    if written:
+                        logger.info("upsert 완료 | %s | %s rows", symbol, written)
+                    uncommitted += 1
+                    if uncommitted >= max(1, commit_every):
+                        conn.commit()
+                        uncommitted = 0
+            conn.commit()
+
+    if failed:
+        logger.warning("다운로드/upsert 실패 심볼 %s개 | %s", len(failed), ",".join(failed[:20]))
     return results
 
 
@@ -286,6 +427,30 @@ def parse_args() -> argparse.Namespace:
         default=int(os.getenv("VS_BATCH_SIZE", "1000")),
         help="업서트 배치 크기",
     )
+    parser.add_argument(
+        "--load-method",
+        choices=["values", "copy"],
+        default=os.getenv("VS_LOAD_METHOD", "values"),
+        help="values: execute_values 업서트 / copy: COPY + staging 테이블 업서트",
+    )
+    parser.add_argument(
+        "--download-chunk",
+        type=int,
+        default=int(os.getenv("VS_DOWNLOAD_CHUNK", "50")),
+        help="yfinance download 한 번에 묶을 심볼 수",
+    )
+    parser.add_argument(
+        "--prefetch-chunks",
+        type=int,
+        default=int(os.getenv("VS_PREFETCH_CHUNKS", "2")),
+        help="DB 쓰기 중 미리 받아 둘 다운로드 청크 수",
+    )
+    parser.add_argument(
+        "--commit-every",
+        type=int,
+        default=int(os.getenv("VS_COMMIT_EVERY", "50")),
+        help="commit 간격(심볼 수)",
+    )
     return parser.parse_args()
 
 
@@ -300,6 +465,10 @@ def main() -> None:
         full_start_date=start_date,
         end_date=end_date,
         batch_size=args.batch_size,
+        load_method=args.load_method,
+        download_chunk=args.download_chunk,
+        prefetch_chunks=args.prefetch_chunks,
+        commit_every=args.commit_every,
     )
     total = sum(results.values())
     logger.info("ETL 완료 | symbols=%s | total_rows=%s", len(results), total)
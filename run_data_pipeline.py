@@ -19,7 +19,7 @@ from typing import Dict, List
 from dotenv import load_dotenv
 
 from daily_eod_update import resolve_tickers, run_daily_update
-from duckdb_r2_analytics import StockDataAnalytic
+from duckdb_r2_analytics import MATERIALIZED_TABLES, StockDataAnalytic
 from postgres_to_r2_parquet import migrate
 
 
@@ -80,13 +80,24 @@ def _split_sql_statements(script: str) -> List[str]:
     return statements
 
 
-def run_analytics(query_name: str = "high_low_52_week", limit: int = 20) -> None:
+def run_analytics(query_name: str = "high_low_52_week", limit: int = 20, db_path: str = "") -> None:
     print("[3/3] 분석 실행 시작")
-    engine = StockDataAnalytic()
+    engine = StockDataAnalytic(db_path=db_path or ":memory:")
     try:
-        templates = engine.sql_templates(engine.data_glob)
-        if query_name in templates:
-            df = engine.to_pandas(templates[query_name])
+        if db_path and query_name in MATERIALIZED_TABLES:
+            refreshed = engine.refresh_materialized()
+            print(
+                f"[3/3] 머티리얼라이즈드 테이블 갱신 | 추가 행 {refreshed['rows_added']} "
+                f"| 보관 행 {refreshed['history_rows']}"
+            )
+            df = engine.materialized(query_name)
+            print(f"[3/3] 머티리얼라이즈드 쿼리 결과 상위 {limit}건")
+            print(df.head(limit).to_string(index=False))
+            return
+
+        registry = engine.query_registry()
+        if query_name in registry:
+            df = registry.run(query_name)
             print(f"[3/3] 템플릿 쿼리 결과 상위 {limit}건")
             print(df.head(limit).to_string(index=False))
             return
@@ -109,7 +120,7 @@ def run_analytics(query_name: str = "high_low_52_week", limit: int = 20) -> None
                 print("[3/3] 파일 기반 SQL 실행 완료 (조회 결과 없음)")
             return
 
-        available = ", ".join(sorted(list(templates.keys()) + ["from_file"]))
+        available = ", ".join(sorted(registry.names() + ["from_file"]))
         raise RuntimeError(f"지원하지 않는 analytics query: {query_name} | available: {available}")
     finally:
         engine.close()
@@ -125,6 +136,11 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--tickers", default=os.getenv("VS_TICKERS", "AAPL,MSFT,NVDA,AMZN,GOOGL"))
     parser.add_argument("--analytics-query", default="high_low_52_week")
     parser.add_argument("--analytics-limit", type=int, default=20)
+    parser.add_argument(
+        "--db-path",
+        default=os.getenv("R2_DUCKDB_PATH", ""),
+        help="persistent DuckDB file; materialized analytics are refreshed incrementally there",
+    )
     return parser.parse_args()
 
 
@@ -146,16 +162,16 @@ def main() -> None:
     if args.mode == "all":
         run_initial_load()
         run_incremental_update(tickers)
-        run_analytics(query_name=args.analytics_query, limit=args.analytics_limit)
+        run_analytics(query_name=args.analytics_query, limit=args.analytics_limit, db_path=args.db_path)
     elif args.mode == "serverless":
         run_incremental_update(tickers)
-        run_analytics(query_name=args.analytics_query, limit=args.analytics_limit)
+        run_analytics(query_name=args.analytics_query, limit=args.analytics_limit, db_path=args.db_path)
     elif args.mode == "initial_load":
         run_initial_load()
     elif args.mode == "daily_update":
         run_incremental_update(tickers)
     elif args.mode == "analytics":
-        run_analytics(query_name=args.analytics_query, limit=args.analytics_limit)
+        run_analytics(query_name=args.analytics_query, limit=args.analytics_limit, db_path=args.db_path)
     else:
         raise RuntimeError(f"알 수 없는 mode: {args.mode}")
 
@@ -94,6 +94,15 @@ def parse_args() -> argparse.Namespace:
         default=int(os.getenv("VS_BATCH_SIZE", "1000")),
         help="업서트 배치 크기",
     )
+    parser.add_argument(
+        "--load-method",
+        choices=["values", "copy"],
+        default=os.getenv("VS_LOAD_METHOD", "values"),
+        help="values: execute_values 업서트 / copy: COPY + staging 테이블 업서트",
+    )
+    parser.add_argument("--download-chunk", type=int, default=int(os.getenv("VS_DOWNLOAD_CHUNK", "50")))
+    parser.add_argument("--prefetch-chunks", type=int, default=int(os.getenv("VS_PREFETCH_CHUNKS", "2")))
+    parser.add_argument("--commit-every", type=int, default=int(os.getenv("VS_COMMIT_EVERY", "50")))
     return parser.parse_args()
 
 
@@ -119,6 +128,10 @@ def main() -> None:
             full_start_date=start_date,
             end_date=end_date,
             batch_size=args.batch_size,
+            load_method=args.load_method,
+            download_chunk=args.download_chunk,
+            prefetch_chunks=args.prefetch_chunks,
+            commit_every=args.commit_every,
         )
         print("[완료] Full Load 완료")
         return
@@ -130,6 +143,10 @@ def main() -> None:
             full_start_date=start_date,
             end_date=end_date,
             batch_size=args.batch_size,
+            load_method=args.load_method,
+            download_chunk=args.download_chunk,
+            prefetch_chunks=args.prefetch_chunks,
+            commit_every=args.commit_every,
         )
         print("[완료] Incremental Load 완료")
         return
@@ -0,0 +1,136 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from compact_r2_dataset import compact_dataset
+from r2_manifest import list_objects, load_manifest, manifest_key
+
+
+BUCKET = "bkt"
+PREFIX = "market_data"
+
+
+class RecordingS3:
+    """Passes calls through to the client and records manifest writes and deletes in order."""
+
+    def __init__(self, s3):
+        self._s3 = s3
+        self.calls = []
+
+    def __getattr__(self, name):
+        return getattr(self._s3, name)
+
+    def put_object(self, **kwargs):
+        if kwargs["Key"] == manifest_key(PREFIX):
+            self.calls.append(("manifest", None))
+        return self._s3.put_object(**kwargs)
+
+    def delete_objects(self, **kwargs):
+        self.calls.append(("delete", sorted(o["Key"] for o in kwargs["Delete"]["Objects"])))
+        return self._s3.delete_objects(**kwargs)
+
+
+def put_bars(s3, year: int, ticker: str, name: str, dates, close: float) -> str:
+    frame = pd.DataFrame(
+        {
+            "ticker": ticker,
+            "date": pd.to_datetime(dates),
+            "open": close,
+            "high": close,
+            "low": close,
+            "close": close,
+            "volume": 100,
+            "adj_close": close,
+        }
+    )
+    buf = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), buf)
+    key = f"{PREFIX}/year={year}/ticker={ticker}/{name}.parquet"
+    s3.put_object(Bucket=BUCKET, Key=key, Body=buf.getvalue())
+    return key
+
+
+def read_object(s3, key: str) -> pd.DataFrame:
+    body = s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+    return pq.read_table(pa.BufferReader(body)).to_pandas()
+
+
+@pytest.fixture
+def s3():
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def dataset(s3):
+    days = pd.bdate_range("2025-01-02", periods=7)
+    keys = {
+        # Three objects, overlapping dates: compacted, later objects win.
+        "AAA": [
+            put_bars(s3, 2025, "AAA", "part-1", days[:5], 1.0),
+            put_bars(s3, 2025, "AAA", "part-2", days[3:6], 2.0),
+            put_bars(s3, 2025, "AAA", "part-3", days[5:], 3.0),
+        ],
+        # Two objects: not over max_files=2.
+        "BBB": [
+            put_bars(s3, 2025, "BBB", "part-1", days[:3], 1.0),
+            put_bars(s3, 2025, "BBB", "part-2", days[3:], 1.0),
+        ],
+        # A single object is never compacted.
+        "CCC": [put_bars(s3, 2025, "CCC", "part-1", days, 1.0)],
+        # Over max_files, but outside --years.
+        "AAA_2024": [
+            put_bars(s3, 2024, "AAA", f"part-{i}", pd.bdate_range("2024-06-03", periods=2) + pd.Timedelta(days=7 * i), 1.0)
+            for i in range(3)
+        ],
+    }
+    return days, keys
+
+
+def test_compact_dataset_merges_selected_partitions_and_swaps_the_manifest(s3, dataset):
+    days, keys = dataset
+    recording = RecordingS3(s3)
+
+    summary = compact_dataset(
+        recording, BUCKET, PREFIX, max_files=2, small_mb=0, years=[2025], workers=2,
+    )
+
+    assert summary == {"partitions": 1, "objects_removed": 3, "objects_written": 1}
+    live = {o["Key"] for o in list_objects(s3, BUCKET, PREFIX)}
+    assert not live & set(keys["AAA"])
+    assert set(keys["BBB"] + keys["CCC"] + keys["AAA_2024"]) <= live
+    (compacted,) = [k for k in live if "/year=2025/ticker=AAA/" in k]
+
+    merged = read_object(s3, compacted)
+    assert list(merged["date"]) == list(days)
+    assert list(merged["close"]) == [1.0, 1.0, 1.0, 2.0, 2.0, 3.0, 3.0]
+    assert (merged["ticker"] == "AAA").all()
+
+    manifest = load_manifest(s3, BUCKET, PREFIX)
+    assert set(manifest["key"]) == live
+    row = manifest.set_index("key").loc[compacted]
+    assert row["rows"] == len(days)
+    assert pd.Timestamp(row["max_date"]) == days[-1]
+
+    # Initial sync, then the swap; the old objects go only after the manifest drops them.
+    assert recording.calls == [("manifest", None), ("manifest", None), ("delete", sorted(keys["AAA"]))]
+
+
+def test_compact_dataset_dry_run_leaves_the_bucket_untouched(s3, dataset):
+    before = {o["Key"]: o["ETag"] for o in list_objects(s3, BUCKET, PREFIX)}
+    recording = RecordingS3(s3)
+
+    summary = compact_dataset(recording, BUCKET, PREFIX, max_files=2, small_mb=0, dry_run=True)
+
+    assert summary == {"partitions": 0, "objects_removed": 0, "objects_written": 0}
+    assert {o["Key"]: o["ETag"] for o in list_objects(s3, BUCKET, PREFIX)} == before
+    assert load_manifest(s3, BUCKET, PREFIX) is None
+    assert recording.calls == []
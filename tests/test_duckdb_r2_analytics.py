@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from duckdb_r2_analytics import MATERIALIZED_TABLES, StockDataAnalytic
+
+
+TODAY = pd.Timestamp.now().normalize()
+DATES = pd.bdate_range(TODAY - pd.Timedelta(days=500), TODAY - pd.Timedelta(days=1))
+
+
+def write_bars(root: Path, ticker: str, dates: pd.DatetimeIndex, tag: str) -> None:
+    rng = np.random.default_rng(sum(map(ord, ticker + tag)))
+    close = 100 + rng.normal(0, 1, len(dates)).cumsum()
+    frame = pd.DataFrame(
+        {
+            "ticker": ticker,
+            "date": dates,
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": rng.integers(1, 1000, len(dates)),
+            "adj_close": close,
+        }
+    )
+    for year, chunk in frame.groupby(frame["date"].dt.year):
+        path = root / f"year={year}" / f"ticker={ticker}" / f"part-{tag}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        chunk.to_parquet(path, index=False)
+
+
+def local_engine(root: Path) -> StockDataAnalytic:
+    """Engine over a local hive-partitioned directory, without a manifest."""
+    engine = StockDataAnalytic.__new__(StockDataAnalytic)
+    engine.con = duckdb.connect()
+    engine.manifest = lambda refresh=False: None
+    source = f"read_parquet('{root.as_posix()}/**/*.parquet', hive_partitioning=1)"
+    engine.dataset_source = lambda tickers=None, start_date=None, end_date=None: source
+    return engine
+
+
+def history(engine: StockDataAnalytic) -> pd.DataFrame:
+    return engine.to_pandas("SELECT * FROM mat_price_history ORDER BY ticker, date")
+
+
+def test_refresh_materialized_backfills_lagging_and_new_tickers(tmp_path):
+    overlap_days = 10
+    lag_cut = len(DATES) - 30  # ~40 calendar days behind, well past overlap_days
+    write_bars(tmp_path, "AAA", DATES[:-1], "a")
+    write_bars(tmp_path, "BBB", DATES[:lag_cut], "a")
+
+    engine = local_engine(tmp_path)
+    engine.refresh_materialized(overlap_days=overlap_days)
+
+    # AAA gets one new bar, BBB is backfilled after lagging, CCC appears with full history.
+    write_bars(tmp_path, "AAA", DATES[-1:], "b")
+    write_bars(tmp_path, "BBB", DATES[lag_cut:], "b")
+    write_bars(tmp_path, "CCC", DATES, "a")
+    engine.refresh_materialized(overlap_days=overlap_days)
+
+    reloaded = local_engine(tmp_path)
+    reloaded.refresh_materialized(overlap_days=overlap_days)
+
+    pd.testing.assert_frame_equal(history(engine), history(reloaded))
+    assert history(engine).groupby("ticker")["date"].max().eq(DATES[-1]).all()
+    for name in MATERIALIZED_TABLES:
+        pd.testing.assert_frame_equal(engine.materialized(name), reloaded.materialized(name))
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from native_indicators import NATIVE_COLUMNS, PSAR_REVERSAL_COLUMN
+from parallel_technical_indicators import KEEP_PREFIXES, _compute_indicator_frame, compare_indicator_frames
+
+
+# (rtol, atol) per output column. Both engines end in float32, so the default allows a few
+# float32 ulps; columns that cross zero or accumulate (MACD, momentum, CCI, OBV) get an
+# absolute floor in their own units.
+DEFAULT_TOLERANCE = (1e-5, 1e-6)
+TOLERANCES = {
+    "MACD_12_26_9": (1e-5, 1e-3),
+    "MACDh_12_26_9": (1e-5, 1e-3),
+    "MACDs_12_26_9": (1e-5, 1e-3),
+    "MOM_10": (1e-5, 1e-3),
+    "ROC_10": (1e-5, 1e-5),
+    "CCI_14_0.015": (1e-5, 1e-3),
+    "BBP_20_2.0_2.0": (1e-5, 1e-5),
+    "CMF_20": (1e-5, 1e-6),
+    "OBV": (1e-6, 1.0),
+}
+
+
+def fixture(rows: int = 400, seed: int = 7) -> pd.DataFrame:
+    """Date-indexed KRX-like bars: integer prices, a flat stretch and a zero-volume day."""
+    rng = np.random.default_rng(seed)
+    close = np.round(10_000 + rng.normal(0, 120, rows).cumsum())
+    if rows > 165:
+        close[150:165] = close[149]
+    high = close + np.abs(rng.normal(0, 80, rows)).round()
+    low = close - np.abs(rng.normal(0, 80, rows)).round()
+    volume = rng.integers(1_000, 500_000, rows).astype(float)
+    volume[min(200, rows - 1)] = 0.0
+    return pd.DataFrame(
+        {
+            "Ticker": "FIX",
+            "Open": np.clip(close + rng.normal(0, 40, rows).round(), low, high),
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Volume": volume,
+        },
+        index=pd.bdate_range("2020-01-01", periods=rows, name="Date"),
+    )
+
+
+def both_engines(df: pd.DataFrame):
+    reference, _ = _compute_indicator_frame(df.copy(), "FIX", "pandas_ta")
+    native, _ = _compute_indicator_frame(df.copy(), "FIX", "native")
+    return reference, native
+
+
+def test_native_columns_cover_keep_prefixes():
+    reference, native = both_engines(fixture())
+    assert list(native.columns) == list(reference.columns)
+    indicator_columns = [c for c in reference.columns if c.startswith(KEEP_PREFIXES)]
+    assert indicator_columns == list(NATIVE_COLUMNS)
+
+
+@pytest.mark.parametrize("column", [c for c in NATIVE_COLUMNS if c != PSAR_REVERSAL_COLUMN])
+def test_native_matches_pandas_ta(column):
+    reference, native = both_engines(fixture())
+    expected = reference[column].to_numpy(dtype=np.float64)
+    got = native[column].to_numpy(dtype=np.float64)
+    rtol, atol = TOLERANCES.get(column, DEFAULT_TOLERANCE)
+    assert np.array_equal(np.isnan(expected), np.isnan(got))
+    assert np.count_nonzero(~np.isnan(expected)) > 0
+    np.testing.assert_allclose(got, expected, rtol=rtol, atol=atol, equal_nan=True)
+
+
+def test_psar_reversals_match_exactly():
+    reference, native = both_engines(fixture())
+    np.testing.assert_array_equal(native[PSAR_REVERSAL_COLUMN], reference[PSAR_REVERSAL_COLUMN])
+    assert native[PSAR_REVERSAL_COLUMN].sum() > 0
+
+
+def test_short_history_skips_the_same_indicators():
+    # 60 bars: SMA_120 and friends are below their minimum length in both engines.
+    reference, native = both_engines(fixture(rows=60))
+    assert compare_indicator_frames(reference, native) == {}
+    assert native["SMA_120"].isna().all()
@@ -0,0 +1,214 @@
+import sys
+import types
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("psycopg2")
+# Every test replaces relational_stock_etl.yf with a fake; nothing here reaches Yahoo.
+sys.modules.setdefault("yfinance", types.ModuleType("yfinance"))
+
+import relational_stock_etl as etl
+
+
+SCHEMA_SQL = Path(__file__).resolve().parents[1] / "relational_stock_schema.sql"
+DATES = pd.bdate_range("2025-01-02", periods=140, name="Date")
+# Half-way cases for numeric(18,4): both load paths must round them like
+# Decimal(str(x)).quantize(Decimal("0.0001"), ROUND_HALF_UP).
+TIES = [10.12345, 5e-05, 0.00015, 2.00005, 1234.56785]
+
+
+def yahoo_bars(seed: int, dates: pd.DatetimeIndex = DATES) -> pd.DataFrame:
+    """A frame shaped like one ticker of yf.download(..., auto_adjust=False)."""
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(0, 1, len(dates)).cumsum()
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Adj Close": close * 0.98,
+            "Volume": rng.integers(0, 10**6, len(dates)).astype(float),
+        },
+        index=dates,
+    )
+
+
+def prepared(symbol: str = "AAA") -> pd.DataFrame:
+    return etl.prepare_history(symbol, yahoo_bars(1))
+
+
+def test_clean_frame_drops_bad_prices_and_nulls_non_finite_metrics():
+    df = prepared()
+    df.loc[3, "open"] = np.inf
+    df.loc[4, "close"] = np.nan
+    df.loc[5, "adj_close"] = -np.inf
+    df["high"] = df["high"].astype(object)
+    df.loc[6, "high"] = "n/a"
+    df.loc[7, "rsi_14"] = np.inf
+    df.loc[8, "daily_return"] = -np.inf
+    df.loc[9, "volume"] = np.nan
+
+    frame = etl.clean_frame("AAA", df)
+
+    assert list(frame.columns) == etl.ROW_COLUMNS
+    assert len(frame) == len(df) - 4
+    assert not set(frame["trade_date"]) & set(df.loc[3:6, "trade_date"])
+    assert np.isfinite(frame[etl.PRICE_COLUMNS]).all().all()
+    assert frame["volume"].dtype == "int64"
+    assert frame.loc[frame["trade_date"] == df.loc[9, "trade_date"], "volume"].item() == 0
+    assert (frame["symbol"] == "AAA").all()
+
+    rows = {row[1]: row for row in etl.frame_to_rows(frame)}
+    rsi_at = etl.ROW_COLUMNS.index("rsi_14")
+    return_at = etl.ROW_COLUMNS.index("daily_return")
+    assert rows[df.loc[7, "trade_date"]][rsi_at] is None
+    assert rows[df.loc[8, "trade_date"]][return_at] is None
+    # Warm-up NaNs become None as well; finite values stay plain floats.
+    sma_at = etl.ROW_COLUMNS.index("sma_120")
+    assert rows[df.loc[0, "trade_date"]][sma_at] is None
+    assert isinstance(rows[df.loc[130, "trade_date"]][sma_at], float)
+
+
+@pytest.fixture(scope="module")
+def pg_dsn(tmp_path_factory):
+    pgserver = pytest.importorskip("pgserver")
+    server = pgserver.get_server(tmp_path_factory.mktemp("pg"))
+    yield server.get_uri()
+    server.cleanup()
+
+
+@pytest.fixture
+def conn(pg_dsn):
+    import psycopg2
+
+    schema = SCHEMA_SQL.read_text(encoding="utf-8")
+    connection = psycopg2.connect(pg_dsn)
+    with connection.cursor() as cur:
+        cur.execute("drop table if exists public.stock_daily_prices")
+        cur.execute(schema)
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def stored_rows(conn) -> list:
+    with conn.cursor() as cur:
+        cur.execute(f"select {', '.join(etl.ROW_COLUMNS)} from public.stock_daily_prices order by symbol, trade_date")
+        return cur.fetchall()
+
+
+def test_load_methods_store_identical_rounded_rows(conn):
+    raw = yahoo_bars(2)
+    raw.iloc[20 : 20 + len(TIES), raw.columns.get_loc("Open")] = TIES
+    raw.iloc[20 : 20 + len(TIES), raw.columns.get_loc("Adj Close")] = TIES
+    raw.iloc[30, raw.columns.get_loc("Close")] = np.inf
+    raw.iloc[31, raw.columns.get_loc("Volume")] = np.nan
+
+    stored = {}
+    for method in ("values", "copy"):
+        with conn.cursor() as cur:
+            cur.execute("truncate public.stock_daily_prices")
+            written = etl.write_symbol(cur, "AAA", raw, batch_size=50, load_method=method)
+        conn.commit()
+        stored[method] = stored_rows(conn)
+        assert written == len(raw) - 1
+
+    assert stored["values"] == stored["copy"]
+
+    open_at = etl.ROW_COLUMNS.index("open")
+    adj_at = etl.ROW_COLUMNS.index("adj_close")
+    for row, x in zip(stored["copy"][20 : 20 + len(TIES)], TIES):
+        expected = Decimal(str(x)).quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
+        assert row[open_at] == expected
+        assert row[adj_at] == expected
+    assert stored["copy"][20][open_at] == Decimal("10.1235")
+    assert stored["copy"][21][open_at] == Decimal("0.0001")
+
+
+class FakeYahoo:
+    """Stands in for the yfinance module: yf.download plus the shared._ERRORS table it fills."""
+
+    def __init__(self, bars, errors=()):
+        self.bars = bars
+        self.errors = set(errors)
+        self.shared = types.SimpleNamespace(_ERRORS={})
+        self.calls = []
+
+    def download(self, tickers, start, end, **kwargs):
+        self.calls.append(list(tickers))
+        # yfinance resets the table on every call and reports failed tickers with all-NaN columns.
+        self.shared._ERRORS = {t: "YFPricesMissingError('possibly delisted')" for t in tickers if t in self.errors}
+        empty = yahoo_bars(0).iloc[:0]
+        frames = {}
+        for ticker in tickers:
+            if ticker not in self.bars:
+                continue
+            bars = empty if ticker in self.errors else self.bars[ticker]
+            frames[ticker] = bars[(bars.index >= start) & (bars.index < end)]
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+
+def test_download_history_marks_reported_missing_and_raising_symbols_failed(monkeypatch):
+    yahoo = FakeYahoo({"AAA": yahoo_bars(1), "CCC": yahoo_bars(3), "EEE": yahoo_bars(5).iloc[:0]}, errors={"CCC"})
+    monkeypatch.setattr(etl, "yf", yahoo)
+
+    out = etl.download_history(["AAA", "CCC", "DDD", "EEE"], DATES[0].date(), DATES[-1].date())
+
+    assert yahoo.calls == [["AAA", "CCC", "DDD", "EEE"]]
+    assert len(out["AAA"]) == len(DATES)
+    assert out["CCC"] is None  # in shared._ERRORS
+    assert out["DDD"] is None  # not in the result at all
+    assert out["EEE"] is not None and out["EEE"].empty  # no bars is 0 rows, not a failure
+
+    def broken(*args, **kwargs):
+        raise ConnectionError("rate limited")
+
+    monkeypatch.setattr(yahoo, "download", broken)
+    assert etl.download_history(["AAA", "EEE"], DATES[0].date(), DATES[-1].date()) == {"AAA": None, "EEE": None}
+
+
+@pytest.mark.parametrize(
+    ("commit_every", "load_method"),
+    [(1, "values"), (10, "values"), (10, "copy")],
+)
+def test_run_etl_isolates_a_failing_symbol(conn, pg_dsn, monkeypatch, caplog, commit_every, load_method):
+    import psycopg2
+
+    overflow = yahoo_bars(2)
+    overflow["Open"] = 1e16  # numeric(18,4) overflow: the upsert raises inside the transaction
+    bars = {
+        "AAA": yahoo_bars(1),
+        "BBB": overflow,
+        "CCC": yahoo_bars(3),
+        "EEE": yahoo_bars(5).iloc[:0],
+        "FFF": yahoo_bars(6),
+    }
+    yahoo = FakeYahoo(bars, errors={"CCC"})
+    monkeypatch.setattr(etl, "yf", yahoo)
+    monkeypatch.setattr(etl, "db_connect", lambda: psycopg2.connect(pg_dsn))
+
+    results = etl.run_etl(
+        ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF"],
+        mode="full",
+        full_start_date=DATES[0].date(),
+        end_date=DATES[-1].date(),
+        batch_size=50,
+        load_method=load_method,
+        download_chunk=3,
+        commit_every=commit_every,
+    )
+
+    assert yahoo.calls == [["AAA", "BBB", "CCC"], ["DDD", "EEE", "FFF"]]
+    assert results == {"AAA": len(DATES), "BBB": 0, "CCC": 0, "DDD": 0, "EEE": 0, "FFF": len(DATES)}
+    # AAA shares a transaction with BBB when commit_every > 1 and must still be committed.
+    with conn.cursor() as cur:
+        cur.execute("select symbol, count(*) from public.stock_daily_prices group by symbol order by symbol")
+        assert cur.fetchall() == [("AAA", len(DATES)), ("FFF", len(DATES))]
+    # Download and upsert failures are reported; a symbol with no bars is not.
+    (summary,) = [r.getMessage() for r in caplog.records if "실패 심볼" in r.getMessage()]
+    assert summary.endswith("3개 | BBB,CCC,DDD")
@@ -0,0 +1,127 @@
+"""
+Verify (and optionally rebuild) the per-ticker watermarks of the R2 dataset.
+
+The daily update takes each ticker's latest stored date from
+<prefix>/_manifest/watermarks.parquet instead of scanning the dataset. Objects written
+or deleted outside the manifest-maintaining writers (manual uploads, interrupted runs)
+make it drift. This lists the bucket, describes objects the manifest does not know
+(footer reads only), and compares the resulting watermarks with the stored ones.
+
+Usage:
+  python verify_r2_watermarks.py             # report drift, exit 1 if any
+  python verify_r2_watermarks.py --rebuild   # rewrite manifest + watermarks from the bucket
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import Dict, Optional
+
+import boto3
+import pandas as pd
+from dotenv import load_dotenv
+
+from r2_manifest import (
+    list_objects,
+    load_manifest,
+    load_watermarks,
+    save_manifest,
+    sync_manifest,
+    watermarks_from_manifest,
+)
+
+
+def env_required(name: str) -> str:
+    value = os.getenv(name)
+    if not value:
+        raise RuntimeError(f"Missing required env var: {name}")
+    return value
+
+
+def make_s3_client():
+    return boto3.client(
+        "s3",
+        endpoint_url=env_required("R2_ENDPOINT"),
+        aws_access_key_id=env_required("R2_ACCESS_KEY_ID"),
+        aws_secret_access_key=env_required("R2_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("R2_REGION", "auto"),
+    )
+
+
+def compare_watermarks(stored: Optional[pd.DataFrame], expected: pd.DataFrame) -> pd.DataFrame:
+    """Tickers whose stored max_date or row count differs from the bucket (or is missing)."""
+    if stored is None:
+        stored = expected.iloc[0:0]
+    merged = stored.merge(expected, on="ticker", how="outer", suffixes=("_stored", "_bucket"))
+    same_date = (merged["max_date_stored"] == merged["max_date_bucket"]) | (
+        merged["max_date_stored"].isna() & merged["max_date_bucket"].isna()
+    )
+    same_rows = merged["rows_stored"] == merged["rows_bucket"]
+    return merged[~(same_date & same_rows)].sort_values("ticker").reset_index(drop=True)
+
+
+def verify_watermarks(s3, bucket: str, prefix: str, rebuild: bool = False, workers: int = 16) -> Dict[str, int]:
+    prefix = prefix.strip("/")
+    objects = list_objects(s3, bucket, prefix)
+    manifest = load_manifest(s3, bucket, prefix)
+    synced_manifest, synced = sync_manifest(s3, bucket, prefix, manifest, objects, workers)
+    stored = load_watermarks(s3, bucket, prefix)
+    drift = compare_watermarks(stored, watermarks_from_manifest(synced_manifest))
+
+    print(
+        f"[WATERMARK] objects={len(objects)} manifest_missing={synced['added']} "
+        f"manifest_stale={synced['removed']} drifted_tickers={len(drift)}"
+        + (" watermarks=absent" if stored is None else "")
+    )
+    if not drift.empty:
+        print(drift.head(50).to_string(index=False))
+
+    needs_write = (
+        manifest is None or stored is None or bool(synced["added"] or synced["removed"]) or not drift.empty
+    )
+    if rebuild and needs_write:
+        save_manifest(s3, bucket, prefix, synced_manifest)
+        print(f"[WATERMARK] rebuilt manifest ({len(synced_manifest)} objects) and watermarks")
+    return {
+        "objects": len(objects),
+        "manifest_added": synced["added"],
+        "manifest_removed": synced["removed"],
+        "drifted_tickers": len(drift),
+        "rebuilt": int(rebuild and needs_write),
+        "needs_write": int(needs_write),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Verify or rebuild ticker watermarks of the R2 dataset")
+    p.add_argument("--prefix", default=os.getenv("R2_DATASET_PREFIX", "market_data"))
+    p.add_argument("--rebuild", action="store_true", help="rewrite manifest and watermarks when they drifted")
+    p.add_argument("--workers", type=int, default=16)
+    return p.parse_args()
+
+
+def main() -> None:
+    load_dotenv(".env.r2.local", override=False)
+    load_dotenv(".env.local", override=False)
+    load_dotenv(".env", override=False)
+
+    args = parse_args()
+    summary = verify_watermarks(
+        make_s3_client(),
+        bucket=env_required("R2_BUCKET"),
+        prefix=args.prefix,
+        rebuild=args.rebuild,
+        workers=args.workers,
+    )
+    print(
+        "WATERMARK_DONE "
+        f"drifted={summary['drifted_tickers']} rebuilt={summary['rebuilt']} objects={summary['objects']}"
+    )
+    if summary["needs_write"] and not summary["rebuilt"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()